@@ -0,0 +1,117 @@
+"""Shared FastAPI app construction: lifespan, middleware and exception handlers.
+
+Every entry point (gateway, realtime tier, standalone services) builds its
+app here so CORS, proxy scheme handling, rate limiting and error mapping
+behave identically no matter how the platform is split across processes.
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from postgrest.exceptions import APIError as PostgRESTAPIError
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from supabase_auth.errors import AuthApiError
+
+from common.auth.security import prefetch_jwks
+from common.events.subscriber import start_subscriber
+from common.exceptions import (
+    OasisException,
+    auth_api_error_handler,
+    generic_exception_handler,
+    oasis_exception_handler,
+    postgrest_error_handler,
+)
+from common.rate_limit import limiter
+
+logger = logging.getLogger("oasis.app")
+
+
+# ---------------------------------------------------------------------------
+# Lifespan: startup / shutdown tasks
+# ---------------------------------------------------------------------------
+def build_lifespan(
+    *,
+    subscriber: bool = True,
+    background: Sequence[Callable[[], Awaitable[None]]] = (),
+):
+    """Lifespan that pre-fetches JWKS and (optionally) runs the Redis subscriber.
+
+    The subscriber fans events out to this process's WebSocket connections
+    and applies L1 cache invalidations, so REST-only processes keep it on for
+    the latter; it is a no-op broadcast when no sockets are connected.
+    *background* coroutines (e.g. the step-unlock notifier) run alongside it
+    and are cancelled on shutdown.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await prefetch_jwks()
+        factories = [start_subscriber] if subscriber else []
+        tasks = [asyncio.create_task(f()) for f in [*factories, *background]]
+        logger.info("Startup complete (%s)", app.title)
+        yield
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        logger.info("Shutdown complete (%s)", app.title)
+
+    return lifespan
+
+
+# ---------------------------------------------------------------------------
+# Middleware: propagar X-Forwarded-Proto para que FastAPI genere URLs HTTPS
+# en redirects 307 (trailing slash) cuando esta detras de Cloud Run / proxy.
+# ---------------------------------------------------------------------------
+async def set_scheme_from_proxy(request: Request, call_next):
+    proto = request.headers.get("x-forwarded-proto")
+    if proto:
+        request.scope["scheme"] = proto
+    return await call_next(request)
+
+
+def create_app(
+    *,
+    title: str,
+    description: str,
+    version: str = "1.0.0",
+    subscriber: bool = True,
+    background: Sequence[Callable[[], Awaitable[None]]] = (),
+) -> FastAPI:
+    app = FastAPI(
+        title=title,
+        version=version,
+        description=description,
+        lifespan=build_lifespan(subscriber=subscriber, background=background),
+    )
+
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    # CORS middleware — restricted to known origins
+    raw_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000")
+    allowed_origins = [o.strip() for o in raw_origins.split(",") if o.strip()]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allowed_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(set_scheme_from_proxy)
+
+    # Exception handlers globales (aplican a todos los routers incluidos)
+    app.add_exception_handler(OasisException, oasis_exception_handler)
+    app.add_exception_handler(AuthApiError, auth_api_error_handler)
+    app.add_exception_handler(PostgRESTAPIError, postgrest_error_handler)
+    app.add_exception_handler(Exception, generic_exception_handler)
+
+    return app
@@ -0,0 +1,74 @@
+"""In-process L1 cache sitting in front of Redis (one per uvicorn worker).
+
+Entries are raw JSON strings so callers always get a fresh decoded copy and
+can never mutate a shared object. The cache is only *enabled* while the
+pub/sub subscriber is connected: invalidations from other workers/pods
+arrive through that channel, so without it a local copy could go stale.
+When the subscriber drops, the cache is disabled and flushed.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("oasis.cache.local")
+
+_MAX_ENTRIES = 4096
+
+
+class LocalCache:
+    """Bounded LRU map of key → (expires_at, raw value)."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES) -> None:
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._max_entries = max_entries
+        self._enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self) -> None:
+        if not self._enabled:
+            self._enabled = True
+            logger.info("L1 cache enabled")
+
+    def disable(self) -> None:
+        """Stop serving local entries (invalidations can no longer be trusted)."""
+        if self._enabled:
+            self._enabled = False
+            self._entries.clear()
+            logger.info("L1 cache disabled and flushed")
+
+    def get(self, key: str) -> str | None:
+        if not self._enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        if not self._enabled or ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+local_cache = LocalCache()
@@ -3,6 +3,10 @@
 Provides a graceful-degradation singleton: if Redis is unavailable or
 UPSTASH_REDIS_URL is not set, every helper silently returns None / does
 nothing so the app keeps working without cache.
+
+Reads may opt into the in-process L1 cache (``local_ttl``). Deletes drop the
+local copy and broadcast a ``cache.invalidate`` event so every other worker
+drops theirs too (applied by common/events/subscriber.py).
 """
 
 from __future__ import annotations
@@ -11,6 +15,10 @@ import json
 import logging
 import os
 
+from common.cache.local_cache import local_cache
+from common.events.publisher import CHANNEL
+from common.events.schemas import EventType, RealtimeEvent
+
 logger = logging.getLogger("oasis.cache")
 
 _redis = None
@@ -46,28 +54,146 @@ def _get_redis():
 # Public helpers (all graceful — never raise on Redis failure)
 # ---------------------------------------------------------------------------
 
-def cache_get(key: str) -> str | None:
+def cache_get(key: str, local_ttl: int | None = None) -> str | None:
+    if local_ttl:
+        local = local_cache.get(key)
+        if local is not None:
+            return local
     try:
         r = _get_redis()
         if r is None:
             return None
-        return r.get(key)
+        value = r.get(key)
     except Exception:
         logger.warning("cache_get(%s) failed", key, exc_info=True)
         return None
+    if local_ttl and value is not None:
+        local_cache.set(key, value, local_ttl)
+    return value
 
 
-def cache_set(key: str, value: str, ttl_seconds: int = 300) -> None:
+def cache_set(
+    key: str,
+    value: str,
+    ttl_seconds: int = 300,
+    local_ttl: int | None = None,
+    nx: bool = False,
+) -> None:
+    """``nx=True`` only writes if *key* is absent (the L1 copy too), so a
+    read-path fill never overwrites what a writer stored meanwhile."""
+    if local_ttl and not nx:
+        local_cache.set(key, value, local_ttl)
     try:
         r = _get_redis()
         if r is None:
             return
-        r.set(key, value, ex=ttl_seconds)
+        stored = r.set(key, value, ex=ttl_seconds, nx=nx)
     except Exception:
         logger.warning("cache_set(%s) failed", key, exc_info=True)
+        return
+    if local_ttl and nx and stored:
+        local_cache.set(key, value, local_ttl)
+
+
+def cache_get_many(
+    keys: list[str], local_ttl: int | None = None
+) -> dict[str, str | None]:
+    """Multi-key ``cache_get``: L1 first, then one MGET for the rest."""
+    values: dict[str, str | None] = dict.fromkeys(keys)
+    missing = list(keys)
+    if local_ttl:
+        missing = []
+        for key in keys:
+            local = local_cache.get(key)
+            if local is not None:
+                values[key] = local
+            else:
+                missing.append(key)
+    if not missing:
+        return values
+    try:
+        r = _get_redis()
+        if r is None:
+            return values
+        fetched = dict(zip(missing, r.mget(*missing), strict=True))
+    except Exception:
+        logger.warning("cache_get_many(%d keys) failed", len(missing), exc_info=True)
+        return values
+    for key, value in fetched.items():
+        values[key] = value
+        if local_ttl and value is not None:
+            local_cache.set(key, value, local_ttl)
+    return values
+
+
+def cache_set_many(
+    items: dict[str, str],
+    ttl_seconds: int = 300,
+    local_ttl: int | None = None,
+    nx: bool = False,
+) -> None:
+    """Multi-key ``cache_set`` in a single pipelined round trip."""
+    if not items:
+        return
+    if local_ttl and not nx:
+        for key, value in items.items():
+            local_cache.set(key, value, local_ttl)
+    try:
+        r = _get_redis()
+        if r is None:
+            return
+        pipe = r.pipeline()
+        for key, value in items.items():
+            pipe.set(key, value, ex=ttl_seconds, nx=nx)
+        stored = dict(zip(items, pipe.exec(), strict=True))
+    except Exception:
+        logger.warning("cache_set_many(%d keys) failed", len(items), exc_info=True)
+        return
+    if local_ttl and nx:
+        for key, value in items.items():
+            if stored[key]:
+                local_cache.set(key, value, local_ttl)
+
+
+def cache_claim(key: str, ttl_seconds: int = 300, value: str = "1") -> bool:
+    """SET NX: True if this caller is the first to claim *key*.
+
+    Used to de-duplicate work across workers; *value* is stored as the
+    claim's marker. Without Redis every caller wins (single-process behaviour).
+    """
+    try:
+        r = _get_redis()
+        if r is None:
+            return True
+        return bool(r.set(key, value, ex=ttl_seconds, nx=True))
+    except Exception:
+        logger.warning("cache_claim(%s) failed", key, exc_info=True)
+        return True
+
+
+def cache_claim_many(keys: list[str], ttl_seconds: int = 300) -> list[bool]:
+    """Multi-key ``cache_claim`` in a single pipelined round trip; one flag
+    per key, in order."""
+    if not keys:
+        return []
+    try:
+        r = _get_redis()
+        if r is None:
+            return [True] * len(keys)
+        pipe = r.pipeline()
+        for key in keys:
+            pipe.set(key, "1", ex=ttl_seconds, nx=True)
+        results = pipe.exec()
+        if len(results) != len(keys):
+            raise ValueError(f"{len(results)} replies for {len(keys)} keys")
+        return [bool(ok) for ok in results]
+    except Exception:
+        logger.warning("cache_claim_many(%d keys) failed", len(keys), exc_info=True)
+        return [True] * len(keys)
 
 
 def cache_delete(key: str) -> None:
+    local_cache.invalidate(key)
     try:
         r = _get_redis()
         if r is None:
@@ -75,10 +201,24 @@ def cache_delete(key: str) -> None:
         r.delete(key)
     except Exception:
         logger.warning("cache_delete(%s) failed", key, exc_info=True)
+        return
+    _publish_invalidation([key])
 
 
-def cache_get_json(key: str) -> dict | list | None:
-    raw = cache_get(key)
+def _publish_invalidation(keys: list[str]) -> None:
+    """Tell every worker (all pods) to drop *keys* from its L1 cache."""
+    try:
+        r = _get_redis()
+        if r is None:
+            return
+        event = RealtimeEvent(type=EventType.CACHE_INVALIDATE, payload={"keys": keys})
+        r.publish(CHANNEL, event.model_dump_json())
+    except Exception:
+        logger.warning("cache invalidation publish failed (%s)", keys, exc_info=True)
+
+
+def cache_get_json(key: str, local_ttl: int | None = None) -> dict | list | None:
+    raw = cache_get(key, local_ttl)
     if raw is None:
         return None
     try:
@@ -87,13 +227,45 @@ def cache_get_json(key: str) -> dict | list | None:
         return None
 
 
-def cache_set_json(key: str, value, ttl_seconds: int = 300) -> None:
+def cache_set_json(
+    key: str,
+    value,
+    ttl_seconds: int = 300,
+    local_ttl: int | None = None,
+    nx: bool = False,
+) -> None:
     try:
-        cache_set(key, json.dumps(value, default=str), ttl_seconds)
+        cache_set(key, json.dumps(value, default=str), ttl_seconds, local_ttl, nx)
     except (TypeError, ValueError):
         logger.warning("cache_set_json(%s) serialization failed", key, exc_info=True)
 
 
+def cache_get_many_json(
+    keys: list[str], local_ttl: int | None = None
+) -> dict[str, dict | list | None]:
+    out: dict[str, dict | list | None] = {}
+    for key, raw in cache_get_many(keys, local_ttl).items():
+        try:
+            out[key] = json.loads(raw) if raw is not None else None
+        except (json.JSONDecodeError, TypeError):
+            out[key] = None
+    return out
+
+
+def cache_set_many_json(
+    items: dict,
+    ttl_seconds: int = 300,
+    local_ttl: int | None = None,
+    nx: bool = False,
+) -> None:
+    try:
+        encoded = {key: json.dumps(value, default=str) for key, value in items.items()}
+    except (TypeError, ValueError):
+        logger.warning("cache_set_many_json serialization failed", exc_info=True)
+        return
+    cache_set_many(encoded, ttl_seconds, local_ttl, nx)
+
+
 def cache_ping() -> bool:
     """Health-check helper. Returns True if Redis responds."""
     try:
@@ -0,0 +1,97 @@
+"""Bounded fan-out for independent PostgREST queries.
+
+supabase/postgrest builders are immutable once built and share one httpx
+AsyncClient, so independent ``.execute()`` coroutines can run concurrently.
+The semaphore keeps a single request from monopolising the connection pool.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+DEFAULT_CONCURRENCY = 6
+
+# ~200 UUIDs ≈ 7.5 KB of query string: well under PostgREST / proxy URL limits.
+DEFAULT_IN_CHUNK_SIZE = 200
+
+# Below PostgREST's max-rows (1000 by default): a short page means "last page".
+DEFAULT_PAGE_SIZE = 500
+
+
+async def gather_limited(
+    *aws: Awaitable[Any], limit: int = DEFAULT_CONCURRENCY
+) -> list[Any]:
+    """Like ``asyncio.gather`` (results in input order, first error raises)
+    but with at most *limit* awaitables in flight at once."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await aw
+
+    return list(await asyncio.gather(*(_run(aw) for aw in aws)))
+
+
+@dataclass
+class ChunkedResult:
+    """Merged ``data`` / ``count`` of a chunked query (same shape as an APIResponse)."""
+
+    data: list[Any] = field(default_factory=list)
+    count: int | None = None
+
+
+async def fetch_in_chunks(
+    build: Callable[[list[Any]], Awaitable[Any]],
+    values: Iterable[Any],
+    *,
+    chunk_size: int = DEFAULT_IN_CHUNK_SIZE,
+    limit: int = DEFAULT_CONCURRENCY,
+) -> ChunkedResult:
+    """Run ``build(chunk)`` for each *chunk_size* slice of *values* and merge.
+
+    *build* receives one chunk and returns the awaitable ``.execute()`` of a
+    query filtered with ``.in_(column, chunk)``. Rows are concatenated in
+    chunk order and counts are summed, so only use it for queries whose
+    result is a plain union over the IN values (no order/range across chunks).
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return ChunkedResult(data=[], count=0)
+
+    responses = await gather_limited(
+        *(build(values[i:i + chunk_size]) for i in range(0, len(values), chunk_size)),
+        limit=limit,
+    )
+    merged = ChunkedResult()
+    for response in responses:
+        merged.data.extend(response.data or [])
+        if response.count is not None:
+            merged.count = (merged.count or 0) + response.count
+    return merged
+
+
+async def fetch_all_pages(
+    build: Callable[[], Any],
+    *,
+    key: str = "id",
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> list[Any]:
+    """Every row of a query, paginated by keyset on *key* (unique, sortable).
+
+    *build* returns a fresh, un-executed filtered query each call; this adds
+    ``.gt(key, last)``, ``.order(key)`` and ``.limit(page_size)``. Use it
+    wherever the result size is not bounded, so PostgREST's max-rows cap
+    never truncates silently. Rows come back ordered by *key*.
+    """
+    rows: list[Any] = []
+    last: Any = None
+    while True:
+        query = build()
+        if last is not None:
+            query = query.gt(key, last)
+        page = (await query.order(key).limit(page_size).execute()).data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last = page[-1][key]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 from collections import defaultdict
 
 from fastapi import WebSocket
@@ -10,32 +11,120 @@ from common.events.schemas import RealtimeEvent
 
 logger = logging.getLogger("oasis.events.manager")
 
+# Coalescing window for connections that opt into batched delivery (?batch=1).
+_BATCH_WINDOW = float(os.getenv("WS_BATCH_WINDOW_MS", "50")) / 1000
+
+# Admission limits (0 = unlimited). Each uvicorn worker owns its own manager,
+# so the pod-wide ceiling is WS_MAX_CONNECTIONS × workers.
+_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "0"))
+_MAX_CONNECTIONS_PER_ORG = int(os.getenv("WS_MAX_CONNECTIONS_PER_ORG", "0"))
+
 
 class ConnectionManager:
-    """Per-pod registry of active WebSocket connections, keyed by org_id.
+    """Per-pod registry of active WebSocket connections, keyed by org_id
+    (and by user_id for user-targeted events).
 
     Thread-safety: asyncio.Lock guards all mutation; I/O (send) happens
     outside the lock to avoid holding it while awaiting network ops.
+
+    Admission: ``connect`` returns False (and registers nothing) when the
+    process-wide or any per-org connection cap is reached; the caller is
+    expected to close with 1013 so the client retries on another instance.
+
+    Batching: connections registered with ``batch=True`` never get a frame
+    per event. Payloads are queued and flushed as one JSON array frame once
+    the batch window elapses. Queueing has no await points, so the pending
+    buffers need no lock.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        batch_window: float = _BATCH_WINDOW,
+        max_connections: int = _MAX_CONNECTIONS,
+        max_connections_per_org: int = _MAX_CONNECTIONS_PER_ORG,
+    ) -> None:
         self._connections: defaultdict[str, set[WebSocket]] = defaultdict(set)
+        self._users: defaultdict[str, set[WebSocket]] = defaultdict(set)
+        self._sockets: set[WebSocket] = set()
         self._lock = asyncio.Lock()
-
-    async def connect(self, ws: WebSocket, org_ids: list[str]) -> None:
+        self._max_connections = max_connections
+        self._max_connections_per_org = max_connections_per_org
+        self._rejected = 0
+        self._batch_window = batch_window
+        self._batching: set[WebSocket] = set()
+        self._pending: dict[WebSocket, list[str]] = {}
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    async def connect(
+        self,
+        ws: WebSocket,
+        org_ids: list[str],
+        batch: bool = False,
+        user_id: str | None = None,
+    ) -> bool:
         async with self._lock:
+            full_org = self._over_capacity(org_ids)
+            if full_org is not None:
+                self._rejected += 1
+                logger.warning(
+                    "WS rejected — capacity reached (%s); total=%d",
+                    full_org, len(self._sockets),
+                )
+                return False
+            self._sockets.add(ws)
             for org_id in org_ids:
                 self._connections[org_id].add(ws)
-        logger.debug("WS connected — orgs: %s", org_ids)
+            if user_id:
+                self._users[user_id].add(ws)
+            if batch:
+                self._batching.add(ws)
+        logger.debug("WS connected — orgs: %s (batch=%s)", org_ids, batch)
+        return True
+
+    def _over_capacity(self, org_ids: list[str]) -> str | None:
+        """Return a label of the exhausted limit, or None if there is room."""
+        if self._max_connections and len(self._sockets) >= self._max_connections:
+            return "process"
+        if self._max_connections_per_org:
+            limit = self._max_connections_per_org
+            for org_id in org_ids:
+                if len(self._connections.get(org_id, ())) >= limit:
+                    return f"org={org_id}"
+        return None
 
-    async def disconnect(self, ws: WebSocket, org_ids: list[str]) -> None:
+    async def disconnect(
+        self, ws: WebSocket, org_ids: list[str], user_id: str | None = None
+    ) -> None:
         async with self._lock:
+            self._sockets.discard(ws)
             for org_id in org_ids:
                 self._connections[org_id].discard(ws)
                 if not self._connections[org_id]:
                     del self._connections[org_id]
+            if user_id:
+                self._users[user_id].discard(ws)
+                if not self._users[user_id]:
+                    del self._users[user_id]
+            self._batching.discard(ws)
+            self._pending.pop(ws, None)
         logger.debug("WS disconnected — orgs: %s", org_ids)
 
+    def gauges(self) -> dict:
+        """Point-in-time capacity gauges for this worker process."""
+        per_org = {org_id: len(conns) for org_id, conns in self._connections.items()}
+        return {
+            "connections": len(self._sockets),
+            "max_connections": self._max_connections or None,
+            "max_connections_per_org": self._max_connections_per_org or None,
+            "orgs": len(per_org),
+            "users": len(self._users),
+            "largest_org": max(per_org.values(), default=0),
+            "connections_per_org": per_org,
+            "batching_connections": len(self._batching),
+            "pending_batches": len(self._pending),
+            "rejected_total": self._rejected,
+        }
+
     async def broadcast_to_org(self, org_id: str, event: RealtimeEvent) -> None:
         payload = event.model_dump_json()
         async with self._lock:
@@ -46,9 +135,7 @@ class ConnectionManager:
 
         dead: set[WebSocket] = set()
         for ws in targets:
-            try:
-                await ws.send_text(payload)
-            except Exception:
+            if not await self._send(ws, payload):
                 dead.add(ws)
 
         if dead:
@@ -56,6 +143,15 @@ class ConnectionManager:
                 for ws in dead:
                     self._connections[org_id].discard(ws)
 
+    async def send_to_user(self, user_id: str, event: RealtimeEvent) -> None:
+        payload = event.model_dump_json()
+        async with self._lock:
+            targets = set(self._users.get(user_id, set()))
+
+        for ws in targets:
+            if not await self._send(ws, payload):
+                await self._drop(ws)
+
     async def broadcast_all(self, event: RealtimeEvent) -> None:
         payload = event.model_dump_json()
         async with self._lock:
@@ -66,10 +162,56 @@ class ConnectionManager:
             }
 
         for ws in all_ws:
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                pass  # Stale connections cleaned up on next targeted broadcast
+            # Stale connections cleaned up on next targeted broadcast
+            await self._send(ws, payload)
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+    async def _send(self, ws: WebSocket, payload: str) -> bool:
+        """Deliver (or queue) a payload. Returns False if the socket is dead."""
+        if ws in self._batching:
+            self._enqueue(ws, payload)
+            return True
+        try:
+            await ws.send_text(payload)
+            return True
+        except Exception:
+            return False
+
+    def _enqueue(self, ws: WebSocket, payload: str) -> None:
+        buffer = self._pending.get(ws)
+        if buffer is not None:
+            buffer.append(payload)
+            return
+        self._pending[ws] = [payload]
+        task = asyncio.create_task(self._flush_later(ws))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_later(self, ws: WebSocket) -> None:
+        await asyncio.sleep(self._batch_window)
+        payloads = self._pending.pop(ws, None)
+        if not payloads:
+            return
+        try:
+            await ws.send_text("[" + ",".join(payloads) + "]")
+        except Exception:
+            await self._drop(ws)
+
+    async def _drop(self, ws: WebSocket) -> None:
+        """Remove a dead socket from every org it was registered in."""
+        async with self._lock:
+            self._sockets.discard(ws)
+            for org_id in [o for o, conns in self._connections.items() if ws in conns]:
+                self._connections[org_id].discard(ws)
+                if not self._connections[org_id]:
+                    del self._connections[org_id]
+            for user_id in [u for u, conns in self._users.items() if ws in conns]:
+                self._users[user_id].discard(ws)
+                if not self._users[user_id]:
+                    del self._users[user_id]
+            self._batching.discard(ws)
 
 
 manager = ConnectionManager()
@@ -5,7 +5,7 @@ import logging
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
-from common.auth.security import verify_token
+from common.auth.security import AdminUser, verify_token
 from common.database.client import get_admin_client
 from common.events.connection_manager import manager
 
@@ -22,12 +22,19 @@ _PING_WINDOW = 35  # seconds
 async def websocket_endpoint(
     ws: WebSocket,
     token: str = Query(..., description="Supabase JWT"),
+    batch: bool = Query(False, description="Coalesce events into array frames"),
 ) -> None:
     """WebSocket endpoint for real-time event streaming.
 
+    Admission: when WS_MAX_CONNECTIONS / WS_MAX_CONNECTIONS_PER_ORG is reached
+    the socket is closed with 1013 right after accept.
+
     Authentication: pass the Supabase access token as ?token=<jwt>.
     Protocol: client sends "ping" every 30s; server replies "pong".
     Events: JSON-serialised RealtimeEvent objects pushed by the server.
+    With ?batch=1 every frame is a JSON array of RealtimeEvents collected over
+    a short window (WS_BATCH_WINDOW_MS). permessage-deflate is negotiated by
+    uvicorn (WS_PER_MESSAGE_DEFLATE in the Dockerfile).
     """
     # --- Validate JWT; accept + close with 4001 so the client sees auth failure ---
     try:
@@ -52,8 +59,12 @@ async def websocket_endpoint(
         logger.exception("Failed to fetch org memberships for user %s", user.id)
 
     await ws.accept()
-    await manager.connect(ws, org_ids)
-    logger.info("WS opened: user=%s orgs=%s", user.id, org_ids)
+    if not await manager.connect(ws, org_ids, batch=batch, user_id=str(user.id)):
+        # 1013 Try Again Later — client should back off and reconnect, which
+        # lets the load balancer route it to a less loaded instance.
+        await ws.close(code=1013, reason="Try again later")
+        return
+    logger.info("WS opened: user=%s orgs=%s batch=%s", user.id, org_ids, batch)
 
     try:
         while True:
@@ -70,5 +81,10 @@ async def websocket_endpoint(
     except Exception:
         logger.exception("Unexpected WS error: user=%s", user.id)
     finally:
-        await manager.disconnect(ws, org_ids)
+        await manager.disconnect(ws, org_ids, user_id=str(user.id))
         logger.info("WS closed: user=%s", user.id)
+
+
+@router.get("/ws/stats", summary="Gauges de conexiones WebSocket (worker actual)")
+async def websocket_stats(_admin: AdminUser) -> dict:
+    return manager.gauges()
@@ -8,10 +8,12 @@ from pydantic import BaseModel, Field
 
 
 class EventType(str, Enum):
+    CACHE_INVALIDATE = "cache.invalidate"  # internal — never forwarded to clients
     JOURNEY_ARCHIVED = "journey.archived"
     JOURNEY_PUBLISHED = "journey.published"
     RESOURCE_PUBLISHED = "resource.published"
     RESOURCE_UNPUBLISHED = "resource.unpublished"
+    STEP_UNLOCKED = "step.unlocked"
 
 
 class RealtimeEvent(BaseModel):
@@ -20,6 +22,7 @@ class RealtimeEvent(BaseModel):
     type: str  # EventType value or free-form string for forward compatibility
     payload: dict[str, Any] = Field(default_factory=dict)
     org_id: str | None = None  # None → broadcast to every connected client
+    user_id: str | None = None  # set → only that user's sockets (overrides org_id)
     timestamp: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
@@ -4,8 +4,9 @@ import asyncio
 import logging
 import os
 
+from common.cache.local_cache import local_cache
 from common.events.connection_manager import manager
-from common.events.schemas import RealtimeEvent
+from common.events.schemas import EventType, RealtimeEvent
 
 logger = logging.getLogger("oasis.events.subscriber")
 
@@ -17,6 +18,10 @@ async def start_subscriber() -> None:
     dispatches incoming events to the ConnectionManager for WebSocket
     broadcast to all connected clients in the relevant org.
 
+    Also applies ``cache.invalidate`` events to this worker's L1 cache. The L1
+    cache is only enabled while subscribed, since a disconnected worker would
+    miss invalidations.
+
     Auto-reconnects with exponential backoff on any failure.
     Exits cleanly on asyncio.CancelledError (FastAPI lifespan shutdown).
     """
@@ -41,6 +46,7 @@ async def start_subscriber() -> None:
             async with client.pubsub() as pubsub:
                 await pubsub.subscribe(CHANNEL)
                 backoff = 1.0
+                local_cache.enable()
                 logger.info("Subscriber connected — listening on '%s'", CHANNEL)
 
                 async for message in pubsub.listen():
@@ -49,9 +55,11 @@ async def start_subscriber() -> None:
                     await _dispatch(message["data"])
 
         except asyncio.CancelledError:
+            local_cache.disable()
             logger.info("Subscriber task cancelled — shutting down")
             return
         except Exception:
+            local_cache.disable()
             logger.exception(
                 "Subscriber crashed, reconnecting in %.1fs", backoff
             )
@@ -66,7 +74,13 @@ async def _dispatch(raw: str) -> None:
         logger.warning("Malformed event received (%.200s)", raw)
         return
 
-    if event.org_id:
+    if event.type == EventType.CACHE_INVALIDATE:
+        local_cache.invalidate(*event.payload.get("keys", []))
+        return
+
+    if event.user_id:
+        await manager.send_to_user(event.user_id, event)
+    elif event.org_id:
         await manager.broadcast_to_org(event.org_id, event)
     else:
         await manager.broadcast_all(event)
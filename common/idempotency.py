@@ -0,0 +1,121 @@
+"""Idempotency-Key support for retried writes (flaky event Wi-Fi).
+
+The key for (scope, user, key) is reserved up front with SET NX and a short
+"pending" marker (``IDEMPOTENCY_PENDING_TTL_SECONDS``), so a retry that
+arrives while the original request is still running gets a 409 instead of
+redoing the work. On success the marker is replaced by the response, stored
+for ``IDEMPOTENCY_TTL_SECONDS``; a later retry with the same key replays it
+without touching the database. On error the marker is released, so a failed
+attempt can be retried normally. Reusing a key with a different payload is
+rejected. Without Redis the header is accepted and ignored (graceful
+degradation).
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Annotated, Any
+
+from fastapi import Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from common.cache.redis_client import (
+    cache_claim,
+    cache_delete,
+    cache_get_json,
+    cache_set_json,
+)
+from common.exceptions import ConflictError, ValidationError
+
+logger = logging.getLogger("oasis.idempotency")
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_PENDING_TTL_SECONDS = int(
+    os.getenv("IDEMPOTENCY_PENDING_TTL_SECONDS", "60")
+)
+
+IdempotencyKey = Annotated[
+    str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)
+]
+
+
+def _cache_key(scope: str, user_id: Any, key: str) -> str:
+    return f"idem:{scope}:{user_id}:{key}"
+
+
+def _fingerprint(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(stored: dict, fingerprint: str, scope: str, user_id: Any) -> JSONResponse:
+    if stored.get("fingerprint") != fingerprint:
+        raise ValidationError("Idempotency-Key ya usada con un payload distinto.")
+    if stored.get("pending"):
+        raise ConflictError("La solicitud con esta Idempotency-Key sigue en curso.")
+    logger.info("IDEMPOTENT_REPLAY %s user=%s", scope, user_id)
+    return JSONResponse(
+        status_code=stored.get("status_code", 200),
+        content=stored.get("body"),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def replay_idempotent(
+    key: str | None, *, scope: str, user_id: Any, payload: Any = None
+) -> JSONResponse | None:
+    """Stored response for this key, or None if the request must run.
+
+    None means the key is now reserved by this request: the caller must end
+    with ``store_idempotent`` (success) or ``release_idempotent`` (error).
+    Raises ConflictError while another request holds the key.
+    """
+    if not key:
+        return None
+    cache_key = _cache_key(scope, user_id, key)
+    fingerprint = _fingerprint(payload)
+
+    stored = cache_get_json(cache_key)
+    if isinstance(stored, dict):
+        return _replay(stored, fingerprint, scope, user_id)
+
+    marker = json.dumps({"pending": True, "fingerprint": fingerprint})
+    if cache_claim(cache_key, IDEMPOTENCY_PENDING_TTL_SECONDS, value=marker):
+        return None
+
+    # Otro request reservó la key entre el GET y el SET NX.
+    stored = cache_get_json(cache_key)
+    if isinstance(stored, dict):
+        return _replay(stored, fingerprint, scope, user_id)
+    raise ConflictError("La solicitud con esta Idempotency-Key sigue en curso.")
+
+
+def store_idempotent(
+    key: str | None,
+    *,
+    scope: str,
+    user_id: Any,
+    payload: Any = None,
+    body: Any,
+    status_code: int = 200,
+) -> None:
+    if not key:
+        return
+    cache_set_json(
+        _cache_key(scope, user_id, key),
+        {
+            "fingerprint": _fingerprint(payload),
+            "status_code": status_code,
+            "body": jsonable_encoder(body),
+        },
+        IDEMPOTENCY_TTL_SECONDS,
+    )
+
+
+def release_idempotent(key: str | None, *, scope: str, user_id: Any) -> None:
+    """Drop the pending reservation after a failed attempt."""
+    if not key:
+        return
+    cache_delete(_cache_key(scope, user_id, key))
@@ -0,0 +1,91 @@
+import pytest
+
+from common.cache import local_cache as local_cache_module
+from common.cache.local_cache import LocalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(local_cache_module.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(clock) -> LocalCache:
+    cache = LocalCache(max_entries=3)
+    cache.enable()
+    return cache
+
+
+def test_entry_expires_after_ttl(cache, clock):
+    cache.set("a", "1", ttl_seconds=10)
+
+    clock.now += 9.9
+    assert cache.get("a") == "1"
+
+    clock.now += 0.1
+    assert cache.get("a") is None
+
+
+def test_non_positive_ttl_is_not_stored(cache):
+    cache.set("a", "1", ttl_seconds=0)
+
+    assert cache.get("a") is None
+
+
+def test_evicts_least_recently_used(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key, ttl_seconds=60)
+    cache.get("a")  # "b" pasa a ser el menos usado
+
+    cache.set("d", "d", ttl_seconds=60)
+
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_overwrite_refreshes_recency_and_ttl(cache, clock):
+    cache.set("a", "old", ttl_seconds=5)
+    cache.set("b", "b", ttl_seconds=60)
+    cache.set("c", "c", ttl_seconds=60)
+
+    clock.now += 4
+    cache.set("a", "new", ttl_seconds=5)
+    cache.set("d", "d", ttl_seconds=60)
+
+    assert cache.get("b") is None
+    clock.now += 4
+    assert cache.get("a") == "new"
+
+
+def test_disabled_cache_neither_stores_nor_serves(clock):
+    cache = LocalCache()
+
+    cache.set("a", "1", ttl_seconds=60)
+    assert cache.get("a") is None
+
+    cache.enable()
+    cache.set("a", "1", ttl_seconds=60)
+    cache.disable()
+    cache.enable()
+
+    assert cache.get("a") is None  # disable() flushes
+
+
+def test_invalidate_drops_only_given_keys(cache):
+    cache.set("a", "1", ttl_seconds=60)
+    cache.set("b", "2", ttl_seconds=60)
+
+    cache.invalidate("a", "missing")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
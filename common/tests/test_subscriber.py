@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+import redis.asyncio as aioredis
+
+from common.cache.local_cache import LocalCache
+from common.events import subscriber
+from common.events.schemas import EventType, RealtimeEvent
+
+
+def _invalidate(*keys: str) -> dict:
+    event = RealtimeEvent(type=EventType.CACHE_INVALIDATE, payload={"keys": keys})
+    return {"type": "message", "data": event.model_dump_json()}
+
+
+class FakePubSub:
+    def __init__(self, messages: list, on_message):
+        self.messages = messages
+        self.on_message = on_message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def subscribe(self, channel: str) -> None:
+        assert channel == subscriber.CHANNEL
+
+    async def listen(self):
+        for message in self.messages:
+            if isinstance(message, BaseException):
+                raise message
+            yield message
+            self.on_message()
+
+
+class FakeRedis:
+    def __init__(self, pubsub: FakePubSub):
+        self._pubsub = pubsub
+
+    def pubsub(self) -> FakePubSub:
+        return self._pubsub
+
+
+@pytest.fixture
+def cache(monkeypatch) -> LocalCache:
+    cache = LocalCache()
+    monkeypatch.setattr(subscriber, "local_cache", cache)
+    monkeypatch.setenv("REDIS_URL", "redis://fake")
+    return cache
+
+
+def test_enables_l1_while_connected_and_flushes_on_crash(cache, monkeypatch):
+    seen: list[tuple[bool, str | None, str | None]] = []
+
+    def snapshot():
+        seen.append((cache.enabled, cache.get("a"), cache.get("b")))
+
+    def seed():
+        cache.set("a", "1", 60)
+        cache.set("b", "2", 60)
+
+    connections = [
+        FakeRedis(FakePubSub(
+            [
+                {"type": "subscribe", "data": 1},
+                _invalidate("a"),
+                ConnectionError("connection reset"),
+            ],
+            on_message=snapshot,
+        )),
+        asyncio.CancelledError(),  # lifespan shutdown durante el reconnect
+    ]
+
+    def from_url(_url, **_kwargs):
+        connection = connections.pop(0)
+        if isinstance(connection, BaseException):
+            raise connection
+        return connection
+
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        # Tras el crash el cache tiene que estar apagado y vacío.
+        assert not cache.enabled
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(aioredis, "from_url", from_url)
+    monkeypatch.setattr(subscriber.asyncio, "sleep", fake_sleep)
+
+    original_enable = cache.enable
+
+    def enable():
+        original_enable()
+        seed()
+
+    monkeypatch.setattr(cache, "enable", enable)
+
+    asyncio.run(subscriber.start_subscriber())
+
+    assert seen == [(True, "1", "2"), (True, None, "2")]
+    assert sleeps == [1.0]
+    assert not cache.enabled
+    assert cache.get("a") is None and cache.get("b") is None
+
+
+def test_without_redis_url_l1_stays_disabled(cache, monkeypatch):
+    monkeypatch.delenv("REDIS_URL")
+
+    asyncio.run(subscriber.start_subscriber())
+
+    assert not cache.enabled
+
+
+def test_invalidate_event_is_not_forwarded(cache, monkeypatch):
+    forwarded = []
+
+    async def broadcast_all(event):
+        forwarded.append(event)
+
+    monkeypatch.setattr(subscriber.manager, "broadcast_all", broadcast_all)
+    cache.enable()
+    cache.set("a", "1", 60)
+
+    asyncio.run(subscriber._dispatch(_invalidate("a")["data"]))
+    asyncio.run(subscriber._dispatch(
+        RealtimeEvent(type=EventType.JOURNEY_PUBLISHED).model_dump_json()
+    ))
+
+    assert cache.get("a") is None
+    assert [e.type for e in forwarded] == [EventType.JOURNEY_PUBLISHED]
@@ -1,99 +1,33 @@
-import asyncio
 import logging
 import os
-from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from supabase_auth.errors import AuthApiError
-from postgrest.exceptions import APIError as PostgRESTAPIError
-
-from common.auth.security import prefetch_jwks
+from common.app_factory import create_app
 from common.cache.redis_client import cache_ping
 from common.events.router import router as events_router
-from common.events.subscriber import start_subscriber
-from common.exceptions import (
-    OasisException,
-    auth_api_error_handler,
-    generic_exception_handler,
-    oasis_exception_handler,
-    postgrest_error_handler,
-)
 from services.analytics_service.api.v1.api import api_router as analytics_router
 from services.auth_service.api.v1.api import api_router as auth_router, public_router
 from services.gamification_service.api.v1.router import router as gamification_router
 from services.journey_service.api.v1.api import api_router as journey_router
+from services.journey_service.logic.unlock_notifier import (
+    UNLOCK_NOTIFIER_ENABLED,
+    run_unlock_notifier,
+)
 from services.resource_service.api.v1.router import router as resource_router
 from services.crm_service.api.v1.api import api_router as crm_router
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("oasis.gateway")
 
-from common.rate_limit import limiter
+# REALTIME_ENABLED=false → REST-only workers; /ws is served by realtime_app.py
+# on its own Cloud Run service.
+REALTIME_ENABLED = os.getenv("REALTIME_ENABLED", "true").lower() == "true"
 
-
-# ---------------------------------------------------------------------------
-# Lifespan: startup / shutdown tasks
-# ---------------------------------------------------------------------------
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    await prefetch_jwks()
-    subscriber_task = asyncio.create_task(start_subscriber())
-    logger.info("Startup complete")
-    yield
-    subscriber_task.cancel()
-    with suppress(asyncio.CancelledError):
-        await subscriber_task
-    logger.info("Shutdown complete")
-
-
-app = FastAPI(
+app = create_app(
     title="OASIS Platform API",
-    version="1.0.0",
     description="Gateway principal de la plataforma OASIS Multi-Tenant",
-    lifespan=lifespan,
-)
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-# ---------------------------------------------------------------------------
-# CORS middleware — restricted to known origins
-# ---------------------------------------------------------------------------
-_raw_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000")
-allowed_origins = [o.strip() for o in _raw_origins.split(",") if o.strip()]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    background=[run_unlock_notifier] if UNLOCK_NOTIFIER_ENABLED else [],
 )
 
-
-# ---------------------------------------------------------------------------
-# Middleware: propagar X-Forwarded-Proto para que FastAPI genere URLs HTTPS
-# en redirects 307 (trailing slash) cuando esta detras de Cloud Run / proxy.
-# ---------------------------------------------------------------------------
-@app.middleware("http")
-async def set_scheme_from_proxy(request: Request, call_next):
-    proto = request.headers.get("x-forwarded-proto")
-    if proto:
-        request.scope["scheme"] = proto
-    return await call_next(request)
-
-
-# ---------------------------------------------------------------------------
-# Exception handlers globales (aplican a todos los routers incluidos)
-# ---------------------------------------------------------------------------
-app.add_exception_handler(OasisException, oasis_exception_handler)
-app.add_exception_handler(AuthApiError, auth_api_error_handler)
-app.add_exception_handler(PostgRESTAPIError, postgrest_error_handler)
-app.add_exception_handler(Exception, generic_exception_handler)
-
 # ---------------------------------------------------------------------------
 # Routers (include_router, NO mount — los handlers del parent propagan)
 # ---------------------------------------------------------------------------
@@ -104,7 +38,8 @@ app.include_router(analytics_router, prefix="/api/v1/analytics")
 app.include_router(gamification_router, prefix="/api/v1/gamification", tags=["Gamification"])
 app.include_router(resource_router, prefix="/api/v1/resources", tags=["Resources"])
 app.include_router(crm_router, prefix="/api/v1/crm", tags=["CRM"])
-app.include_router(events_router, prefix="/api/v1")
+if REALTIME_ENABLED:
+    app.include_router(events_router, prefix="/api/v1")
 
 
 # ---------------------------------------------------------------------------
@@ -117,4 +52,5 @@ async def health_check():
         "status": "ok",
         "service": "oasis-gateway",
         "redis": "connected" if redis_ok else "unavailable",
+        "realtime": REALTIME_ENABLED,
     }
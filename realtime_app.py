@@ -0,0 +1,32 @@
+"""Realtime tier: serves only the WebSocket endpoint and the Redis subscriber.
+
+Run as its own Cloud Run service (APP_MODULE=realtime_app:app) so long-lived
+sockets don't share CPU with REST workers; the REST gateway then runs with
+REALTIME_ENABLED=false. Clients connect to the same /api/v1/ws path.
+"""
+
+import logging
+
+from common.app_factory import create_app
+from common.events.connection_manager import manager
+from common.events.router import router as events_router
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("oasis.realtime")
+
+app = create_app(
+    title="OASIS Realtime",
+    description="WebSocket fan-out de eventos de la plataforma OASIS",
+)
+
+app.include_router(events_router, prefix="/api/v1")
+
+
+@app.get("/health")
+async def health_check():
+    gauges = manager.gauges()
+    return {
+        "status": "ok",
+        "service": "oasis-realtime",
+        "connections": gauges["connections"],
+    }
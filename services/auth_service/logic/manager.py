@@ -1,6 +1,7 @@
 import logging
 from typing import Optional
 
+from common.cache.redis_client import cache_delete
 from common.database.client import get_admin_client, get_public_client, get_scoped_client
 
 logger = logging.getLogger("oasis.auth_manager")
@@ -376,6 +377,7 @@ class AuthManager:
             user_id,
             {"user_metadata": {"is_platform_admin": is_admin}},
         )
+        cache_delete(f"admin:{user_id}")
 
         # 3. Re-fetch para devolver el perfil actualizado
         profile_resp = (
@@ -1,24 +1,19 @@
 import logging
 
-from fastapi import FastAPI
-
-from common.exceptions import OasisException, oasis_exception_handler
-from services.auth_service.api.v1.api import api_router
+from common.app_factory import create_app
+from services.auth_service.api.v1.api import api_router, public_router
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("auth_service")
 
-app = FastAPI(
+app = create_app(
     title="OASIS Auth Service",
-    version="1.0.0",
-    description="Servicio de Identidad Multi-Tenant con Supabase (standalone dev)",
+    description="Servicio de Identidad Multi-Tenant con Supabase",
+    subscriber=False,
 )
 
-# Handler para excepciones propias (standalone mode)
-app.add_exception_handler(OasisException, oasis_exception_handler)
-
-# Rutas
-app.include_router(api_router, prefix="/api/v1")
+app.include_router(api_router, prefix="/api/v1/auth")
+app.include_router(public_router, prefix="/api/v1/public")
 
 
 @app.get("/health")
@@ -17,7 +17,7 @@ async def get_crm_stats(
     # Count contacts in org
     members_resp = (
         await db.table("organization_members")
-        .select("user_id", count="exact")
+        .select("user_id", count="exact", head=True)
         .eq("organization_id", org_id)
         .eq("status", "active")
         .execute()
@@ -49,23 +49,15 @@ async def get_crm_stats(
     total_notes = notes_resp.count or 0
 
     # Contact breakdown by status
-    # crm.contacts is a global table (keyed by user_id, no organization_id column).
-    # Filter by member_ids already fetched above.
-    member_ids = [m["user_id"] for m in (members_resp.data or [])]
-    if member_ids:
-        contacts_resp = (
-            await db.schema("crm")
-            .table("contacts")
-            .select("status")
-            .in_("user_id", member_ids)
-            .execute()
-        )
-        statuses = [c["status"] for c in (contacts_resp.data or [])]
-    else:
-        statuses = []
-    active_contacts = sum(1 for s in statuses if s == "active")
-    inactive_contacts = sum(1 for s in statuses if s == "inactive")
-    risk_contacts = sum(1 for s in statuses if s == "risk")
+    # crm.contacts is a global table (keyed by user_id, no organization_id column);
+    # the membership JOIN + GROUP BY runs server-side.
+    status_resp = await db.rpc(
+        "get_org_contact_status_counts", {"p_organization_id": org_id}
+    ).execute()
+    status_counts = {row["status"]: row["total"] for row in (status_resp.data or [])}
+    active_contacts = status_counts.get("active", 0)
+    inactive_contacts = status_counts.get("inactive", 0)
+    risk_contacts = status_counts.get("risk", 0)
 
     return {
         "total_contacts": total_contacts,
@@ -12,21 +12,16 @@ async def get_contacts(
     limit: int = 50,
     offset: int = 0,
 ) -> tuple[list[dict], int]:
-    query = db.schema("crm").table("contacts").select("*", count="exact")
-
     if organization_id:
-        # Get user_ids that are members of this org, then filter contacts
-        members_resp = (
-            await db.table("organization_members")
-            .select("user_id")
-            .eq("organization_id", organization_id)
-            .eq("status", "active")
-            .execute()
+        # Membership JOIN resolved server-side (no IN list of every member_id);
+        # the function returns crm.contacts rows so filters/order/range chain.
+        query = db.rpc(
+            "get_org_member_contacts",
+            {"p_organization_id": organization_id},
+            count="exact",
         )
-        member_ids = [m["user_id"] for m in (members_resp.data or [])]
-        if not member_ids:
-            return [], 0
-        query = query.in_("user_id", member_ids)
+    else:
+        query = db.schema("crm").table("contacts").select("*", count="exact")
 
     if search:
         query = query.or_(
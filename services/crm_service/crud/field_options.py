@@ -22,7 +22,9 @@ async def list_field_options(
     # Only cache the default query (active, no field filter) — the one the wizard uses
     use_cache = not field_name and not include_inactive
     if use_cache:
-        cached = cache_get_json(_FIELD_OPTIONS_CACHE_KEY)
+        cached = cache_get_json(
+            _FIELD_OPTIONS_CACHE_KEY, local_ttl=_FIELD_OPTIONS_CACHE_TTL
+        )
         if cached is not None:
             return cached
 
@@ -36,7 +38,10 @@ async def list_field_options(
     data = result.data or []
 
     if use_cache:
-        cache_set_json(_FIELD_OPTIONS_CACHE_KEY, data, _FIELD_OPTIONS_CACHE_TTL)
+        cache_set_json(
+            _FIELD_OPTIONS_CACHE_KEY, data, _FIELD_OPTIONS_CACHE_TTL,
+            local_ttl=_FIELD_OPTIONS_CACHE_TTL,
+        )
 
     return data
 
@@ -0,0 +1,19 @@
+import logging
+
+from common.app_factory import create_app
+from services.crm_service.api.v1.api import api_router
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("crm_service")
+
+app = create_app(
+    title="OASIS CRM Service",
+    description="Servicio de CRM para la plataforma OASIS",
+)
+
+app.include_router(api_router, prefix="/api/v1/crm", tags=["CRM"])
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "service": "crm-service"}
@@ -0,0 +1,21 @@
+import logging
+
+from common.app_factory import create_app
+from services.gamification_service.api.v1.router import router
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("gamification_service")
+
+# No L1-cached reads here, so the pub/sub subscriber is not needed.
+app = create_app(
+    title="OASIS Gamification Service",
+    description="Servicio de Gamificacion para la plataforma OASIS",
+    subscriber=False,
+)
+
+app.include_router(router, prefix="/api/v1/gamification", tags=["Gamification"])
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "service": "gamification-service"}
@@ -4,9 +4,17 @@ from fastapi import APIRouter, Depends, status
 
 from common.auth.security import AdminUser
 from common.database.client import get_admin_client
-from common.exceptions import NotFoundError
+from common.exceptions import NotFoundError, ValidationError
 from services.journey_service.crud import enrollments as crud
-from services.journey_service.schemas.enrollments import EnrollmentDetailResponse, EnrollmentResponse
+from services.journey_service.crud.journeys import get_journey_by_id
+from services.journey_service.schemas.enrollments import (
+    BulkEnrollmentRequest,
+    BulkEnrollmentResponse,
+    EnrollmentBulkDeleteRequest,
+    EnrollmentBulkDeleteResponse,
+    EnrollmentDetailResponse,
+    EnrollmentResponse,
+)
 from supabase import AsyncClient
 
 router = APIRouter(prefix="/admin/enrollments")
@@ -75,8 +83,76 @@ async def admin_unenroll(
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
 ):
     """Remove an enrollment and its step completions. Platform admin only."""
-    enrollment = await crud.get_enrollment_by_id(db, enrollment_id)
-    if not enrollment:
+    deleted = await crud.delete_enrollments(db, [enrollment_id])
+    if not deleted:
         raise NotFoundError("Enrollment")
 
-    await crud.delete_enrollment(db, enrollment_id)
\ No newline at end of file
+
+@router.post(
+    "/bulk-delete",
+    response_model=EnrollmentBulkDeleteResponse,
+    summary="[Admin] Borrar enrollments en lote (reset de cohorte)",
+)
+async def admin_bulk_delete_enrollments(
+    payload: EnrollmentBulkDeleteRequest,
+    _admin: AdminUser,
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+):
+    """Delete a list of enrollments and/or an event's whole cohort, with their
+    completions, points, activities and rewards, in one transaction.
+    Platform admin only."""
+    deleted = await crud.delete_enrollments(
+        db,
+        payload.enrollment_ids,
+        event_id=payload.event_id,
+        journey_id=payload.journey_id,
+    )
+    return EnrollmentBulkDeleteResponse(
+        deleted_count=len(deleted),
+        deleted_ids=[row["enrollment_id"] for row in deleted],
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkEnrollmentResponse,
+    summary="[Admin] Inscribir una cohorte en lote",
+)
+async def admin_bulk_enroll(
+    payload: BulkEnrollmentRequest,
+    _admin: AdminUser,
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+):
+    """Enroll up to 50k users (by id or email) in a journey, or in all of an
+    event's journeys. Existing enrollments are left untouched; the response
+    reports the outcome per identifier. Platform admin only."""
+    organization_id = None
+    if payload.event_id:
+        target = await crud.get_event_enrollment_target(db, payload.event_id)
+        if target is None:
+            raise NotFoundError("Evento")
+        organization_id, journey_ids = target
+        if not journey_ids:
+            raise ValidationError("El evento no tiene journeys vinculados.")
+    else:
+        if not await get_journey_by_id(db, payload.journey_id):
+            raise NotFoundError("Journey")
+        journey_ids = [str(payload.journey_id)]
+
+    results = await crud.bulk_enroll(
+        db,
+        journey_ids,
+        user_ids=payload.user_ids,
+        emails=payload.emails,
+        event_id=payload.event_id,
+        organization_id=organization_id,
+        modality=payload.modality,
+    )
+    outcomes = [r["outcome"] for r in results]
+    return BulkEnrollmentResponse(
+        total=len(results),
+        enrolled=outcomes.count("enrolled"),
+        already_enrolled=outcomes.count("already_enrolled"),
+        not_found=outcomes.count("not_found"),
+        results=results,
+    )
@@ -94,7 +94,7 @@ async def get_journey_admin(
         if not await crud.verify_journey_accessible_by_org(db, journey_id, org_id):
             raise ForbiddenError("No tienes acceso a este journey.")
 
-    journey = await crud.get_journey_admin(db, journey_id)
+    journey = await crud.get_journey_admin(db, journey_id, org_id)
 
     if not journey:
         raise NotFoundError("Journey")
@@ -188,7 +188,11 @@ async def update_journey(
                 org_id,
             )
 
-    journey = await crud.get_journey_admin(db, journey_id)
+    if payload.is_onboarding is not None:
+        # metadata / steps changed after update_journey rendered the snapshot
+        await crud.refresh_journey_snapshot(db, journey_id)
+
+    journey = await crud.get_journey_admin(db, journey_id, org_id)
     return journey
 
 
@@ -222,7 +226,7 @@ async def publish_journey(
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
 ):
     await crud.publish_journey(db, journey_id)
-    journey = await crud.get_journey_admin(db, journey_id)
+    journey = await crud.get_journey_admin(db, journey_id, org_id)
     await publish_event(RealtimeEvent(
         type=EventType.JOURNEY_PUBLISHED,
         payload={"journey_id": str(journey_id)},
@@ -243,7 +247,7 @@ async def archive_journey(
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
 ):
     await crud.archive_journey(db, journey_id)
-    journey = await crud.get_journey_admin(db, journey_id)
+    journey = await crud.get_journey_admin(db, journey_id, org_id)
     await publish_event(RealtimeEvent(
         type=EventType.JOURNEY_ARCHIVED,
         payload={"journey_id": str(journey_id)},
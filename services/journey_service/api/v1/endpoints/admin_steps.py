@@ -3,7 +3,6 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, status
 
 from common.auth.security import AdminUser, OrgRoleRequired, get_current_user
-from common.cache.redis_client import cache_delete
 from common.database.client import get_admin_client
 from common.exceptions import ForbiddenError, NotFoundError
 from services.journey_service.crud import journeys as journeys_crud
@@ -60,7 +59,7 @@ async def create_step(
     step["total_completions"] = 0
     step["average_points"] = 0.0
 
-    cache_delete(f"journey:{journey_id}")
+    await journeys_crud.refresh_journey_snapshot(db, journey_id)
     return step
 
 
@@ -82,7 +81,7 @@ async def update_step(
     if not updated:
         raise NotFoundError("Step")
 
-    cache_delete(f"journey:{journey_id}")
+    await journeys_crud.refresh_journey_snapshot(db, journey_id)
     return updated
 
 
@@ -102,7 +101,7 @@ async def delete_step(
     if not deleted:
         raise NotFoundError("Step")
 
-    cache_delete(f"journey:{journey_id}")
+    await journeys_crud.refresh_journey_snapshot(db, journey_id)
     return {"deleted_id": str(step_id)}
 
 
@@ -124,5 +123,5 @@ async def reorder_steps(
     ]
 
     steps = await crud.reorder_steps(db, journey_id, step_orders)
-    cache_delete(f"journey:{journey_id}")
+    await journeys_crud.refresh_journey_snapshot(db, journey_id)
     return steps
@@ -94,7 +94,9 @@ async def create_onboarding_template(
 
     if existing_journey_id:
         # Ya existe — devolver el journey existente
-        existing = await journeys_crud.get_journey_admin(db, UUID(existing_journey_id))
+        existing = await journeys_crud.get_journey_admin(
+            db, UUID(existing_journey_id), org_id
+        )
         if existing:
             return {
                 "journey": existing,
@@ -127,6 +129,7 @@ async def create_onboarding_template(
             gamification_rules=GamificationRules(base_points=step_def["points"]),
         )
         await steps_crud.create_step(db, journey_id, step_create)
+    await journeys_crud.refresh_journey_snapshot(db, journey_id)
 
     # 4. Actualizar gamification_config con el nuevo journey_id
     gamif_upsert_data = {
@@ -145,7 +148,7 @@ async def create_onboarding_template(
     ).execute()
 
     # 5. Obtener el journey completo con stats
-    full_journey = await journeys_crud.get_journey_admin(db, journey_id)
+    full_journey = await journeys_crud.get_journey_admin(db, journey_id, org_id)
     # Agregar stats vacías si no están (journey recién creado)
     if full_journey:
         full_journey.setdefault("total_steps", len(_ONBOARDING_STEPS))
@@ -191,5 +194,6 @@ async def apply_onboarding_steps(
             gamification_rules=GamificationRules(base_points=step_def["points"]),
         )
         await steps_crud.create_step(db, journey_uuid, step_create)
+    await journeys_crud.refresh_journey_snapshot(db, journey_uuid)
 
     return {"steps_added": len(_ONBOARDING_STEPS)}
@@ -1,10 +1,16 @@
+import csv
+import io
 import logging
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
 from typing import Literal
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from common.auth.security import OrgRoleRequired
 from common.database.client import get_admin_client
+from common.exceptions import NotFoundError
 from services.journey_service.crud import journeys as crud
 from services.journey_service.schemas.journeys import (
     EventEnrolleeRead,
@@ -19,6 +25,39 @@ router = APIRouter()
 
 AdminRequired = OrgRoleRequired("owner", "admin")
 
+# Mismo orden de columnas que los modelos JSON
+_JOURNEY_ENROLLEE_COLUMNS = list(JourneyEnrolleeRead.model_fields)
+_EVENT_ENROLLEE_COLUMNS = list(EventEnrolleeRead.model_fields)
+
+
+async def _csv_stream(
+    pages: AsyncIterator[list[dict]], columns: list[str]
+) -> AsyncIterator[str]:
+    """Escribe el header y luego un chunk CSV por página: memoria acotada
+    a una página y primer byte inmediato."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+
+    async for rows in pages:
+        buf.seek(0)
+        buf.truncate()
+        for row in rows:
+            writer.writerow(["" if row.get(c) is None else row[c] for c in columns])
+        yield buf.getvalue()
+
+
+def _csv_response(
+    pages: AsyncIterator[list[dict]], columns: list[str], prefix: str
+) -> StreamingResponse:
+    now = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        _csv_stream(pages, columns),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={prefix}_{now}.csv"},
+    )
+
 
 @router.get(
     "/{org_id}/admin/tracking",
@@ -33,6 +72,22 @@ async def get_org_tracking(
     return await crud.list_org_tracking(db, org_id)
 
 
+@router.post(
+    "/{org_id}/admin/tracking/events/{event_id}/funnel/rebuild",
+    summary="Recalcular el funnel de un evento desde cero",
+)
+async def rebuild_event_funnel_endpoint(
+    org_id: str,
+    event_id: str,
+    _ctx=Depends(AdminRequired),  # noqa: B008
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+):
+    rebuilt = await crud.rebuild_event_funnel(db, org_id, event_id)
+    if rebuilt is None:
+        raise NotFoundError("Evento")
+    return {"event_id": event_id, "journeys_rebuilt": rebuilt}
+
+
 @router.get(
     "/{org_id}/admin/tracking/journeys/{journey_id}/enrollees",
     response_model=list[JourneyEnrolleeRead],
@@ -70,3 +125,42 @@ async def list_event_enrollees_endpoint(
     return await crud.list_event_enrollees(
         db, org_id=org_id, event_id=event_id, status=status,
     )
+
+
+@router.get(
+    "/{org_id}/admin/tracking/journeys/{journey_id}/enrollees/export/csv",
+    summary="Exportar inscritos a un journey como CSV (streaming)",
+)
+async def export_journey_enrollees_csv(
+    org_id: str,
+    journey_id: str,
+    event_id: str | None = Query(None),
+    status: Literal["not_started", "active", "completed"] | None = Query(None),
+    _ctx=Depends(AdminRequired),  # noqa: B008
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+):
+    pages = crud.iter_journey_enrollees(
+        db,
+        org_id=org_id,
+        journey_id=journey_id,
+        event_id=event_id,
+        status=status,
+    )
+    return _csv_response(pages, _JOURNEY_ENROLLEE_COLUMNS, "journey_enrollees")
+
+
+@router.get(
+    "/{org_id}/admin/tracking/events/{event_id}/enrollees/export/csv",
+    summary="Exportar enrollees deduplicados de un evento como CSV (streaming)",
+)
+async def export_event_enrollees_csv(
+    org_id: str,
+    event_id: str,
+    status: Literal["not_started", "active", "completed"] | None = Query(None),
+    _ctx=Depends(AdminRequired),  # noqa: B008
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+):
+    pages = crud.iter_event_enrollees(
+        db, org_id=org_id, event_id=event_id, status=status,
+    )
+    return _csv_response(pages, _EVENT_ENROLLEE_COLUMNS, "event_enrollees")
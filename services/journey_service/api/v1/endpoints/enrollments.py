@@ -2,12 +2,18 @@ import logging
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from common.auth.security import CurrentUser, get_current_token
 from common.rate_limit import limiter
 from common.database.client import get_admin_client
 from common.exceptions import ConflictError, ForbiddenError, NotFoundError, ValidationError
+from common.idempotency import (
+    IdempotencyKey,
+    release_idempotent,
+    replay_idempotent,
+    store_idempotent,
+)
 from services.journey_service.crud import enrollments as crud
 from services.journey_service.schemas.enrollments import (
     EnrollmentCreate,
@@ -25,21 +31,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post(
-    "/",
-    response_model=EnrollmentResponse,
-    status_code=status.HTTP_201_CREATED,
-    summary="Inscribirse en un journey",
-)
-@limiter.limit("10/minute")
-async def enroll_user(
-    request: Request,
-    payload: EnrollmentCreate,
-    current_user: CurrentUser,
-    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
-):
-    user_id = UUID(str(current_user.id))
-
+async def _enroll(
+    db: AsyncClient, user_id: UUID, payload: EnrollmentCreate
+) -> EnrollmentResponse:
     existing = await crud.get_active_enrollment(db, user_id, payload.journey_id)
     if existing:
         raise ConflictError("Ya tienes una inscripcion activa en este Journey.")
@@ -108,22 +102,77 @@ async def enroll_user(
         current_step_index=new_enrollment["current_step_index"],
         progress_percentage=0.0,
         started_at=new_enrollment["started_at"],
+        completed_steps=new_enrollment.get("completed_steps", 0),
+        total_steps=new_enrollment.get("total_steps", 0),
     )
 
 
+@router.post(
+    "/",
+    response_model=EnrollmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Inscribirse en un journey",
+)
+@limiter.limit("10/minute")
+async def enroll_user(
+    request: Request,
+    payload: EnrollmentCreate,
+    current_user: CurrentUser,
+    db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+    idempotency_key: IdempotencyKey = None,
+):
+    user_id = UUID(str(current_user.id))
+
+    replayed = replay_idempotent(
+        idempotency_key, scope="enroll", user_id=user_id, payload=payload
+    )
+    if replayed is not None:
+        return replayed
+
+    try:
+        response = await _enroll(db, user_id, payload)
+    except Exception:
+        release_idempotent(idempotency_key, scope="enroll", user_id=user_id)
+        raise
+
+    store_idempotent(
+        idempotency_key, scope="enroll", user_id=user_id, payload=payload,
+        body=response, status_code=status.HTTP_201_CREATED,
+    )
+    return response
+
+
 @router.get(
     "/me/full",
     summary="Dashboard batch: enrollments + journey + progress (eliminates N+1)",
 )
 async def get_my_enrollments_full(
     current_user: CurrentUser,
+    response: Response,
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
+    since: str | None = Query(
+        None, description="Cursor (X-Sync-Cursor / cursor) de una respuesta anterior."
+    ),
 ):
     """Returns all enrollments with embedded journey data and step progress
     in a single response. Replaces the N+1 pattern of calling /enrollments/me
-    then /journeys/{id} + /progress for each enrollment."""
+    then /journeys/{id} + /progress for each enrollment.
+
+    Without ``since`` the body is the full list and the sync cursor comes in
+    the ``X-Sync-Cursor`` header. With ``since`` the body is a delta
+    (``cursor``, changed ``enrollments``, ``enrollment_ids``, new
+    ``completions``) or 304 Not Modified when nothing changed. Deltas overlap
+    the previous one by a short window, so clients upsert enrollments by
+    ``id`` and completions by ``(enrollment_id, step_id)``."""
     user_id = UUID(str(current_user.id))
-    return await crud.get_user_enrollments_full(db, user_id)
+    sync = await crud.get_user_enrollments_full(db, user_id, since)
+    if sync is None:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"X-Sync-Cursor": since},
+        )
+    response.headers["X-Sync-Cursor"] = sync["cursor"]
+    return sync if since else sync["enrollments"]
 
 
 @router.get(
@@ -202,6 +251,44 @@ async def get_enrollment_progress(
     return progress
 
 
+async def _complete_step(
+    db: AsyncClient,
+    enrollment_id: UUID,
+    step_id: UUID,
+    user_id: UUID,
+    body: StepCompleteRequest | None,
+) -> StepCompleteResponse:
+    # Ownership, step ∈ journey, duplicados, date gates, insert y progreso:
+    # todo en una transacción (public.complete_enrollment_step).
+    result = await crud.complete_step_atomic(
+        db, enrollment_id, step_id, user_id,
+        metadata=body.metadata if body else None,
+        external_reference=body.external_reference if body else None,
+        service_data=body.service_data if body else None,
+    )
+
+    outcome = result.get("outcome")
+    if outcome == "not_found":
+        raise NotFoundError("Enrollment")
+    if outcome == "forbidden":
+        raise ForbiddenError("No tienes acceso a esta inscripcion.")
+    if outcome == "inactive":
+        raise ConflictError("Solo se pueden completar steps en enrollments activos.")
+    if outcome == "wrong_journey":
+        raise ValidationError("El step no pertenece al journey de esta inscripcion.")
+    if outcome == "duplicate":
+        raise ConflictError("Este step ya fue completado.")
+    if outcome == "locked":
+        raise ConflictError("Este step aún no está disponible.")
+
+    return StepCompleteResponse(
+        step_id=result["step_id"],
+        completed_at=result["completed_at"],
+        enrollment_progress=result.get("enrollment_progress") or 0.0,
+        points_earned=result.get("points_earned") or 0,
+    )
+
+
 @router.post(
     "/{enrollment_id}/steps/{step_id}/complete",
     response_model=StepCompleteResponse,
@@ -215,66 +302,27 @@ async def complete_step(
     current_user: CurrentUser,
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
     body: StepCompleteRequest | None = None,
+    idempotency_key: IdempotencyKey = None,
 ):
     user_id = UUID(str(current_user.id))
+    scope = f"step_complete:{enrollment_id}:{step_id}"
 
-    enrollment = await crud.get_enrollment_by_id(db, enrollment_id)
-    if not enrollment:
-        raise NotFoundError("Enrollment")
-
-    if enrollment["user_id"] != str(user_id):
-        raise ForbiddenError("No tienes acceso a esta inscripcion.")
-
-    if enrollment["status"] != "active":
-        raise ConflictError("Solo se pueden completar steps en enrollments activos.")
-
-    belongs = await crud.verify_step_in_enrollment_journey(db, enrollment_id, step_id)
-    if not belongs:
-        raise ValidationError("El step no pertenece al journey de esta inscripcion.")
-
-    already = await crud.is_step_already_completed(db, enrollment_id, step_id)
-    if already:
-        raise ConflictError("Este step ya fue completado.")
-
-    # Date-gate validation
-    step_data = await crud.get_step_by_id(db, step_id)
-    if step_data:
-        from datetime import timedelta
-        now = datetime.now(timezone.utc)
-        started_str = enrollment.get("started_at")
-
-        af = step_data.get("available_from")
-        if af:
-            af_dt = datetime.fromisoformat(af.replace("Z", "+00:00")) if isinstance(af, str) else af
-            if now < af_dt:
-                raise ConflictError("Este step aún no está disponible.")
-
-        hours_start = step_data.get("unlock_hours_after_start")
-        if hours_start and started_str:
-            started = datetime.fromisoformat(started_str.replace("Z", "+00:00")) if isinstance(started_str, str) else started_str
-            if now < started + timedelta(hours=hours_start):
-                raise ConflictError("Este step aún no está disponible.")
-
-    metadata = body.metadata if body else None
-    external_reference = body.external_reference if body else None
-    service_data = body.service_data if body else None
-
-    completion = await crud.complete_step(
-        db, enrollment_id, step_id,
-        metadata=metadata,
-        external_reference=external_reference,
-        service_data=service_data,
+    replayed = replay_idempotent(
+        idempotency_key, scope=scope, user_id=user_id, payload=body
     )
+    if replayed is not None:
+        return replayed
 
-    updated_enrollment = await crud.get_enrollment_by_id(db, enrollment_id)
-    progress = updated_enrollment.get("progress_percentage", 0.0) if updated_enrollment else 0.0
+    try:
+        response = await _complete_step(db, enrollment_id, step_id, user_id, body)
+    except Exception:
+        release_idempotent(idempotency_key, scope=scope, user_id=user_id)
+        raise
 
-    return StepCompleteResponse(
-        step_id=completion["step_id"],
-        completed_at=completion["completed_at"],
-        enrollment_progress=progress,
-        points_earned=completion.get("points_earned", 0),
+    store_idempotent(
+        idempotency_key, scope=scope, user_id=user_id, payload=body, body=response,
     )
+    return response
 
 
 @router.post(
@@ -299,7 +347,7 @@ async def complete_enrollment(
     if enrollment["status"] == "completed":
         raise ConflictError("Este journey ya esta completado.")
 
-    can_complete, message = await crud.can_complete_enrollment(db, enrollment_id)
+    can_complete, message = crud.can_complete_enrollment(enrollment)
     if not can_complete:
         raise ConflictError(message)
 
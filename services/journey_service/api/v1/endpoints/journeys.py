@@ -1,7 +1,6 @@
-from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from common.auth.security import OrgRoleRequired
 from common.database.client import get_admin_client
@@ -28,26 +27,14 @@ async def list_journeys(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
 ):
-    all_journeys, _ = await crud.get_journeys_for_org(
+    # Journeys not yet open (available_from in the future) are filtered in the query
+    journeys, _ = await crud.get_journeys_for_org(
         db=db,
         org_id=org_id,
         is_active=is_active,
         skip=skip,
         limit=limit,
     )
-    # Filter by available_from: hide journeys not yet open for enrollment
-    now = datetime.now(timezone.utc)
-    journeys = []
-    for j in all_journeys:
-        af = j.get("available_from")
-        if af:
-            try:
-                af_dt = datetime.fromisoformat(af.replace("Z", "+00:00")) if isinstance(af, str) else af
-                if now < af_dt:
-                    continue
-            except (ValueError, AttributeError):
-                pass
-        journeys.append(j)
     return journeys
 
 
@@ -59,16 +46,28 @@ async def list_journeys(
 async def get_journey(
     org_id: str,
     journey_id: UUID,
+    request: Request,
+    response: Response,
     _ctx=Depends(MemberRequired),  # noqa: B008
     db: AsyncClient = Depends(get_admin_client),  # noqa: B008
 ):
+    """Servido desde el snapshot versionado del journey publicado, con ETag
+    fuerte: If-None-Match con la versión actual → 304 sin cuerpo."""
     accessible = await crud.verify_journey_accessible_by_org(db, journey_id, org_id)
     if not accessible:
         raise ForbiddenError("El journey no pertenece a tu organizacion.")
 
-    journey = await crud.get_journey_with_steps(db, journey_id)
+    snapshot = await crud.get_journey_snapshot(db, journey_id)
 
-    if not journey:
+    if not snapshot:
         raise NotFoundError("Journey")
 
-    return journey
+    etag = f'"{snapshot["version"]}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+    return snapshot["journey"]
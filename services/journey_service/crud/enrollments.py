@@ -1,68 +1,27 @@
 import logging
+import os
 
 from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
 from common.cache.redis_client import cache_get_json, cache_set_json
+from common.database.concurrency import gather_limited
+from services.journey_service.logic.schedule import (
+    evaluate_progress,
+    parse_dt,
+    schedule_for_journey,
+)
 from supabase import AsyncClient
 
 logger = logging.getLogger("oasis.enrollment.crud")
 
-
-def _parse_dt(value: str | datetime | None) -> datetime | None:
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value if value.tzinfo else value.replace(tzinfo=UTC)
-    try:
-        return datetime.fromisoformat(value.replace("Z", "+00:00"))
-    except (ValueError, AttributeError):
-        return None
-
-
-def _compute_step_availability(
-    step: dict,
-    idx: int,
-    current_step_index: int,
-    now: datetime,
-    enrollment_started_at: str | datetime | None,
-    prev_completed_at: str | datetime | None,
-) -> tuple[str, datetime | None]:
-    """Compute (status, available_at) for a step given current context.
-
-    available_at is set when the step is locked due to scheduling so the UI
-    can show 'Available on [date]'.
-    """
-    # Absolute date gate — bypasses linear ordering when the time arrives
-    af = _parse_dt(step.get("available_from"))
-    if af is not None:
-        if now < af:
-            return "locked", af
-        return "available", None
-
-    # Hours after enrollment/event start
-    hours_start = step.get("unlock_hours_after_start")
-    if hours_start:
-        started = _parse_dt(enrollment_started_at)
-        if started:
-            unlock = started + timedelta(hours=hours_start)
-            if now < unlock:
-                return "locked", unlock
-            return "available", None
-
-    # Hours after previous step completion
-    hours_prev = step.get("unlock_hours_after_previous")
-    if hours_prev and idx > 0:
-        prev = _parse_dt(prev_completed_at)
-        if prev:
-            unlock = prev + timedelta(hours=hours_prev)
-            if now < unlock:
-                return "locked", unlock
-            return "available", None
-
-    # Normal linear availability (no scheduling constraints)
-    status = "available" if idx <= current_step_index else "locked"
-    return status, None
+# Los timestamps salen de NOW() (inicio de la transacción): una fila puede
+# hacerse visible después de que el cliente sincronizó con un cursor más
+# nuevo que ella. El delta re-lee esta ventana por detrás del cursor; el
+# cliente hace upsert por id, así que lo repetido es inocuo.
+DASHBOARD_SYNC_OVERLAP = timedelta(
+    seconds=int(os.getenv("DASHBOARD_SYNC_OVERLAP_SECONDS", "60"))
+)
 
 
 async def get_active_enrollment(
@@ -139,6 +98,23 @@ async def get_user_enrollments(
     return enrollments
 
 
+async def _load_progress_inputs(
+    db: AsyncClient, enrollment: dict, completion_fields: str
+) -> tuple[dict | None, dict[str, dict]]:
+    """Cached journey (with compiled schedule) + completions, in parallel."""
+    from services.journey_service.crud.journeys import get_journey_with_steps
+
+    journey, completions_response = await gather_limited(
+        get_journey_with_steps(db, UUID(str(enrollment["journey_id"]))),
+        db.schema("journeys").table("step_completions")
+        .select(completion_fields)
+        .eq("enrollment_id", str(enrollment["id"]))
+        .execute(),
+    )
+    completions = {c["step_id"]: c for c in (completions_response.data or [])}
+    return journey, completions
+
+
 async def get_enrollment_with_progress(
     db: AsyncClient, enrollment_id: UUID
 ) -> dict | None:
@@ -146,77 +122,34 @@ async def get_enrollment_with_progress(
     if not enrollment:
         return None
 
-    journey_id = enrollment["journey_id"]
-
-    journey_response = (
-        await db.schema("journeys").table("journeys")
-        .select("id, title, slug, description, thumbnail_url")
-        .eq("id", journey_id)
-        .single()
-        .execute()
+    journey, completions = await _load_progress_inputs(
+        db, enrollment, "step_id, completed_at, points_earned"
     )
-    journey = journey_response.data
-
-    steps_response = (
-        await db.schema("journeys").table("steps")
-        .select("id, title, type, order_index, available_from, unlock_hours_after_start, unlock_hours_after_previous")
-        .eq("journey_id", journey_id)
-        .order("order_index")
-        .execute()
-    )
-    all_steps = steps_response.data or []
-
-    completions_response = (
-        await db.schema("journeys").table("step_completions")
-        .select("step_id, completed_at, points_earned")
-        .eq("enrollment_id", str(enrollment_id))
-        .execute()
+    schedule = schedule_for_journey(journey or {})
+    steps_progress, completed_count = evaluate_progress(
+        schedule,
+        completions,
+        enrollment.get("current_step_index", 0),
+        enrollment.get("started_at"),
     )
-    completions = {c["step_id"]: c for c in (completions_response.data or [])}
-
-    steps_progress = []
-    completed_count = 0
-    current_step_index = enrollment.get("current_step_index", 0)
-    now = datetime.now(UTC)
-    enrollment_started_at = enrollment.get("started_at")
-    prev_completed_at: str | None = None
-
-    for idx, step in enumerate(all_steps):
-        step_id = step["id"]
-        completion = completions.get(step_id)
-
-        if completion:
-            step_status = "completed"
-            available_at = None
-            completed_count += 1
-            prev_completed_at = completion.get("completed_at")
-        else:
-            step_status, available_at = _compute_step_availability(
-                step, idx, current_step_index, now, enrollment_started_at, prev_completed_at
-            )
-
-        steps_progress.append(
-            {
-                "step_id": step_id,
-                "title": step["title"],
-                "type": step["type"],
-                "order_index": step["order_index"],
-                "status": step_status,
-                "completed_at": completion["completed_at"] if completion else None,
-                "points_earned": completion["points_earned"] if completion else 0,
-                "available_at": available_at.isoformat() if available_at else None,
-            }
-        )
 
+    journey_summary = None
     if journey:
-        journey["total_steps"] = len(all_steps)
+        journey_summary = {
+            "id": journey["id"],
+            "title": journey["title"],
+            "slug": journey.get("slug"),
+            "description": journey.get("description"),
+            "thumbnail_url": journey.get("thumbnail_url"),
+            "total_steps": len(schedule),
+        }
 
     return {
         **enrollment,
-        "journey": journey,
+        "journey": journey_summary,
         "steps_progress": steps_progress,
         "completed_steps": completed_count,
-        "total_steps": len(all_steps),
+        "total_steps": len(schedule),
     }
 
 
@@ -227,84 +160,21 @@ async def get_enrollment_step_progress(
     if not enrollment:
         return []
 
-    journey_id = enrollment["journey_id"]
-
-    steps_response = (
-        await db.schema("journeys").table("steps")
-        .select("id, title, type, order_index, available_from, unlock_hours_after_start, unlock_hours_after_previous")
-        .eq("journey_id", journey_id)
-        .order("order_index")
-        .execute()
-    )
-    all_steps = steps_response.data or []
-
-    completions_response = (
-        await db.schema("journeys").table("step_completions")
-        .select("*")
-        .eq("enrollment_id", str(enrollment_id))
-        .execute()
+    journey, completions = await _load_progress_inputs(db, enrollment, "*")
+    progress, _ = evaluate_progress(
+        schedule_for_journey(journey or {}),
+        completions,
+        enrollment.get("current_step_index", 0),
+        enrollment.get("started_at"),
     )
-    completions = {c["step_id"]: c for c in (completions_response.data or [])}
-
-    current_index = enrollment.get("current_step_index", 0)
-    now = datetime.now(UTC)
-    enrollment_started_at = enrollment.get("started_at")
-    prev_completed_at: str | None = None
-    progress = []
-
-    for idx, step in enumerate(all_steps):
-        step_id = step["id"]
-        completion = completions.get(step_id)
-
-        if completion:
-            step_status = "completed"
-            available_at = None
-            prev_completed_at = completion.get("completed_at")
-        else:
-            step_status, available_at = _compute_step_availability(
-                step, idx, current_index, now, enrollment_started_at, prev_completed_at
-            )
-
-        progress.append(
-            {
-                "step_id": step_id,
-                "title": step["title"],
-                "type": step["type"],
-                "order_index": step["order_index"],
-                "status": step_status,
-                "completed_at": completion["completed_at"] if completion else None,
-                "points_earned": completion["points_earned"] if completion else 0,
-                "available_at": available_at.isoformat() if available_at else None,
-            }
-        )
-
     return progress
 
 
-async def can_complete_enrollment(
-    db: AsyncClient, enrollment_id: UUID
-) -> tuple[bool, str]:
-    enrollment = await get_enrollment_by_id(db, enrollment_id)
-    if not enrollment:
-        return False, "Inscripcion no encontrada."
-
-    journey_id = enrollment["journey_id"]
-
-    steps_response = (
-        await db.schema("journeys").table("steps")
-        .select("id", count="exact")
-        .eq("journey_id", journey_id)
-        .execute()
-    )
-    total_steps = steps_response.count or 0
-
-    completions_response = (
-        await db.schema("journeys").table("step_completions")
-        .select("id", count="exact")
-        .eq("enrollment_id", str(enrollment_id))
-        .execute()
-    )
-    completed_steps = completions_response.count or 0
+def can_complete_enrollment(enrollment: dict) -> tuple[bool, str]:
+    """Chequeo sobre la propia fila: completed_steps / total_steps los
+    mantienen triggers en step_completions y steps."""
+    total_steps = enrollment.get("total_steps") or 0
+    completed_steps = enrollment.get("completed_steps") or 0
 
     if completed_steps < total_steps:
         return False, f"Faltan {total_steps - completed_steps} steps por completar."
@@ -330,80 +200,138 @@ async def update_enrollment_status(
     return response.data[0] if response.data else {}
 
 
-async def delete_enrollment(db: AsyncClient, enrollment_id: UUID) -> None:
-    """Delete an enrollment and all associated gamification data:
-    step_completions, points_ledger, user_activities, and user_rewards.
+# Menor que el max-rows de PostgREST (1000): cada llamada devuelve sus filas
+# borradas completas.
+_DELETE_BATCH_SIZE = 500
+
+
+async def delete_enrollments(
+    db: AsyncClient,
+    enrollment_ids: list[UUID] | None = None,
+    *,
+    event_id: UUID | None = None,
+    journey_id: UUID | None = None,
+) -> list[dict]:
+    """Delete enrollments and all associated gamification data
+    (step_completions, points_ledger, user_activities, user_rewards) via
+    public.delete_enrollments, one transaction per batch of
+    ``_DELETE_BATCH_SIZE`` enrollments.
+
+    Targets *enrollment_ids* plus, if *event_id* is given, that event's
+    cohort (optionally only *journey_id*). Returns the deleted rows
+    (enrollment_id, user_id, journey_id).
     """
-    # 1. Get enrollment info before deleting
-    enrollment = await get_enrollment_by_id(db, enrollment_id)
-    if not enrollment:
-        return
 
-    user_id = enrollment["user_id"]
-    journey_id = enrollment["journey_id"]
-    eid = str(enrollment_id)
+    async def _delete_batch(ids: list[str] | None, cohort: UUID | None) -> list[dict]:
+        response = await db.rpc(
+            "delete_enrollments",
+            {
+                "p_enrollment_ids": ids,
+                "p_event_id": str(cohort) if cohort else None,
+                "p_journey_id": str(journey_id) if cohort and journey_id else None,
+                "p_limit": _DELETE_BATCH_SIZE,
+            },
+        ).execute()
+        return response.data or []
 
-    # 2. Collect step_completion IDs (needed to clean points_ledger)
-    completions_resp = (
-        await db.schema("journeys").table("step_completions")
-        .select("id")
-        .eq("enrollment_id", eid)
-        .execute()
-    )
-    completion_ids = [c["id"] for c in (completions_resp.data or [])]
-
-    # 3. Delete points_ledger entries linked to these step completions
-    if completion_ids:
-        await (
-            db.schema("journeys").table("points_ledger")
-            .delete()
-            .in_("reference_id", completion_ids)
-            .execute()
-        )
-        logger.info(
-            "delete_enrollment: removed %d points_ledger entries for enrollment=%s",
-            len(completion_ids), eid,
-        )
+    deleted: list[dict] = []
+    ids = [str(eid) for eid in dict.fromkeys(enrollment_ids or [])]
+    for i in range(0, len(ids), _DELETE_BATCH_SIZE):
+        deleted += await _delete_batch(ids[i:i + _DELETE_BATCH_SIZE], None)
 
-    # 4. Delete user_activities for this enrollment
-    #    (step_completed and journey_completed both store enrollment_id in metadata)
-    await (
-        db.schema("journeys").table("user_activities")
-        .delete()
-        .eq("user_id", user_id)
-        .eq("metadata->>enrollment_id", eid)
-        .execute()
+    # La cohorte se achica con cada lote: repetir hasta un lote incompleto.
+    while event_id is not None:
+        batch = await _delete_batch(None, event_id)
+        deleted += batch
+        if len(batch) < _DELETE_BATCH_SIZE:
+            break
+
+    logger.info(
+        "delete_enrollments: removed %d enrollments (ids=%d event=%s journey=%s)",
+        len(deleted), len(ids), event_id, journey_id,
     )
-    logger.info("delete_enrollment: removed user_activities for enrollment=%s", eid)
-
-    # 5. Delete user_rewards earned from this journey
-    await (
-        db.schema("journeys").table("user_rewards")
-        .delete()
-        .eq("user_id", user_id)
-        .eq("journey_id", journey_id)
-        .execute()
+    return deleted
+
+
+# ---------------------------------------------------------------------------
+# Bulk enrollment (cohortes)
+# ---------------------------------------------------------------------------
+_BULK_ENROLL_BATCH_SIZE = 1000
+_BULK_ENROLL_CONCURRENCY = 4
+
+
+async def get_event_enrollment_target(
+    db: AsyncClient, event_id: UUID
+) -> tuple[str, list[str]] | None:
+    """(organization_id, journey_ids) of an event, or None if it does not exist."""
+    event_resp, links_resp = await gather_limited(
+        db.schema("crm").table("org_events")
+        .select("organization_id")
+        .eq("id", str(event_id))
+        .maybe_single()
+        .execute(),
+        db.schema("crm").table("event_journeys")
+        .select("journey_id")
+        .eq("event_id", str(event_id))
+        .execute(),
     )
-    logger.info(
-        "delete_enrollment: removed user_rewards for user=%s journey=%s",
-        user_id, journey_id,
+    if not event_resp or not event_resp.data:
+        return None
+    return (
+        event_resp.data["organization_id"],
+        [link["journey_id"] for link in (links_resp.data or [])],
     )
 
-    # 6. Delete step_completions
-    await (
-        db.schema("journeys").table("step_completions")
-        .delete()
-        .eq("enrollment_id", eid)
-        .execute()
-    )
 
-    # 7. Delete the enrollment itself
-    await (
-        db.schema("journeys").table("enrollments")
-        .delete()
-        .eq("id", eid)
-        .execute()
+async def bulk_enroll(
+    db: AsyncClient,
+    journey_ids: list[str],
+    *,
+    user_ids: list[UUID] | None = None,
+    emails: list[str] | None = None,
+    event_id: UUID | None = None,
+    organization_id: str | None = None,
+    modality: str = "presencial",
+) -> list[dict]:
+    """Enroll a cohort in *journey_ids* via public.bulk_enroll_users.
+
+    Identifiers are sent in batches of ``_BULK_ENROLL_BATCH_SIZE``; each batch
+    resolves users and inserts with ON CONFLICT DO NOTHING in one statement.
+    With *event_id* the users also get org membership (if missing) and an
+    attendance row. Returns one row per identifier
+    (identifier, user_id, outcome, journeys_enrolled).
+    """
+    identifiers = [("id", str(uid)) for uid in dict.fromkeys(user_ids or [])]
+    identifiers += [("email", e) for e in dict.fromkeys(emails or [])]
+    if not identifiers:
+        return []
+
+    def _call(batch: list[tuple[str, str]]):
+        return db.rpc(
+            "bulk_enroll_users",
+            {
+                "p_journey_ids": [str(jid) for jid in journey_ids],
+                "p_user_ids": [v for kind, v in batch if kind == "id"] or None,
+                "p_emails": [v for kind, v in batch if kind == "email"] or None,
+                "p_event_id": str(event_id) if event_id else None,
+                "p_organization_id": str(organization_id) if organization_id else None,
+                "p_modality": modality,
+            },
+        ).execute()
+
+    responses = await gather_limited(
+        *(
+            _call(identifiers[i:i + _BULK_ENROLL_BATCH_SIZE])
+            for i in range(0, len(identifiers), _BULK_ENROLL_BATCH_SIZE)
+        ),
+        limit=_BULK_ENROLL_CONCURRENCY,
+    )
+    results = [row for response in responses for row in (response.data or [])]
+    logger.info(
+        "bulk_enroll: %d identifiers, %d batches (journeys=%d event=%s)",
+        len(identifiers), len(responses), len(journey_ids), event_id,
     )
+    return results
 
 
 async def get_step_by_id(db: AsyncClient, step_id: UUID) -> dict | None:
@@ -509,6 +437,32 @@ async def complete_step(
     return response.data[0] if response.data else {}
 
 
+async def complete_step_atomic(
+    db: AsyncClient,
+    enrollment_id: UUID,
+    step_id: UUID,
+    user_id: UUID,
+    metadata: dict | None = None,
+    external_reference: str | None = None,
+    service_data: dict | None = None,
+) -> dict:
+    """Validate + insert + read progress in one round trip
+    (public.complete_enrollment_step). Returns the function row; the caller
+    maps ``outcome`` != 'ok' to the matching error."""
+    response = await db.rpc(
+        "complete_enrollment_step",
+        {
+            "p_enrollment_id": str(enrollment_id),
+            "p_step_id": str(step_id),
+            "p_user_id": str(user_id),
+            "p_metadata": metadata,
+            "p_external_reference": external_reference,
+            "p_service_data": service_data,
+        },
+    ).execute()
+    return response.data[0] if response.data else {"outcome": "not_found"}
+
+
 async def is_step_already_completed(
     db: AsyncClient, enrollment_id: UUID, step_id: UUID
 ) -> bool:
@@ -538,127 +492,175 @@ async def update_enrollment_event(
     return response.data[0] if response.data else None
 
 
-async def verify_step_in_enrollment_journey(
-    db: AsyncClient, enrollment_id: UUID, step_id: UUID
-) -> bool:
-    enrollment = await get_enrollment_by_id(db, enrollment_id)
-    if not enrollment:
-        return False
+def _dashboard_entry(e: dict, journey: dict, completions: dict, now: datetime) -> dict:
+    steps = journey.get("steps", [])
+    steps_progress, completed_count = evaluate_progress(
+        schedule_for_journey(journey),
+        completions,
+        e.get("current_step_index", 0),
+        e.get("started_at"),
+        now,
+    )
+    return {
+        **e,
+        "journey": {
+            "id": journey["id"],
+            "title": journey["title"],
+            "slug": journey.get("slug"),
+            "description": journey.get("description"),
+            "thumbnail_url": journey.get("thumbnail_url"),
+            "category": journey.get("category"),
+            "is_active": journey.get("is_active"),
+            "organization_id": journey.get("organization_id"),
+            "metadata": journey.get("metadata"),
+            "steps": steps,
+            "total_steps": len(steps),
+        },
+        "steps_progress": steps_progress,
+        "completed_steps": completed_count,
+        "total_steps": len(steps),
+    }
 
-    journey_id = enrollment["journey_id"]
 
-    response = (
-        await db.schema("journeys").table("steps")
-        .select("id")
-        .eq("id", str(step_id))
-        .eq("journey_id", journey_id)
-        .execute()
-    )
-    return len(response.data) > 0 if response.data else False
+def _after(value, since: datetime) -> bool:
+    dt = parse_dt(value)
+    return dt is not None and dt > since
+
+
+def _encode_cursor(ts: datetime | None, enrollment_count: int) -> str:
+    """Opaque sync cursor: latest change timestamp + enrollment count (the
+    count catches deletions, which leave no timestamp behind)."""
+    return f"{ts.isoformat() if ts else ''}~{enrollment_count}"
+
+
+def _decode_cursor(cursor: str | None) -> tuple[datetime | None, int | None]:
+    """(since, enrollment_count); (None, None) for a missing/invalid cursor,
+    which means a full load."""
+    if not cursor or "~" not in cursor:
+        return None, None
+    raw_ts, _, raw_count = cursor.rpartition("~")
+    since = parse_dt(raw_ts)
+    if since is None or not raw_count.isdigit():
+        return None, None
+    return since, int(raw_count)
 
 
 async def get_user_enrollments_full(
-    db: AsyncClient, user_id: UUID
-) -> list[dict]:
+    db: AsyncClient, user_id: UUID, cursor: str | None = None
+) -> dict | None:
     """Batch endpoint: returns enrollments + full journey data + step progress
     in a single response. Replaces N+1 fetching pattern on the dashboard.
 
     For each enrollment:
     - journey: full journey object with steps (from cache if available)
     - steps_progress: per-step completion status
-    """
-    # 1. Get all active/completed enrollments
-    enrollments = await get_user_enrollments(db, user_id)
-    if not enrollments:
-        return []
 
-    # 2. Collect unique journey IDs
-    journey_ids = list({e["journey_id"] for e in enrollments})
+    Delta sync: with the ``cursor`` of a previous response only the
+    enrollments whose row, completions or journey changed after it (minus
+    ``DASHBOARD_SYNC_OVERLAP``, so late-committing writes are not lost) are
+    rebuilt, and ``completions`` holds the new completions; items in the
+    overlap may be sent again and must be upserted by id. ``enrollment_ids``
+    lists every current enrollment so the client can prune deleted ones.
+    Returns None when nothing changed. Scheduled unlocks are not changes:
+    the client already has ``available_at`` (and the ``step.unlocked`` push).
 
-    # 3. Batch-fetch journeys with steps (leverages Redis cache in get_journey_with_steps)
-    from services.journey_service.crud.journeys import get_journey_with_steps
-
-    journey_map: dict[str, dict] = {}
-    for jid in journey_ids:
-        j = await get_journey_with_steps(db, UUID(jid))
-        if j:
-            journey_map[jid] = j
+    Returns ``{"cursor", "enrollments", "enrollment_ids", "completions"}``.
+    """
+    since, since_count = _decode_cursor(cursor)
+    window_start = since - DASHBOARD_SYNC_OVERLAP if since else None
 
-    # 4. Batch-fetch all step_completions for these enrollments
+    # 1. Get all active/completed enrollments
+    enrollments = await get_user_enrollments(db, user_id)
     enrollment_ids = [e["id"] for e in enrollments]
-    completions_resp = (
-        await db.schema("journeys").table("step_completions")
+    if not enrollments:
+        if since is not None and since_count == 0:
+            return None
+        return {
+            "cursor": _encode_cursor(since, 0),
+            "enrollments": [],
+            "enrollment_ids": [],
+            "completions": [],
+        }
+
+    # 2. Batch-fetch journeys with steps (one cache multi-get + at most 2
+    #    queries) and, concurrently, the completions: all of them on a full
+    #    load, only the ones newer than the cursor on a delta
+    from services.journey_service.crud.journeys import get_journeys_with_steps_many
+
+    completions_query = (
+        db.schema("journeys").table("step_completions")
         .select("enrollment_id, step_id, completed_at, points_earned")
-        .in_("enrollment_id", enrollment_ids)
-        .execute()
     )
+    if since is None:
+        completions_query = completions_query.in_("enrollment_id", enrollment_ids)
+    else:
+        completions_query = (
+            completions_query.eq("user_id", str(user_id))
+            .gt("completed_at", window_start.isoformat())
+        )
+    journey_map, completions_resp = await gather_limited(
+        get_journeys_with_steps_many(db, list({e["journey_id"] for e in enrollments})),
+        completions_query.execute(),
+    )
+    live_ids = set(enrollment_ids)
+    completions = [
+        c for c in (completions_resp.data or []) if c["enrollment_id"] in live_ids
+    ]
+
+    timestamps = [
+        dt for dt in map(parse_dt, [
+            *(e.get("updated_at") or e.get("started_at") for e in enrollments),
+            *(c["completed_at"] for c in completions),
+            *(j.get("updated_at") for j in journey_map.values()),
+        ])
+        if dt is not None
+    ]
+    latest = max([since, *timestamps] if since else timestamps, default=None)
+    new_cursor = _encode_cursor(latest, len(enrollments))
+
+    # 3. Which enrollments must be rebuilt
+    if since is None:
+        changed = enrollments
+    else:
+        touched = {c["enrollment_id"] for c in completions}
+        changed = [
+            e for e in enrollments
+            if e["id"] in touched
+            or _after(e.get("updated_at") or e.get("started_at"), window_start)
+            or _after(
+                (journey_map.get(e["journey_id"]) or {}).get("updated_at"), window_start
+            )
+        ]
+        if not changed and since_count == len(enrollments):
+            return None
 
-    # Group completions by enrollment_id
+    # 4. Progress needs every completion of a rebuilt enrollment
     completions_by_enrollment: dict[str, dict[str, dict]] = {}
-    for c in (completions_resp.data or []):
-        eid = c["enrollment_id"]
-        if eid not in completions_by_enrollment:
-            completions_by_enrollment[eid] = {}
-        completions_by_enrollment[eid][c["step_id"]] = c
-
-    # 5. Build enriched response
-    result = []
-    for e in enrollments:
-        journey = journey_map.get(e["journey_id"])
-        if not journey:
-            continue
-
-        steps = journey.get("steps", [])
-        completions = completions_by_enrollment.get(e["id"], {})
-        current_index = e.get("current_step_index", 0)
-
-        steps_progress = []
-        completed_count = 0
-        now = datetime.now(UTC)
-        enrollment_started_at = e.get("started_at")
-        prev_completed_at_full: str | None = None
-
-        for idx, step in enumerate(steps):
-            completion = completions.get(step["id"])
-            if completion:
-                step_status = "completed"
-                available_at = None
-                completed_count += 1
-                prev_completed_at_full = completion.get("completed_at")
-            else:
-                step_status, available_at = _compute_step_availability(
-                    step, idx, current_index, now, enrollment_started_at, prev_completed_at_full
-                )
-
-            steps_progress.append({
-                "step_id": step["id"],
-                "title": step["title"],
-                "type": step["type"],
-                "order_index": step["order_index"],
-                "status": step_status,
-                "completed_at": completion["completed_at"] if completion else None,
-                "points_earned": completion["points_earned"] if completion else 0,
-                "available_at": available_at.isoformat() if available_at else None,
-            })
-
-        result.append({
-            **e,
-            "journey": {
-                "id": journey["id"],
-                "title": journey["title"],
-                "slug": journey.get("slug"),
-                "description": journey.get("description"),
-                "thumbnail_url": journey.get("thumbnail_url"),
-                "category": journey.get("category"),
-                "is_active": journey.get("is_active"),
-                "organization_id": journey.get("organization_id"),
-                "metadata": journey.get("metadata"),
-                "steps": steps,
-                "total_steps": len(steps),
-            },
-            "steps_progress": steps_progress,
-            "completed_steps": completed_count,
-            "total_steps": len(steps),
-        })
+    all_completions = completions
+    if since is not None and changed:
+        all_completions = (
+            await db.schema("journeys").table("step_completions")
+            .select("enrollment_id, step_id, completed_at, points_earned")
+            .in_("enrollment_id", [e["id"] for e in changed])
+            .execute()
+        ).data or []
+    for c in all_completions:
+        completions_by_enrollment.setdefault(c["enrollment_id"], {})[c["step_id"]] = c
 
-    return result
+    # 5. Build enriched response (one shared evaluator + compiled schedules)
+    now = datetime.now(UTC)
+    return {
+        "cursor": new_cursor,
+        "enrollments": [
+            _dashboard_entry(
+                e,
+                journey_map[e["journey_id"]],
+                completions_by_enrollment.get(e["id"], {}),
+                now,
+            )
+            for e in changed
+            if e["journey_id"] in journey_map
+        ],
+        "enrollment_ids": enrollment_ids,
+        "completions": completions if since is not None else [],
+    }
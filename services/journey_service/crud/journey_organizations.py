@@ -1,5 +1,6 @@
 from uuid import UUID
 
+from services.journey_service.crud.journeys import invalidate_org_journey_index
 from supabase import AsyncClient
 
 
@@ -39,6 +40,7 @@ async def assign_journey_to_orgs(
         .upsert(payload, on_conflict="journey_id,organization_id")
         .execute()
     )
+    invalidate_org_journey_index(str(org_id) for org_id in org_ids)
     return response.data or []
 
 
@@ -56,6 +58,7 @@ async def unassign_journey_from_orgs(
         .in_("organization_id", str_ids)
         .execute()
     )
+    invalidate_org_journey_index(str_ids)
     return len(response.data) if response.data else 0
 
 
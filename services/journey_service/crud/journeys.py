@@ -1,14 +1,135 @@
+import hashlib
+import json
 import logging
-
+from collections.abc import AsyncIterator, Iterable
+from datetime import UTC, datetime
 from uuid import UUID
 
-from common.cache.redis_client import cache_delete, cache_get_json, cache_set_json
+from common.cache.redis_client import (
+    cache_delete,
+    cache_get_json,
+    cache_get_many_json,
+    cache_set_json,
+    cache_set_many_json,
+)
+from common.database.concurrency import (
+    DEFAULT_IN_CHUNK_SIZE,
+    fetch_all_pages,
+    fetch_in_chunks,
+    gather_limited,
+)
+from services.journey_service.logic.schedule import StepSchedule
 from services.journey_service.schemas.journeys import JourneyCreate, JourneyUpdate
 from supabase import AsyncClient
 
 logger = logging.getLogger("oasis.journey.crud")
 
 _JOURNEY_CACHE_TTL = 900  # 15 minutes
+# Per-worker L1 copy; safe to keep long because writes broadcast invalidations.
+_JOURNEY_LOCAL_TTL = _JOURNEY_CACHE_TTL
+
+# La lista de miembros filtra available_from <= inicio del bucket: un journey
+# aparece como máximo un bucket tarde y cada página cacheada es correcta para
+# todo su bucket (la key cambia cuando cambia el bucket).
+_AVAILABILITY_BUCKET_SECONDS = 60
+
+
+# ---------------------------------------------------------------------------
+# Org → accessible journey index
+# ---------------------------------------------------------------------------
+# Visible para una org = asignado vía journey_organizations ∪ is_global.
+# Se cachea en dos partes para que un cambio de is_global invalide una sola
+# key en vez de la de cada org.
+_GLOBAL_JOURNEY_IDS_KEY = "journey_ids:global"
+
+
+def _org_journey_ids_key(org_id: str) -> str:
+    return f"journey_ids:org:{org_id}"
+
+
+async def get_org_journey_index(db: AsyncClient, org_id: str) -> frozenset[str]:
+    """IDs de journeys accesibles por la org (un multi-get; queries sólo
+    para las partes que no estén en cache)."""
+    org_key = _org_journey_ids_key(org_id)
+    cached = cache_get_many_json(
+        [_GLOBAL_JOURNEY_IDS_KEY, org_key], local_ttl=_JOURNEY_LOCAL_TTL
+    )
+    global_ids = cached.get(_GLOBAL_JOURNEY_IDS_KEY)
+    assigned_ids = cached.get(org_key)
+
+    if global_ids is None or assigned_ids is None:
+        global_resp, assigned_resp = await gather_limited(
+            db.schema("journeys").table("journeys")
+            .select("id")
+            .eq("is_global", True)
+            .execute() if global_ids is None else _no_query(),
+            db.schema("journeys").table("journey_organizations")
+            .select("journey_id")
+            .eq("organization_id", org_id)
+            .execute() if assigned_ids is None else _no_query(),
+        )
+        fresh: dict[str, list[str]] = {}
+        if global_ids is None:
+            global_ids = fresh[_GLOBAL_JOURNEY_IDS_KEY] = [
+                row["id"] for row in _rows(global_resp)
+            ]
+        if assigned_ids is None:
+            assigned_ids = fresh[org_key] = [
+                row["journey_id"] for row in _rows(assigned_resp)
+            ]
+        cache_set_many_json(fresh, _JOURNEY_CACHE_TTL, local_ttl=_JOURNEY_LOCAL_TTL)
+
+    return frozenset(global_ids) | frozenset(assigned_ids)
+
+
+def invalidate_org_journey_index(
+    org_ids: Iterable[str] = (), *, global_ids: bool = False
+) -> None:
+    """Drop the accessible-journey index (and the cached default list) of
+    *org_ids*; ``global_ids`` when a journey's is_global may have changed."""
+    if global_ids:
+        cache_delete(_GLOBAL_JOURNEY_IDS_KEY)
+    for org_id in dict.fromkeys(str(o) for o in org_ids):
+        cache_delete(_org_journey_ids_key(org_id))
+        invalidate_org_journeys_list(org_id)
+
+
+async def _assigned_org_ids(db: AsyncClient, journey_id: UUID) -> list[str]:
+    """Orgs con el journey asignado vía journey_organizations (owner incluido)."""
+    response = (
+        await db.schema("journeys").table("journey_organizations")
+        .select("organization_id")
+        .eq("journey_id", str(journey_id))
+        .execute()
+    )
+    return [row["organization_id"] for row in _rows(response)]
+
+
+def _availability_bucket(now: datetime | None = None) -> int:
+    now = now or datetime.now(UTC)
+    return int(now.timestamp()) // _AVAILABILITY_BUCKET_SECONDS
+
+
+def _org_journeys_list_key(org_id: str, bucket: int) -> str:
+    return f"org_journeys:{org_id}:{bucket}"
+
+
+def invalidate_org_journeys_list(org_id: str) -> None:
+    """Drop the cached default member list. Only the current bucket can be
+    read again; the previous one is dropped too for workers whose clock
+    still lags behind the boundary."""
+    bucket = _availability_bucket()
+    cache_delete(_org_journeys_list_key(org_id, bucket))
+    cache_delete(_org_journeys_list_key(org_id, bucket - 1))
+
+
+def _org_journeys_query(db: AsyncClient, org_id: str, is_active: bool | None):
+    """Journeys visibles para la org; la unión asignados ∪ globales la
+    resuelve public.get_org_journeys (sin lista de IDs en la URL)."""
+    query = db.rpc("get_org_journeys", {"p_organization_id": org_id}, count="exact")
+    if is_active is not None:
+        query = query.eq("is_active", is_active)
+    return query
 
 
 # ---------------------------------------------------------------------------
@@ -21,50 +142,28 @@ async def get_journeys_for_org(
     skip: int = 0,
     limit: int = 50,
 ) -> tuple[list[dict], int]:
+    """Journeys visibles para miembros: ya abiertos (available_from nulo o
+    pasado). El filtro va en la query, así que las páginas salen completas
+    y ``count`` coincide con lo que se muestra."""
+    bucket = _availability_bucket()
+    opened_before = datetime.fromtimestamp(
+        bucket * _AVAILABILITY_BUCKET_SECONDS, UTC
+    ).strftime("%Y-%m-%dT%H:%M:%SZ")
+
     # Only cache the default query (active, first page)
     use_cache = is_active is True and skip == 0 and limit == 50
-    cache_key = f"org_journeys:{org_id}"
+    cache_key = _org_journeys_list_key(org_id, bucket)
 
     if use_cache:
-        cached = cache_get_json(cache_key)
+        cached = cache_get_json(cache_key, local_ttl=_AVAILABILITY_BUCKET_SECONDS)
         if cached is not None:
             logger.debug("CACHE_HIT org_journeys:%s", org_id)
             return cached.get("data", []), cached.get("count", 0)
 
-    # Get journey IDs assigned to this org via junction table
-    jo_response = (
-        await db.schema("journeys")
-        .table("journey_organizations")
-        .select("journey_id")
-        .eq("organization_id", org_id)
-        .execute()
-    )
-    assigned_ids = {row["journey_id"] for row in (jo_response.data or [])}
-
-    # Also include journeys flagged as global (visible to every org)
-    global_response = (
-        await db.schema("journeys")
-        .table("journeys")
-        .select("id")
-        .eq("is_global", True)
-        .execute()
-    )
-    union_ids = list(assigned_ids | {row["id"] for row in (global_response.data or [])})
-
-    if not union_ids:
-        return [], 0
-
-    query = (
-        db.schema("journeys").table("journeys")
-        .select("*", count="exact")
-        .in_("id", union_ids)
-    )
-
-    if is_active is not None:
-        query = query.eq("is_active", is_active)
-
     response = (
-        await query.order("created_at", desc=True)
+        await _org_journeys_query(db, org_id, is_active)
+        .or_(f"available_from.is.null,available_from.lte.{opened_before}")
+        .order("created_at", desc=True)
         .range(skip, skip + limit - 1)
         .execute()
     )
@@ -73,7 +172,12 @@ async def get_journeys_for_org(
     count = response.count or 0
 
     if use_cache:
-        cache_set_json(cache_key, {"data": data, "count": count}, _JOURNEY_CACHE_TTL)
+        # Un bucket de vida: después nadie vuelve a leer esta key.
+        cache_set_json(
+            cache_key, {"data": data, "count": count},
+            2 * _AVAILABILITY_BUCKET_SECONDS,
+            local_ttl=_AVAILABILITY_BUCKET_SECONDS,
+        )
 
     return data, count
 
@@ -89,38 +193,213 @@ async def get_journey_by_id(db: AsyncClient, journey_id: UUID) -> dict | None:
     return response.data
 
 
+# ---------------------------------------------------------------------------
+# Published snapshots
+# ---------------------------------------------------------------------------
+# Un journey publicado (is_active) se sirve desde un snapshot JSON inmutable:
+# ``version`` es el hash del contenido, así que cada edición produce una
+# versión nueva y el ETag de una versión nunca cambia. publish_journey lo
+# renderiza y cada escritura posterior lo re-renderiza
+# (refresh_journey_snapshot), de modo que leer un journey publicado no toca
+# la DB mientras el snapshot esté en Redis.
+#
+# Un miss en lectura también rellena el snapshot, pero con SET NX y el TTL
+# corto del cache de drafts: si un admin refrescó el snapshot entre la carga
+# y el guardado del lector, la versión nueva gana; y una copia leída justo
+# antes de despublicar dura como mucho 15 minutos, no 7 días.
+_SNAPSHOT_TTL = 7 * 86400
+
+
+def _snapshot_key(journey_id) -> str:
+    return f"journey_snapshot:{journey_id}"
+
+
+def render_journey_snapshot(journey: dict) -> dict:
+    raw = json.dumps(journey, sort_keys=True, separators=(",", ":"), default=str)
+    version = hashlib.sha256(raw.encode()).hexdigest()[:32]
+    return {"version": version, "journey": journey}
+
+
+def _store_snapshot(journey: dict) -> dict:
+    snapshot = render_journey_snapshot(journey)
+    key = _snapshot_key(journey["id"])
+    # delete primero: difunde la invalidación del L1 de la versión anterior
+    cache_delete(key)
+    cache_set_json(key, snapshot, _SNAPSHOT_TTL, local_ttl=_JOURNEY_LOCAL_TTL)
+    return snapshot
+
+
+async def _load_journey_with_steps(db: AsyncClient, journey_id: UUID) -> dict | None:
+    journey_resp, steps_resp = await gather_limited(
+        db.schema("journeys").table("journeys")
+        .select("*")
+        .eq("id", str(journey_id))
+        .maybe_single()
+        .execute(),
+        db.schema("journeys").table("steps")
+        .select("*")
+        .eq("journey_id", str(journey_id))
+        .order("order_index")
+        .execute(),
+    )
+    journey = journey_resp.data if journey_resp is not None else None
+    if not journey:
+        return None
+
+    journey["steps"] = steps_resp.data or []
+    journey["schedule"] = StepSchedule.compile(journey["steps"]).to_payload()
+    return journey
+
+
+async def refresh_journey_snapshot(db: AsyncClient, journey_id: UUID) -> None:
+    """Call after any write to a journey or its steps: drops the draft cache
+    and re-renders the snapshot (or drops it if the journey is unpublished)."""
+    cache_delete(f"journey:{journey_id}")
+    journey = await _load_journey_with_steps(db, journey_id)
+    if journey and journey.get("is_active"):
+        _store_snapshot(journey)
+    else:
+        cache_delete(_snapshot_key(journey_id))
+
+
+async def get_journey_snapshot(db: AsyncClient, journey_id: UUID) -> dict | None:
+    """``{"version", "journey"}`` for participant reads. Published journeys
+    come from the stored snapshot; drafts are rendered on the fly."""
+    cached = cache_get_json(_snapshot_key(journey_id), local_ttl=_JOURNEY_LOCAL_TTL)
+    if cached is not None:
+        return cached
+
+    journey = await get_journey_with_steps(db, journey_id)
+    if not journey:
+        return None
+    return render_journey_snapshot(journey)
+
+
 async def get_journey_with_steps(db: AsyncClient, journey_id: UUID) -> dict | None:
+    snapshot = cache_get_json(_snapshot_key(journey_id), local_ttl=_JOURNEY_LOCAL_TTL)
+    if snapshot is not None:
+        return snapshot["journey"]
+
     cache_key = f"journey:{journey_id}"
-    cached = cache_get_json(cache_key)
+    cached = cache_get_json(cache_key, local_ttl=_JOURNEY_LOCAL_TTL)
     if cached is not None:
         logger.debug("CACHE_HIT journey:%s", journey_id)
         return cached
 
-    journey_response = (
-        await db.schema("journeys").table("journeys")
-        .select("*")
-        .eq("id", str(journey_id))
-        .single()
-        .execute()
-    )
-
-    if not journey_response.data:
+    journey = await _load_journey_with_steps(db, journey_id)
+    if not journey:
         return None
 
-    journey = journey_response.data
+    if journey.get("is_active"):
+        cache_set_json(
+            _snapshot_key(journey_id),
+            render_journey_snapshot(journey),
+            _JOURNEY_CACHE_TTL,
+            local_ttl=_JOURNEY_LOCAL_TTL,
+            nx=True,
+        )
+    else:
+        cache_set_json(
+            cache_key, journey, _JOURNEY_CACHE_TTL, local_ttl=_JOURNEY_LOCAL_TTL
+        )
+    return journey
 
-    steps_response = (
-        await db.schema("journeys").table("steps")
-        .select("*")
-        .eq("journey_id", str(journey_id))
-        .order("order_index")
-        .execute()
+
+async def get_journeys_with_steps_many(
+    db: AsyncClient, journey_ids: list[str]
+) -> dict[str, dict]:
+    """Batched get_journey_with_steps: journey_id → journey (con "steps").
+
+    Un multi-get de cache (snapshots publicados + cache de drafts); para los
+    que faltan, journeys en chunks de IN y steps paginados por chunk, y
+    back-fill del cache. Los ids que no existen no aparecen en el resultado.
+    """
+    journey_ids = list(dict.fromkeys(str(jid) for jid in journey_ids))
+    if not journey_ids:
+        return {}
+
+    cached = cache_get_many_json(
+        [_snapshot_key(jid) for jid in journey_ids]
+        + [f"journey:{jid}" for jid in journey_ids],
+        local_ttl=_JOURNEY_LOCAL_TTL,
     )
+    journey_map: dict[str, dict] = {}
+    missing: list[str] = []
+    for jid in journey_ids:
+        snapshot = cached.get(_snapshot_key(jid))
+        hit = (
+            snapshot["journey"] if snapshot is not None
+            else cached.get(f"journey:{jid}")
+        )
+        if hit is not None:
+            journey_map[jid] = hit
+        else:
+            missing.append(jid)
 
-    journey["steps"] = steps_response.data or []
+    if not missing:
+        return journey_map
+    logger.debug("CACHE_MISS journey: %d of %d", len(missing), len(journey_ids))
 
-    cache_set_json(cache_key, journey, _JOURNEY_CACHE_TTL)
-    return journey
+    # Los steps se paginan (keyset): un IN de muchos journeys supera el
+    # max-rows de PostgREST y una lista de steps truncada terminaría cacheada.
+    chunks = [
+        missing[i:i + DEFAULT_IN_CHUNK_SIZE]
+        for i in range(0, len(missing), DEFAULT_IN_CHUNK_SIZE)
+    ]
+    journeys_resp, *step_pages = await gather_limited(
+        fetch_in_chunks(
+            lambda ids: db.schema("journeys").table("journeys")
+            .select("*")
+            .in_("id", ids)
+            .execute(),
+            missing,
+        ),
+        *(
+            fetch_all_pages(
+                lambda chunk=chunk: db.schema("journeys").table("steps")
+                .select("*")
+                .in_("journey_id", chunk)
+            )
+            for chunk in chunks
+        ),
+    )
+
+    steps_by_journey: dict[str, list[dict]] = {}
+    for page in step_pages:
+        for step in page:
+            steps_by_journey.setdefault(step["journey_id"], []).append(step)
+
+    fetched: dict[str, dict] = {}
+    for journey in _rows(journeys_resp):
+        journey["steps"] = sorted(
+            steps_by_journey.get(journey["id"], []),
+            key=lambda st: (st.get("order_index") is None, st.get("order_index") or 0),
+        )
+        journey["schedule"] = StepSchedule.compile(journey["steps"]).to_payload()
+        fetched[journey["id"]] = journey
+
+    # Relleno desde lectura: NX + TTL corto (ver "Published snapshots")
+    cache_set_many_json(
+        {
+            _snapshot_key(jid): render_journey_snapshot(journey)
+            for jid, journey in fetched.items()
+            if journey.get("is_active")
+        },
+        _JOURNEY_CACHE_TTL,
+        local_ttl=_JOURNEY_LOCAL_TTL,
+        nx=True,
+    )
+    cache_set_many_json(
+        {
+            f"journey:{jid}": journey
+            for jid, journey in fetched.items()
+            if not journey.get("is_active")
+        },
+        _JOURNEY_CACHE_TTL,
+        local_ttl=_JOURNEY_LOCAL_TTL,
+    )
+    journey_map.update(fetched)
+    return journey_map
 
 
 async def get_steps_by_journey(db: AsyncClient, journey_id: UUID) -> list[dict]:
@@ -155,26 +434,7 @@ async def verify_journey_accessible_by_org(
     org_id: str,
 ) -> bool:
     """Check if a journey is accessible by an org (owned, assigned via junction table, or global)."""
-    j_resp = (
-        await db.schema("journeys")
-        .table("journeys")
-        .select("is_global")
-        .eq("id", str(journey_id))
-        .maybe_single()
-        .execute()
-    )
-    if j_resp.data and j_resp.data.get("is_global"):
-        return True
-
-    response = (
-        await db.schema("journeys")
-        .table("journey_organizations")
-        .select("id")
-        .eq("journey_id", str(journey_id))
-        .eq("organization_id", org_id)
-        .execute()
-    )
-    return len(response.data) > 0 if response.data else False
+    return str(journey_id) in await get_org_journey_index(db, org_id)
 
 
 # ---------------------------------------------------------------------------
@@ -208,7 +468,9 @@ async def create_journey(
                 "organization_id": org_id,
             }
         ).execute()
-        cache_delete(f"org_journeys:{org_id}")
+        invalidate_org_journey_index(
+            [org_id], global_ids=bool(created.get("is_global"))
+        )
 
     return created
 
@@ -243,24 +505,34 @@ async def update_journey(
     )
     result = response.data[0] if response.data else {}
 
-    # Invalidate caches
-    cache_delete(f"journey:{journey_id}")
+    # Invalidate caches (a published journey gets a new snapshot version).
+    # Every assigned org lists this journey, not only the owner; orgs that see
+    # it only through is_global keep their list for at most one bucket.
+    await refresh_journey_snapshot(db, journey_id)
+    org_ids = await _assigned_org_ids(db, journey_id)
     if result.get("organization_id"):
-        cache_delete(f"org_journeys:{result['organization_id']}")
+        org_ids.append(result["organization_id"])
+    for org_id in dict.fromkeys(org_ids):
+        invalidate_org_journeys_list(org_id)
+    if "is_global" in payload:
+        invalidate_org_journey_index(global_ids=True)
 
     return result
 
 
 async def delete_journey(db: AsyncClient, journey_id: UUID) -> bool:
-    # Fetch org_id before deleting for cache invalidation
-    pre = (
-        await db.schema("journeys").table("journeys")
-        .select("organization_id")
+    # Fetch the owner and the assigned orgs before deleting (the junction rows
+    # go with the journey) for cache invalidation
+    pre, assigned = await gather_limited(
+        db.schema("journeys").table("journeys")
+        .select("organization_id, is_global")
         .eq("id", str(journey_id))
         .maybe_single()
-        .execute()
+        .execute(),
+        _assigned_org_ids(db, journey_id),
     )
     org_id = pre.data.get("organization_id") if pre.data else None
+    was_global = bool(pre.data.get("is_global")) if pre.data else False
 
     response = (
         await db.schema("journeys").table("journeys").delete().eq("id", str(journey_id)).execute()
@@ -269,13 +541,20 @@ async def delete_journey(db: AsyncClient, journey_id: UUID) -> bool:
 
     if deleted:
         cache_delete(f"journey:{journey_id}")
-        if org_id:
-            cache_delete(f"org_journeys:{org_id}")
+        cache_delete(_snapshot_key(journey_id))
+        invalidate_org_journey_index(
+            [*assigned, org_id] if org_id else assigned, global_ids=was_global
+        )
 
     return deleted
 
 
-async def get_journey_admin(db: AsyncClient, journey_id: UUID) -> dict | None:
+async def get_journey_admin(
+    db: AsyncClient, journey_id: UUID, org_id: str | None = None
+) -> dict | None:
+    """Journey + step count + enrollment stats. With *org_id* the stats only
+    count enrollments attributed to that org (the counters are keyed by
+    attributed_organization_id); without it, every org."""
     journey_resp = (
         await db.schema("journeys").table("journeys")
         .select("*")
@@ -289,29 +568,33 @@ async def get_journey_admin(db: AsyncClient, journey_id: UUID) -> dict | None:
 
     journey = journey_resp.data
 
+    # Counters maintained by triggers (journeys.step_counters /
+    # journeys.enrollment_counters) — no per-enrollment rows are downloaded.
     steps_resp = (
-        await db.schema("journeys").table("steps")
-        .select("id", count="exact")
+        await db.schema("journeys").table("step_counters")
+        .select("total_steps")
         .eq("journey_id", str(journey_id))
+        .maybe_single()
         .execute()
     )
-    journey["total_steps"] = steps_resp.count or 0
+    steps_row = (steps_resp.data if steps_resp else None) or {}
+    journey["total_steps"] = steps_row.get("total_steps", 0)
 
-    enrollments_resp = (
-        await db.schema("journeys").table("enrollments")
-        .select("status")
+    counters_query = (
+        db.schema("journeys").table("enrollment_counters")
+        .select("status, total")
         .eq("journey_id", str(journey_id))
-        .execute()
     )
+    if org_id is not None:
+        counters_query = counters_query.eq("organization_id", org_id)
+    counters_resp = await counters_query.execute()
+    by_status: dict[str, int] = {}
+    for row in counters_resp.data or []:
+        by_status[row["status"]] = by_status.get(row["status"], 0) + row["total"]
 
-    enrollments = enrollments_resp.data or []
-    journey["total_enrollments"] = len(enrollments)
-    journey["active_enrollments"] = sum(
-        1 for e in enrollments if e["status"] == "active"
-    )
-    journey["completed_enrollments"] = sum(
-        1 for e in enrollments if e["status"] == "completed"
-    )
+    journey["total_enrollments"] = sum(by_status.values())
+    journey["active_enrollments"] = by_status.get("active", 0)
+    journey["completed_enrollments"] = by_status.get("completed", 0)
 
     if journey["total_enrollments"] > 0:
         journey["completion_rate"] = round(
@@ -330,87 +613,37 @@ async def list_journeys_admin(
     skip: int = 0,
     limit: int = 50,
 ) -> tuple[list[dict], int]:
-    # Get journey IDs assigned to this org via junction table
-    jo_response = (
-        await db.schema("journeys")
-        .table("journey_organizations")
-        .select("journey_id")
-        .eq("organization_id", org_id)
-        .execute()
-    )
-    assigned_ids = {row["journey_id"] for row in (jo_response.data or [])}
-
-    # Also include journeys flagged as global (visible to every org)
-    global_response = (
-        await db.schema("journeys")
-        .table("journeys")
-        .select("id")
-        .eq("is_global", True)
-        .execute()
-    )
-    union_ids = list(assigned_ids | {row["id"] for row in (global_response.data or [])})
-
-    if not union_ids:
-        return [], 0
-
-    query = (
-        db.schema("journeys").table("journeys")
-        .select("*", count="exact")
-        .in_("id", union_ids)
-    )
-
-    if is_active is not None:
-        query = query.eq("is_active", is_active)
-
     response = (
-        await query.order("created_at", desc=True)
+        await _org_journeys_query(db, org_id, is_active)
+        .order("created_at", desc=True)
         .range(skip, skip + limit - 1)
         .execute()
     )
     journeys = response.data or []
     total = response.count or 0
 
+    if not journeys:
+        return journeys, total
+
     # Scope enrollment counts to users that belong to this org so that the
     # numbers shown in the UI ("Inscritos" / "Completados") reflect the org
     # being viewed instead of the journey's global reach across all orgs it
-    # is assigned to.
-    members_resp = (
-        await db.table("organization_members")
-        .select("user_id")
-        .eq("organization_id", org_id)
-        .eq("status", "active")
-        .execute()
-    )
-    member_user_ids = [row["user_id"] for row in (members_resp.data or [])]
+    # is assigned to. One grouped RPC for the whole page (steps + statuses).
+    stats_resp = await db.rpc(
+        "get_journey_admin_stats",
+        {
+            "p_organization_id": org_id,
+            "p_journey_ids": [j["id"] for j in journeys],
+        },
+    ).execute()
+    stats_by_id = {row["journey_id"]: row for row in (stats_resp.data or [])}
 
     for journey in journeys:
-        steps_resp = (
-            await db.schema("journeys").table("steps")
-            .select("id", count="exact")
-            .eq("journey_id", journey["id"])
-            .execute()
-        )
-        journey["total_steps"] = steps_resp.count or 0
-
-        if member_user_ids:
-            enroll_resp = (
-                await db.schema("journeys").table("enrollments")
-                .select("status")
-                .eq("journey_id", journey["id"])
-                .in_("user_id", member_user_ids)
-                .execute()
-            )
-            enrollments = enroll_resp.data or []
-        else:
-            enrollments = []
-
-        journey["total_enrollments"] = len(enrollments)
-        journey["active_enrollments"] = sum(
-            1 for e in enrollments if e["status"] == "active"
-        )
-        journey["completed_enrollments"] = sum(
-            1 for e in enrollments if e["status"] == "completed"
-        )
+        row = stats_by_id.get(journey["id"], {})
+        journey["total_steps"] = row.get("total_steps", 0)
+        journey["total_enrollments"] = row.get("total_enrollments", 0)
+        journey["active_enrollments"] = row.get("active_enrollments", 0)
+        journey["completed_enrollments"] = row.get("completed_enrollments", 0)
         journey["completion_rate"] = (
             round(
                 journey["completed_enrollments"] / journey["total_enrollments"], 4
@@ -422,6 +655,35 @@ async def list_journeys_admin(
     return journeys, total
 
 
+async def _no_query() -> None:
+    """Placeholder for a query a fetch stage decides to skip."""
+    return None
+
+
+def _rows(response) -> list[dict]:
+    return (response.data or []) if response is not None else []
+
+
+async def rebuild_event_funnel(
+    db: AsyncClient, org_id: str, event_id: str
+) -> int | None:
+    """Recalcula desde cero el funnel de un evento de la org (reconciliación
+    de los deltas). Devuelve los pares (event, journey) recalculados, o None
+    si el evento no es de la org."""
+    event = (
+        await db.schema("crm").table("org_events")
+        .select("id")
+        .eq("id", event_id)
+        .eq("organization_id", org_id)
+        .maybe_single()
+        .execute()
+    )
+    if not event or not event.data:
+        return None
+    response = await db.rpc("rebuild_event_funnel", {"p_event_id": event_id}).execute()
+    return response.data or 0
+
+
 async def list_org_tracking(db: AsyncClient, org_id: str) -> dict:
     """
     Devuelve la jerarquía Org → Eventos → Journeys con stats por (event_id, journey_id).
@@ -436,38 +698,45 @@ async def list_org_tracking(db: AsyncClient, org_id: str) -> dict:
         not_started → sin enrollment, o enrollment con status pending/dropped
     - Los enrollments con event_id NULL quedan fuera del scope jerárquico (siguen
       en `unassigned_journeys` con la lógica legacy, ahí sí scoped a miembros activos).
+
+    Los conteos por (event, journey) se leen de crm.event_journey_funnel, que
+    los triggers mantienen incrementalmente; aquí no se bajan asistentes ni
+    enrollments por evento.
+
+    Plan de fetch por etapas (cada etapa corre en paralelo, acotada por
+    gather_limited); sólo hay dependencias entre etapas:
+      1. miembros, eventos, journeys asignados a la org   (org_id)
+      2. event_journeys                                    (event_ids)
+      3. metadata + step counts (eventos ∪ sin evento), funnel por par,
+         usuarios únicos (RPC), stats sin evento (RPC)    (journey_ids)
+    El scope a miembros activos se resuelve en la DB (RPCs / count), nunca
+    con un IN de todos los user_ids de la org.
     """
-    # 0. Miembros activos de la org (para scoping y para el header del UI)
-    members_resp = (
-        await db.table("organization_members")
-        .select("user_id")
+    # --- Etapa 1 -----------------------------------------------------------
+    members_resp, events_resp, all_assigned_resp = await gather_limited(
+        db.table("organization_members")
+        .select("user_id", count="exact", head=True)
         .eq("organization_id", org_id)
         .eq("status", "active")
-        .execute()
-    )
-    member_user_ids = [row["user_id"] for row in (members_resp.data or [])]
-    total_members = len(member_user_ids)
-
-    # 1. Eventos de la org
-    events_resp = (
-        await db.schema("crm").table("org_events")
+        .execute(),
+        db.schema("crm").table("org_events")
         .select("id, name, slug, status, start_date, end_date, location")
         .eq("organization_id", org_id)
         .order("start_date", desc=True)
-        .execute()
+        .execute(),
+        db.schema("journeys").table("journey_organizations")
+        .select("journey_id")
+        .eq("organization_id", org_id)
+        .execute(),
     )
-    events = events_resp.data or []
+    total_members = members_resp.count or 0
+    events = _rows(events_resp)
     event_ids = [e["id"] for e in events]
+    all_assigned_ids = {row["journey_id"] for row in _rows(all_assigned_resp)}
 
+    # --- Etapa 2: asignaciones evento ↔ journey -----------------------------
     ej_rows: list[dict] = []
-    journey_ids: list[str] = []
-    journeys_meta: dict[str, dict] = {}
-    step_counts: dict[str, int] = {}
-    attendances_rows: list[dict] = []
-    enrollments_by_key: dict[tuple[str, str, str], str] = {}
-
     if event_ids:
-        # 2. Asignaciones evento ↔ journey
         ej_resp = (
             await db.schema("crm").table("event_journeys")
             .select("event_id, journey_id")
@@ -475,82 +744,57 @@ async def list_org_tracking(db: AsyncClient, org_id: str) -> dict:
             .execute()
         )
         ej_rows = ej_resp.data or []
-        journey_ids = list({row["journey_id"] for row in ej_rows})
+    journey_ids = list({row["journey_id"] for row in ej_rows})
 
-    if journey_ids:
-        # 3. Metadata de journeys
-        jm_resp = (
-            await db.schema("journeys").table("journeys")
-            .select("id, title, slug, category, is_active")
-            .in_("id", journey_ids)
-            .execute()
-        )
-        for j in jm_resp.data or []:
-            journeys_meta[j["id"]] = j
+    # Journeys asignados a la org pero no a ningún evento (no aparecerían en
+    # la vista jerárquica). Se cuentan scoped a miembros activos.
+    unassigned_ids = list(all_assigned_ids - set(journey_ids))
+    meta_ids = journey_ids + unassigned_ids
 
-        # 4. Conteo de steps por journey
-        steps_resp = (
-            await db.schema("journeys").table("steps")
-            .select("journey_id")
-            .in_("journey_id", journey_ids)
-            .execute()
-        )
-        for s in steps_resp.data or []:
-            step_counts[s["journey_id"]] = step_counts.get(s["journey_id"], 0) + 1
-
-        # 5. Asistentes a los eventos (la nueva base del funnel — registered/attended).
-        # Sin filtro de membresía: lo que cuenta es la asistencia, no el rol en la org.
-        att_resp = (
-            await db.schema("crm").table("event_attendances")
-            .select("event_id, user_id, status")
-            .in_("event_id", event_ids)
-            .in_("status", ["registered", "attended"])
-            .execute()
-        )
-        attendances_rows = att_resp.data or []
-
-        # 6. Enrollments existentes (sólo para clasificar el estado del funnel).
-        # Tampoco se filtra por miembros: si un asistente avanzó en el journey,
-        # cuenta independientemente de su rol actual en la org.
-        enr_resp = (
-            await db.schema("journeys").table("enrollments")
-            .select("journey_id, event_id, status, user_id")
-            .in_("journey_id", journey_ids)
-            .in_("event_id", event_ids)
-            .execute()
-        )
-        for row in enr_resp.data or []:
-            enrollments_by_key[
-                (row["event_id"], row["journey_id"], row["user_id"])
-            ] = row["status"]
+    # --- Etapa 3 -----------------------------------------------------------
+    tracked_event_ids = list({row["event_id"] for row in ej_rows})
+    meta_resp, steps_resp, funnel_resp, unique_resp, ue_resp = await gather_limited(
+        db.schema("journeys").table("journeys")
+        .select("id, title, slug, category, is_active")
+        .in_("id", meta_ids)
+        .execute() if meta_ids else _no_query(),
+        db.schema("journeys").table("step_counters")
+        .select("journey_id, total_steps")
+        .in_("journey_id", meta_ids)
+        .execute() if meta_ids else _no_query(),
+        db.schema("crm").table("event_journey_funnel")
+        .select("event_id, journey_id, total, active, completed, not_started")
+        .in_("event_id", tracked_event_ids)
+        .execute() if tracked_event_ids else _no_query(),
+        db.rpc(
+            "count_org_tracking_unique_users",
+            {
+                "p_organization_id": org_id,
+                "p_event_ids": tracked_event_ids,
+                "p_unassigned_journey_ids": unassigned_ids,
+            },
+        ).execute() if tracked_event_ids or unassigned_ids else _no_query(),
+        # Journeys sin evento: conteos scoped a miembros activos (misma RPC
+        # que list_journeys_admin).
+        db.rpc(
+            "get_journey_admin_stats",
+            {"p_organization_id": org_id, "p_journey_ids": unassigned_ids},
+        ).execute() if unassigned_ids else _no_query(),
+    )
+
+    journeys_meta = {j["id"]: j for j in _rows(meta_resp)}
+    step_counts = {s["journey_id"]: s["total_steps"] for s in _rows(steps_resp)}
 
     # Mapa evento → journeys asignadas
     event_journey_map: dict[str, list[str]] = {}
     for row in ej_rows:
         event_journey_map.setdefault(row["event_id"], []).append(row["journey_id"])
 
-    # Mapa evento → asistentes (set de user_ids)
-    attendees_by_event: dict[str, set[str]] = {}
-    for row in attendances_rows:
-        attendees_by_event.setdefault(row["event_id"], set()).add(row["user_id"])
-
-    # Bucket de stats por (event_id, journey_id) — se construye desde asistentes × journeys
-    stats: dict[tuple[str, str], dict[str, int]] = {}
-    for ev_id, j_ids_in_event in event_journey_map.items():
-        event_attendees = attendees_by_event.get(ev_id, set())
-        for j_id in j_ids_in_event:
-            bucket = {"total": 0, "active": 0, "completed": 0, "not_started": 0}
-            for user_id in event_attendees:
-                bucket["total"] += 1
-                enr_status = enrollments_by_key.get((ev_id, j_id, user_id))
-                if enr_status == "completed":
-                    bucket["completed"] += 1
-                elif enr_status == "active":
-                    bucket["active"] += 1
-                else:
-                    # Sin enrollment, o pending/dropped → no iniciado
-                    bucket["not_started"] += 1
-            stats[(ev_id, j_id)] = bucket
+    # (event_id, journey_id) → conteos del funnel
+    # (sin enrollment, o pending/dropped → no iniciado)
+    stats: dict[tuple[str, str], dict] = {
+        (row["event_id"], row["journey_id"]): row for row in _rows(funnel_resp)
+    }
 
     # Ensamblar respuesta
     out_events: list[dict] = []
@@ -592,92 +836,43 @@ async def list_org_tracking(db: AsyncClient, org_id: str) -> dict:
             "journeys": tracked_journeys,
         })
 
-    # 6. Journeys asignados a la org pero no a ningún evento (no aparecerían en
-    # la vista jerárquica). Se cuentan también scoped a miembros activos.
-    all_assigned_resp = (
-        await db.schema("journeys").table("journey_organizations")
-        .select("journey_id")
-        .eq("organization_id", org_id)
-        .execute()
-    )
-    all_assigned_ids = {row["journey_id"] for row in (all_assigned_resp.data or [])}
-    unassigned_ids = list(all_assigned_ids - set(journey_ids))
+    # Journeys sin evento: lógica legacy (cuento enrollments reales)
+    unassigned_stats = {row["journey_id"]: row for row in _rows(ue_resp)}
 
     unassigned_journeys: list[dict] = []
-    unassigned_enrollments_rows: list[dict] = []
-    if unassigned_ids:
-        um_resp = (
-            await db.schema("journeys").table("journeys")
-            .select("id, title, slug, category, is_active")
-            .in_("id", unassigned_ids)
-            .execute()
-        )
-        us_resp = (
-            await db.schema("journeys").table("steps")
-            .select("journey_id")
-            .in_("journey_id", unassigned_ids)
-            .execute()
-        )
-        if member_user_ids:
-            ue_resp = (
-                await db.schema("journeys").table("enrollments")
-                .select("journey_id, status, user_id")
-                .in_("journey_id", unassigned_ids)
-                .in_("user_id", member_user_ids)
-                .execute()
-            )
-            unassigned_enrollments_rows = ue_resp.data or []
-
-        u_step_counts: dict[str, int] = {}
-        for s in us_resp.data or []:
-            u_step_counts[s["journey_id"]] = u_step_counts.get(s["journey_id"], 0) + 1
-
-        u_stats: dict[str, dict[str, int]] = {}
-        for row in unassigned_enrollments_rows:
-            b = u_stats.setdefault(
-                row["journey_id"], {"total": 0, "active": 0, "completed": 0}
-            )
-            b["total"] += 1
-            if row["status"] == "active":
-                b["active"] += 1
-            elif row["status"] == "completed":
-                b["completed"] += 1
-
-        for j in um_resp.data or []:
-            b = u_stats.get(j["id"], {"total": 0, "active": 0, "completed": 0})
-            t = b["total"]
-            unassigned_journeys.append({
-                "id": j["id"],
-                "title": j["title"],
-                "slug": j["slug"],
-                "category": j.get("category"),
-                "is_active": j.get("is_active", False),
-                "total_steps": u_step_counts.get(j["id"], 0),
-                "total_enrollments": t,
-                "active_enrollments": b["active"],
-                "completed_enrollments": b["completed"],
-                # Lógica legacy (no hay evento que sirva de base, así que not_started=0).
-                "not_started_enrollments": 0,
-                "completion_rate": round(b["completed"] / t, 4) if t > 0 else 0.0,
-            })
+    for j_id in unassigned_ids:
+        j = journeys_meta.get(j_id)
+        if not j:
+            continue
+        u_stats = unassigned_stats.get(j_id, {})
+        t = u_stats.get("total_enrollments", 0)
+        completed = u_stats.get("completed_enrollments", 0)
+        unassigned_journeys.append({
+            "id": j["id"],
+            "title": j["title"],
+            "slug": j["slug"],
+            "category": j.get("category"),
+            "is_active": j.get("is_active", False),
+            "total_steps": step_counts.get(j_id, 0),
+            "total_enrollments": t,
+            "active_enrollments": u_stats.get("active_enrollments", 0),
+            "completed_enrollments": completed,
+            # Lógica legacy (no hay evento que sirva de base, así que not_started=0).
+            "not_started_enrollments": 0,
+            "completion_rate": round(completed / t, 4) if t > 0 else 0.0,
+        })
 
-    # 7. Totales agregados — base = asistentes únicos en eventos con journeys
-    unique_users: set[str] = set()
-    total_potential = 0
-    for ev_id, j_list in event_journey_map.items():
-        ev_attendees = attendees_by_event.get(ev_id, set())
-        unique_users.update(ev_attendees)
-        total_potential += len(ev_attendees) * len(j_list)
-    # unassigned: cae a la lógica legacy (cuento enrollments reales)
-    for row in unassigned_enrollments_rows:
-        unique_users.add(row["user_id"])
+    # Totales agregados — base = asistentes únicos en eventos con journeys
+    # (+ enrollments legacy de journeys sin evento), contados en la DB.
+    unique_users = (unique_resp.data or 0) if unique_resp is not None else 0
+    total_potential = sum(row["total"] for row in stats.values())
 
     return {
         "organization_id": org_id,
         "events": out_events,
         "total_members": total_members,
         # Mismo nombre, nueva semántica: asistentes únicos a eventos con journeys.
-        "total_unique_enrolled_users": len(unique_users),
+        "total_unique_enrolled_users": unique_users,
         # Mismo nombre, nueva semántica: asignaciones potenciales (asistentes × journeys/evento).
         "total_enrollments": total_potential,
         "unassigned_journeys": unassigned_journeys,
@@ -685,6 +880,7 @@ async def list_org_tracking(db: AsyncClient, org_id: str) -> dict:
 
 
 async def publish_journey(db: AsyncClient, journey_id: UUID) -> dict:
+    """Activa el journey y renderiza su snapshot publicado."""
     response = (
         await db.schema("journeys").table("journeys")
         .update({"is_active": True})
@@ -692,9 +888,9 @@ async def publish_journey(db: AsyncClient, journey_id: UUID) -> dict:
         .execute()
     )
     result = response.data[0] if response.data else {}
-    cache_delete(f"journey:{journey_id}")
+    await refresh_journey_snapshot(db, journey_id)
     if result.get("organization_id"):
-        cache_delete(f"org_journeys:{result['organization_id']}")
+        invalidate_org_journeys_list(result["organization_id"])
     return result
 
 
@@ -706,12 +902,119 @@ async def archive_journey(db: AsyncClient, journey_id: UUID) -> dict:
         .execute()
     )
     result = response.data[0] if response.data else {}
-    cache_delete(f"journey:{journey_id}")
+    await refresh_journey_snapshot(db, journey_id)
     if result.get("organization_id"):
-        cache_delete(f"org_journeys:{result['organization_id']}")
+        invalidate_org_journeys_list(result["organization_id"])
     return result
 
 
+# ---------------------------------------------------------------------------
+# Enrollees (drilldown del tracking)
+# ---------------------------------------------------------------------------
+_ENROLLEE_ENROLLMENT_FIELDS = (
+    "id, user_id, journey_id, status, current_step_index, "
+    "progress_percentage, started_at, completed_at"
+)
+_ENROLLEE_CONTACT_FIELDS = (
+    "user_id, first_name, last_name, phone, company, "
+    "country, state, city, birth_date, gender, "
+    "education_level, occupation"
+)
+_FUNNEL_RANK = {"completed": 0, "active": 1, "not_started": 2}
+
+
+async def _fetch_event_attendees(db: AsyncClient, event_id: str) -> list[dict]:
+    """Base del funnel: asistentes del evento con status registered/attended."""
+    att_resp = (
+        await db.schema("crm").table("event_attendances")
+        .select("user_id, registered_at")
+        .eq("event_id", event_id)
+        .in_("status", ["registered", "attended"])
+        .execute()
+    )
+    return att_resp.data or []
+
+
+async def _fetch_enrollee_details(
+    db: AsyncClient, user_ids: list[str]
+) -> tuple[dict[str, dict], dict[str, dict]]:
+    """Profiles y CRM contacts de los user_ids, en paralelo y por chunks."""
+    if not user_ids:
+        return {}, {}
+    profiles_resp, crm_resp = await gather_limited(
+        fetch_in_chunks(
+            lambda chunk: db.table("profiles")
+            .select("id, full_name, email")
+            .in_("id", chunk)
+            .execute(),
+            user_ids,
+        ),
+        fetch_in_chunks(
+            lambda chunk: db.schema("crm").table("contacts")
+            .select(_ENROLLEE_CONTACT_FIELDS)
+            .in_("user_id", chunk)
+            .execute(),
+            user_ids,
+        ),
+    )
+    return (
+        {p["id"]: p for p in _rows(profiles_resp)},
+        {c["user_id"]: c for c in _rows(crm_resp)},
+    )
+
+
+def _enrollee_row(
+    user_id: str,
+    enrollment: dict | None,
+    registered_at: str | None,
+    profile: dict,
+    contact: dict,
+) -> dict:
+    """Fila de enrollee (profile + CRM + estado del funnel) para un journey."""
+    if enrollment is None:
+        funnel_status = "not_started"
+        enrollment_id = None
+        progress = 0.0
+        current_step = 0
+        started_at = registered_at
+        completed_at = None
+    else:
+        raw = enrollment.get("status")
+        funnel_status = (
+            "completed" if raw == "completed"
+            else "active" if raw == "active"
+            else "not_started"
+        )
+        enrollment_id = enrollment["id"]
+        progress = enrollment.get("progress_percentage") or 0.0
+        current_step = enrollment.get("current_step_index") or 0
+        started_at = enrollment.get("started_at")
+        completed_at = enrollment.get("completed_at")
+
+    return {
+        "user_id": user_id,
+        "enrollment_id": enrollment_id,
+        "full_name": profile.get("full_name"),
+        "email": profile.get("email"),
+        "status": funnel_status,
+        "progress_percentage": progress,
+        "current_step_index": current_step,
+        "started_at": started_at,
+        "completed_at": completed_at,
+        "first_name": contact.get("first_name"),
+        "last_name": contact.get("last_name"),
+        "phone": contact.get("phone"),
+        "company": contact.get("company"),
+        "country": contact.get("country"),
+        "state": contact.get("state"),
+        "city": contact.get("city"),
+        "birth_date": contact.get("birth_date"),
+        "gender": contact.get("gender"),
+        "education_level": contact.get("education_level"),
+        "occupation": contact.get("occupation"),
+    }
+
+
 async def list_journey_enrollees(
     db: AsyncClient,
     org_id: str,
@@ -741,14 +1044,7 @@ async def list_journey_enrollees(
 
     if event_id is not None:
         # 2a. Caso event_id presente: base = todos los asistentes del evento
-        att_resp = (
-            await db.schema("crm").table("event_attendances")
-            .select("user_id, registered_at")
-            .eq("event_id", event_id)
-            .in_("status", ["registered", "attended"])
-            .execute()
-        )
-        attendees = att_resp.data or []
+        attendees = await _fetch_event_attendees(db, event_id)
         if not attendees:
             return []
 
@@ -756,16 +1052,14 @@ async def list_journey_enrollees(
         registered_at_by_user = {a["user_id"]: a["registered_at"] for a in attendees}
 
         # Enrollments existentes para esos usuarios en (journey, event)
-        enr_resp = (
-            await db.schema("journeys").table("enrollments")
-            .select(
-                "id, user_id, status, current_step_index, "
-                "progress_percentage, started_at, completed_at"
-            )
+        enr_resp = await fetch_in_chunks(
+            lambda chunk: db.schema("journeys").table("enrollments")
+            .select(_ENROLLEE_ENROLLMENT_FIELDS)
             .eq("journey_id", journey_id)
             .eq("event_id", event_id)
-            .in_("user_id", user_ids)
-            .execute()
+            .in_("user_id", chunk)
+            .execute(),
+            user_ids,
         )
         enrollments_by_user = {e["user_id"]: e for e in (enr_resp.data or [])}
     else:
@@ -782,15 +1076,13 @@ async def list_journey_enrollees(
         if not member_user_ids:
             return []
 
-        enr_resp = (
-            await db.schema("journeys").table("enrollments")
-            .select(
-                "id, user_id, status, current_step_index, "
-                "progress_percentage, started_at, completed_at"
-            )
+        enr_resp = await fetch_in_chunks(
+            lambda chunk: db.schema("journeys").table("enrollments")
+            .select(_ENROLLEE_ENROLLMENT_FIELDS)
             .eq("journey_id", journey_id)
-            .in_("user_id", member_user_ids)
-            .execute()
+            .in_("user_id", chunk)
+            .execute(),
+            member_user_ids,
         )
         rows = enr_resp.data or []
         if not rows:
@@ -798,89 +1090,133 @@ async def list_journey_enrollees(
         user_ids = [e["user_id"] for e in rows]
         enrollments_by_user = {e["user_id"]: e for e in rows}
 
-    # 3. Profiles para los user_ids resultantes
-    profiles_resp = (
-        await db.table("profiles")
-        .select("id, full_name, email")
-        .in_("id", user_ids)
-        .execute()
-    )
-    profiles_by_id = {p["id"]: p for p in (profiles_resp.data or [])}
-
-    # 3b. CRM contacts para datos enriquecidos
-    contacts_by_id: dict[str, dict] = {}
-    if user_ids:
-        crm_resp = (
-            await db.schema("crm").table("contacts")
-            .select(
-                "user_id, first_name, last_name, phone, company, "
-                "country, state, city, birth_date, gender, "
-                "education_level, occupation"
-            )
-            .in_("user_id", user_ids)
-            .execute()
-        )
-        contacts_by_id = {c["user_id"]: c for c in (crm_resp.data or [])}
+    # 3. Profiles + CRM contacts para los user_ids resultantes
+    profiles_by_id, contacts_by_id = await _fetch_enrollee_details(db, user_ids)
 
     # 4. Merge: por cada user, computar funnel state
     out: list[dict] = []
     for user_id in user_ids:
-        e = enrollments_by_user.get(user_id)
-        p = profiles_by_id.get(user_id, {})
-
-        if e is None:
-            funnel_status = "not_started"
-            enrollment_id = None
-            progress = 0.0
-            current_step = 0
-            started_at = registered_at_by_user.get(user_id)
-            completed_at = None
-        else:
-            raw = e.get("status")
-            funnel_status = (
-                "completed" if raw == "completed"
-                else "active" if raw == "active"
-                else "not_started"
+        row = _enrollee_row(
+            user_id,
+            enrollments_by_user.get(user_id),
+            registered_at_by_user.get(user_id),
+            profiles_by_id.get(user_id, {}),
+            contacts_by_id.get(user_id, {}),
+        )
+        if status is not None and row["status"] != status:
+            continue
+        out.append(row)
+
+    # Sort: completed > active > not_started; dentro del bucket por progress desc
+    out.sort(
+        key=lambda r: (
+            _FUNNEL_RANK.get(r["status"], 3), -(r["progress_percentage"] or 0.0)
+        )
+    )
+    return out
+
+
+_EVENT_STATUS_LABELS = {
+    "completed": "Completado",
+    "active": "En progreso",
+    "not_started": "No iniciado",
+}
+
+
+def _merge_event_enrollees(
+    user_ids: list[str],
+    registered_at_by_user: dict[str, str],
+    event_journey_ids: list[str],
+    title_by_id: dict[str, str],
+    enrollment_by_key: dict[tuple[str, str], dict],
+    profiles_by_id: dict[str, dict],
+    contacts_by_id: dict[str, dict],
+    status: str | None,
+) -> list[tuple[tuple[int, int], dict]]:
+    """Una fila por usuario con los valores por journey concatenados.
+
+    Devuelve (sort_key, row); sort_key = (mejor status, -mejor progreso).
+    """
+    status_label = _EVENT_STATUS_LABELS.get(status, status) if status else None
+    out: list[tuple[tuple[int, int], dict]] = []
+
+    for uid in dict.fromkeys(user_ids):
+        profile = profiles_by_id.get(uid, {})
+        contact = contacts_by_id.get(uid, {})
+        titles: list[str] = []
+        statuses: list[str] = []
+        progresses: list[int] = []
+        started_list: list[str] = []
+        completed_list: list[str] = []
+        best_rank = 3
+
+        for jid in event_journey_ids:
+            row = _enrollee_row(
+                uid,
+                enrollment_by_key.get((jid, uid)),
+                registered_at_by_user.get(uid),
+                profile,
+                contact,
             )
-            enrollment_id = e["id"]
-            progress = e.get("progress_percentage") or 0.0
-            current_step = e.get("current_step_index") or 0
-            started_at = e.get("started_at")
-            completed_at = e.get("completed_at")
+            st = row["status"]
+            titles.append(title_by_id.get(jid, ""))
+            statuses.append(_EVENT_STATUS_LABELS.get(st, st))
+            progresses.append(int(row["progress_percentage"] or 0))
+            started_list.append((row["started_at"] or "")[:10])
+            completed_list.append((row["completed_at"] or "")[:10])
+            best_rank = min(best_rank, _FUNNEL_RANK.get(st, 3))
 
-        if status is not None and funnel_status != status:
+        # Filtro por status si se pidió
+        if status_label and status_label not in statuses:
             continue
 
-        c = contacts_by_id.get(user_id, {})
-        out.append({
-            "user_id": user_id,
-            "enrollment_id": enrollment_id,
-            "full_name": p.get("full_name"),
-            "email": p.get("email"),
-            "status": funnel_status,
-            "progress_percentage": progress,
-            "current_step_index": current_step,
-            "started_at": started_at,
-            "completed_at": completed_at,
-            "first_name": c.get("first_name"),
-            "last_name": c.get("last_name"),
-            "phone": c.get("phone"),
-            "company": c.get("company"),
-            "country": c.get("country"),
-            "state": c.get("state"),
-            "city": c.get("city"),
-            "birth_date": c.get("birth_date"),
-            "gender": c.get("gender"),
-            "education_level": c.get("education_level"),
-            "occupation": c.get("occupation"),
-        })
+        out.append(((best_rank, -max(progresses)), {
+            "user_id": uid,
+            "full_name": profile.get("full_name"),
+            "email": profile.get("email"),
+            "first_name": contact.get("first_name"),
+            "last_name": contact.get("last_name"),
+            "phone": contact.get("phone"),
+            "company": contact.get("company"),
+            "country": contact.get("country"),
+            "state": contact.get("state"),
+            "city": contact.get("city"),
+            "birth_date": contact.get("birth_date"),
+            "gender": contact.get("gender"),
+            "education_level": contact.get("education_level"),
+            "occupation": contact.get("occupation"),
+            "journeys": ", ".join(dict.fromkeys(titles)),
+            "status": ", ".join(statuses),
+            "progress_percentage": ", ".join(str(p) for p in progresses),
+            "started_at": ", ".join(s or "-" for s in started_list),
+            "completed_at": ", ".join(s or "-" for s in completed_list),
+        }))
 
-    # Sort: completed > active > not_started; dentro del bucket por progress desc
-    rank = {"completed": 0, "active": 1, "not_started": 2}
-    out.sort(key=lambda r: (rank.get(r["status"], 3), -(r["progress_percentage"] or 0.0)))
     return out
 
 
+async def _event_journeys_for_org(
+    db: AsyncClient, org_id: str, event_id: str
+) -> list[str]:
+    """Journeys asignados al evento Y a la org, en el orden de event_journeys."""
+    jo_resp, ev_resp = await gather_limited(
+        db.schema("journeys").table("journey_organizations")
+        .select("journey_id")
+        .eq("organization_id", org_id)
+        .execute(),
+        db.schema("crm").table("event_journeys")
+        .select("journey_id")
+        .eq("event_id", event_id)
+        .execute(),
+    )
+    org_journey_ids = {r["journey_id"] for r in _rows(jo_resp)}
+    return [
+        r["journey_id"]
+        for r in _rows(ev_resp)
+        if r["journey_id"] in org_journey_ids
+    ]
+
+
 async def list_event_enrollees(
     db: AsyncClient,
     org_id: str,
@@ -892,119 +1228,214 @@ async def list_event_enrollees(
     Un usuario en múltiples journeys → 1 fila con journeys concatenados
     y el mejor status/progreso. Compatible con gestores de campañas
     (Brevo, Mailchimp) que requieren 1 fila por contacto.
+
+    Asistentes, profiles y contacts se piden una sola vez para el evento y
+    los enrollments de todos sus journeys en una sola query; el merge por
+    usuario se hace en una pasada.
     """
-    # 1. Journeys asignados al evento Y a la org
-    jo_resp = (
-        await db.schema("journeys").table("journey_organizations")
-        .select("journey_id")
-        .eq("organization_id", org_id)
-        .execute()
+    # 1. Journeys asignados al evento Y a la org (+ asistentes, en paralelo)
+    event_journey_ids, attendees = await gather_limited(
+        _event_journeys_for_org(db, org_id, event_id),
+        _fetch_event_attendees(db, event_id),
     )
-    org_journey_ids = {r["journey_id"] for r in (jo_resp.data or [])}
+    if not event_journey_ids or not attendees:
+        return []
 
-    ev_resp = (
-        await db.schema("crm").table("event_journeys")
-        .select("journey_id")
+    user_ids = [a["user_id"] for a in attendees]
+    registered_at_by_user = {a["user_id"]: a["registered_at"] for a in attendees}
+
+    # 2. Títulos + enrollments de todos los journeys + profiles/contacts
+    j_resp, enr_resp, (profiles_by_id, contacts_by_id) = await gather_limited(
+        db.schema("journeys").table("journeys")
+        .select("id, title")
+        .in_("id", event_journey_ids)
+        .execute(),
+        db.schema("journeys").table("enrollments")
+        .select(_ENROLLEE_ENROLLMENT_FIELDS)
+        .in_("journey_id", event_journey_ids)
         .eq("event_id", event_id)
-        .execute()
+        .execute(),
+        _fetch_enrollee_details(db, user_ids),
     )
-    event_journey_ids = [
-        r["journey_id"]
-        for r in (ev_resp.data or [])
-        if r["journey_id"] in org_journey_ids
-    ]
+    title_by_id = {j["id"]: j["title"] for j in _rows(j_resp)}
+    enrollment_by_key = {
+        (e["journey_id"], e["user_id"]): e for e in _rows(enr_resp)
+    }
+
+    # 3. Una pasada por usuario: fila por journey → valores concatenados
+    merged = _merge_event_enrollees(
+        user_ids,
+        registered_at_by_user,
+        event_journey_ids,
+        title_by_id,
+        enrollment_by_key,
+        profiles_by_id,
+        contacts_by_id,
+        status,
+    )
+    merged.sort(key=lambda item: item[0])
+    return [row for _, row in merged]
+
+
+# ---------------------------------------------------------------------------
+# Streaming (export CSV): páginas por keyset sobre user_id
+# ---------------------------------------------------------------------------
+_ENROLLEE_PAGE_SIZE = 200  # acota también el largo de los IN (user_id) de cada página
+
+
+async def _iter_event_attendee_pages(
+    db: AsyncClient, event_id: str, page_size: int
+) -> AsyncIterator[list[dict]]:
+    """Asistentes del evento en páginas ordenadas por user_id (keyset, sin OFFSET)."""
+    last_user_id: str | None = None
+    while True:
+        query = (
+            db.schema("crm").table("event_attendances")
+            .select("user_id, registered_at")
+            .eq("event_id", event_id)
+            .in_("status", ["registered", "attended"])
+        )
+        if last_user_id is not None:
+            query = query.gt("user_id", last_user_id)
+        page = _rows(await query.order("user_id").limit(page_size).execute())
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_user_id = page[-1]["user_id"]
+
+
+async def _iter_member_enrollment_pages(
+    db: AsyncClient, org_id: str, journey_id: str, page_size: int
+) -> AsyncIterator[list[dict]]:
+    """Modo legacy (sin evento): enrollments del journey de miembros activos,
+    paginados por user_id. El JOIN con organization_members lo resuelve
+    public.get_org_member_enrollments, así que sólo viajan filas de la org."""
+    last_user_id: str | None = None
+    while True:
+        query = db.rpc(
+            "get_org_member_enrollments",
+            {"p_organization_id": org_id, "p_journey_id": journey_id},
+        ).select(_ENROLLEE_ENROLLMENT_FIELDS)
+        if last_user_id is not None:
+            query = query.gt("user_id", last_user_id)
+        page = _rows(await query.order("user_id").limit(page_size).execute())
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_user_id = page[-1]["user_id"]
+
+
+async def iter_journey_enrollees(
+    db: AsyncClient,
+    org_id: str,
+    journey_id: str,
+    event_id: str | None = None,
+    status: str | None = None,
+    page_size: int = _ENROLLEE_PAGE_SIZE,
+) -> AsyncIterator[list[dict]]:
+    """Variante paginada de list_journey_enrollees para exports.
+
+    Misma semántica y mismas filas, pero en páginas ordenadas por user_id
+    (no por status/progreso) para que la memoria no crezca con el evento.
+    """
+    if event_id is not None:
+        async for attendees in _iter_event_attendee_pages(db, event_id, page_size):
+            user_ids = [a["user_id"] for a in attendees]
+            registered_at_by_user = {
+                a["user_id"]: a["registered_at"] for a in attendees
+            }
+            enr_resp, (profiles_by_id, contacts_by_id) = await gather_limited(
+                db.schema("journeys").table("enrollments")
+                .select(_ENROLLEE_ENROLLMENT_FIELDS)
+                .eq("journey_id", journey_id)
+                .eq("event_id", event_id)
+                .in_("user_id", user_ids)
+                .execute(),
+                _fetch_enrollee_details(db, user_ids),
+            )
+            enrollments_by_user = {e["user_id"]: e for e in _rows(enr_resp)}
+            rows = [
+                _enrollee_row(
+                    uid,
+                    enrollments_by_user.get(uid),
+                    registered_at_by_user.get(uid),
+                    profiles_by_id.get(uid, {}),
+                    contacts_by_id.get(uid, {}),
+                )
+                for uid in user_ids
+            ]
+            rows = [r for r in rows if status is None or r["status"] == status]
+            if rows:
+                yield rows
+        return
+
+    member_pages = _iter_member_enrollment_pages(db, org_id, journey_id, page_size)
+    async for enrollments in member_pages:
+        user_ids = [e["user_id"] for e in enrollments]
+        profiles_by_id, contacts_by_id = await _fetch_enrollee_details(db, user_ids)
+        rows = [
+            _enrollee_row(
+                e["user_id"],
+                e,
+                None,
+                profiles_by_id.get(e["user_id"], {}),
+                contacts_by_id.get(e["user_id"], {}),
+            )
+            for e in enrollments
+        ]
+        rows = [r for r in rows if status is None or r["status"] == status]
+        if rows:
+            yield rows
+
+
+async def iter_event_enrollees(
+    db: AsyncClient,
+    org_id: str,
+    event_id: str,
+    status: str | None = None,
+    page_size: int = _ENROLLEE_PAGE_SIZE,
+) -> AsyncIterator[list[dict]]:
+    """Variante paginada de list_event_enrollees para exports (orden por user_id)."""
+    event_journey_ids = await _event_journeys_for_org(db, org_id, event_id)
     if not event_journey_ids:
-        return []
+        return
 
-    # Títulos
     j_resp = (
         await db.schema("journeys").table("journeys")
         .select("id, title")
         .in_("id", event_journey_ids)
         .execute()
     )
-    title_by_id = {j["id"]: j["title"] for j in (j_resp.data or [])}
+    title_by_id = {j["id"]: j["title"] for j in _rows(j_resp)}
 
-    # 2. Enrollees por journey (reutiliza función existente)
-    all_rows: list[tuple[str, dict]] = []
-    for jid in event_journey_ids:
-        rows = await list_journey_enrollees(
-            db, org_id, jid, event_id=event_id, status=None,
+    async for attendees in _iter_event_attendee_pages(db, event_id, page_size):
+        user_ids = [a["user_id"] for a in attendees]
+        registered_at_by_user = {a["user_id"]: a["registered_at"] for a in attendees}
+        enr_resp, (profiles_by_id, contacts_by_id) = await gather_limited(
+            db.schema("journeys").table("enrollments")
+            .select(_ENROLLEE_ENROLLMENT_FIELDS)
+            .in_("journey_id", event_journey_ids)
+            .eq("event_id", event_id)
+            .in_("user_id", user_ids)
+            .execute(),
+            _fetch_enrollee_details(db, user_ids),
         )
-        jtitle = title_by_id.get(jid, "")
-        for r in rows:
-            all_rows.append((jtitle, r))
-
-    # 3. Agrupar por user_id: acumular datos por journey
-    status_labels = {"completed": "Completado", "active": "En progreso", "not_started": "No iniciado"}
-    user_map: dict[str, dict] = {}
-
-    for jtitle, row in all_rows:
-        uid = row["user_id"]
-        pct = int(row.get("progress_percentage") or 0)
-        st = row.get("status", "not_started")
-        started = (row.get("started_at") or "")[:10] if row.get("started_at") else ""
-        completed = (row.get("completed_at") or "")[:10] if row.get("completed_at") else ""
-
-        if uid not in user_map:
-            # Copiar datos base del usuario (profile + CRM) del primer row
-            user_map[uid] = {
-                "user_id": uid,
-                "full_name": row.get("full_name"),
-                "email": row.get("email"),
-                "first_name": row.get("first_name"),
-                "last_name": row.get("last_name"),
-                "phone": row.get("phone"),
-                "company": row.get("company"),
-                "country": row.get("country"),
-                "state": row.get("state"),
-                "city": row.get("city"),
-                "birth_date": row.get("birth_date"),
-                "gender": row.get("gender"),
-                "education_level": row.get("education_level"),
-                "occupation": row.get("occupation"),
-                # Listas para concatenar por journey
-                "_journeys": [jtitle],
-                "_statuses": [status_labels.get(st, st)],
-                "_progresses": [str(pct)],
-                "_started": [started],
-                "_completed": [completed],
-            }
-        else:
-            existing = user_map[uid]
-            existing["_journeys"].append(jtitle)
-            existing["_statuses"].append(status_labels.get(st, st))
-            existing["_progresses"].append(str(pct))
-            existing["_started"].append(started)
-            existing["_completed"].append(completed)
-
-    # 4. Formatear salida — concatenar valores por journey
-    status_rank = {"Completado": 0, "En progreso": 1, "No iniciado": 2}
-    out: list[dict] = []
-    for u in user_map.values():
-        u["journeys"] = ", ".join(dict.fromkeys(u.pop("_journeys")))
-        statuses = u.pop("_statuses")
-        progresses = u.pop("_progresses")
-        started_list = u.pop("_started")
-        completed_list = u.pop("_completed")
-
-        u["status"] = ", ".join(statuses)
-        u["progress_percentage"] = ", ".join(progresses)
-        u["started_at"] = ", ".join(s or "-" for s in started_list)
-        u["completed_at"] = ", ".join(s or "-" for s in completed_list)
-
-        # Filtro por status si se pidió
-        if status:
-            status_label = status_labels.get(status, status)
-            if status_label not in statuses:
-                continue
-
-        # Ordenar por mejor status del usuario
-        best_rank = min(status_rank.get(s, 3) for s in statuses)
-        best_pct = max(int(p) for p in progresses)
-        u["_sort"] = (best_rank, -best_pct)
-
-        out.append(u)
-
-    out.sort(key=lambda r: r.pop("_sort"))
-    return out
\ No newline at end of file
+        enrollment_by_key = {
+            (e["journey_id"], e["user_id"]): e for e in _rows(enr_resp)
+        }
+        merged = _merge_event_enrollees(
+            user_ids,
+            registered_at_by_user,
+            event_journey_ids,
+            title_by_id,
+            enrollment_by_key,
+            profiles_by_id,
+            contacts_by_id,
+            status,
+        )
+        if merged:
+            yield [row for _, row in merged]
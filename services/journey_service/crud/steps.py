@@ -1,5 +1,6 @@
 from uuid import UUID
 
+from common.database.concurrency import gather_limited
 from services.journey_service.schemas.journeys import StepCreate, StepUpdate, clean_config_for_type
 from supabase import AsyncClient
 
@@ -112,31 +113,25 @@ async def delete_step(db: AsyncClient, step_id: UUID) -> bool:
 
 
 async def list_steps(db: AsyncClient, journey_id: UUID) -> list[dict]:
-    response = (
-        await db.schema("journeys").table("steps")
+    # Steps + completions agregadas por step (GROUP BY en la DB), en paralelo
+    steps_resp, stats_resp = await gather_limited(
+        db.schema("journeys").table("steps")
         .select("*")
         .eq("journey_id", str(journey_id))
         .order("order_index")
-        .execute()
+        .execute(),
+        db.rpc(
+            "get_step_completion_stats", {"p_journey_id": str(journey_id)}
+        ).execute(),
     )
 
-    steps = response.data or []
+    steps = steps_resp.data or []
+    stats_by_step = {row["step_id"]: row for row in (stats_resp.data or [])}
 
     for step in steps:
-        completions_resp = (
-            await db.schema("journeys").table("step_completions")
-            .select("points_earned")
-            .eq("step_id", step["id"])
-            .execute()
-        )
-        completions = completions_resp.data or []
-        step["total_completions"] = len(completions)
-
-        if completions:
-            total_points = sum(c["points_earned"] for c in completions)
-            step["average_points"] = round(total_points / len(completions), 2)
-        else:
-            step["average_points"] = 0.0
+        stats = stats_by_step.get(step["id"], {})
+        step["total_completions"] = stats.get("total_completions", 0)
+        step["average_points"] = float(stats.get("average_points") or 0.0)
 
     return steps
 
@@ -146,14 +141,15 @@ async def reorder_steps(
     journey_id: UUID,
     step_orders: list[dict],
 ) -> list[dict]:
-    for item in step_orders:
-        await (
-            db.schema("journeys").table("steps")
-            .update({"order_index": item["new_index"]})
-            .eq("id", str(item["step_id"]))
-            .eq("journey_id", str(journey_id))
-            .execute()
-        )
+    # Un solo UPDATE ... FROM unnest(...) en la DB
+    await db.rpc(
+        "reorder_journey_steps",
+        {
+            "p_journey_id": str(journey_id),
+            "p_step_ids": [str(item["step_id"]) for item in step_orders],
+            "p_indexes": [item["new_index"] for item in step_orders],
+        },
+    ).execute()
 
     return await list_steps(db, journey_id)
 
@@ -0,0 +1,201 @@
+"""Compiled per-journey step schedule and the single progress evaluator.
+
+A journey's gating rules (``available_from``, ``unlock_hours_after_start``,
+``unlock_hours_after_previous``) are compiled once, when the journey is
+loaded into cache, into integer microseconds since the epoch. The payload
+travels inside the cached ``journey:{id}`` entry, so evaluating progress
+never re-parses step timestamps: only the enrollment's own ``started_at``
+and completion times are parsed, once each.
+
+Every progress view (single enrollment, step list, dashboard batch) goes
+through ``evaluate_progress`` so the unlock rules live in one place.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+
+SCHEDULE_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_ONE_US = timedelta(microseconds=1)
+_US_PER_HOUR = 3_600_000_000
+
+
+def parse_dt(value: str | datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=UTC)
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+
+
+def to_us(value: str | datetime | None) -> int | None:
+    dt = parse_dt(value)
+    return None if dt is None else (dt - _EPOCH) // _ONE_US
+
+
+def from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def _hours_us(hours: float | None) -> int | None:
+    return int(hours * _US_PER_HOUR) if hours else None
+
+
+class CompiledStep(NamedTuple):
+    step_id: str
+    title: str
+    type: str
+    order_index: int
+    available_from_us: int | None
+    after_start_us: int | None
+    after_previous_us: int | None
+
+
+class StepSchedule:
+    """Ordered, pre-parsed gating rules for every step of one journey."""
+
+    __slots__ = ("steps",)
+
+    def __init__(self, steps: tuple[CompiledStep, ...]) -> None:
+        self.steps = steps
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @classmethod
+    def compile(cls, steps: list[dict]) -> StepSchedule:
+        compiled = []
+        for step in sorted(steps, key=lambda s: s.get("order_index") or 0):
+            compiled.append(CompiledStep(
+                step_id=step["id"],
+                title=step.get("title"),
+                type=step.get("type"),
+                order_index=step.get("order_index"),
+                available_from_us=to_us(step.get("available_from")),
+                after_start_us=_hours_us(step.get("unlock_hours_after_start")),
+                after_previous_us=_hours_us(step.get("unlock_hours_after_previous")),
+            ))
+        return cls(tuple(compiled))
+
+    def to_payload(self) -> dict:
+        return {"v": SCHEDULE_VERSION, "steps": [list(s) for s in self.steps]}
+
+    @classmethod
+    def from_payload(cls, payload: dict | None) -> StepSchedule | None:
+        if not payload or payload.get("v") != SCHEDULE_VERSION:
+            return None
+        return cls(tuple(CompiledStep(*s) for s in payload.get("steps", [])))
+
+
+def schedule_for_journey(journey: dict) -> StepSchedule:
+    """Schedule stored with a (cached) journey; compiled on the fly for
+    entries written before the schedule was part of the payload."""
+    return (
+        StepSchedule.from_payload(journey.get("schedule"))
+        or StepSchedule.compile(journey.get("steps") or [])
+    )
+
+
+def _step_states(
+    schedule: StepSchedule,
+    completions: dict[str, dict],
+    enrollment_started_at: str | datetime | None,
+):
+    """Yield ``(idx, step, completion, unlock_us)`` per step; ``unlock_us`` is
+    the scheduled unlock time when a rule gates the step, else None.
+
+    Rules, in priority order for a step that is not completed:
+    1. ``available_from``: absolute date gate, bypasses linear ordering.
+    2. ``unlock_hours_after_start``: hours after the enrollment started.
+    3. ``unlock_hours_after_previous``: hours after the latest completion.
+    4. Linear: available up to ``current_step_index`` (decided by the caller).
+    """
+    started_us = to_us(enrollment_started_at)
+    prev_completed_us: int | None = None
+
+    for idx, step in enumerate(schedule.steps):
+        completion = completions.get(step.step_id)
+        unlock_us: int | None = None
+
+        if completion:
+            prev_completed_us = to_us(completion.get("completed_at"))
+        elif step.available_from_us is not None:
+            unlock_us = step.available_from_us
+        elif step.after_start_us and started_us is not None:
+            unlock_us = started_us + step.after_start_us
+        elif step.after_previous_us and idx > 0 and prev_completed_us is not None:
+            unlock_us = prev_completed_us + step.after_previous_us
+
+        yield idx, step, completion, unlock_us
+
+
+def evaluate_progress(
+    schedule: StepSchedule,
+    completions: dict[str, dict],
+    current_step_index: int,
+    enrollment_started_at: str | datetime | None,
+    now: datetime | None = None,
+) -> tuple[list[dict], int]:
+    """Per-step progress for one enrollment → (steps_progress, completed_count).
+
+    See ``_step_states`` for the unlock rules. ``available_at`` is set when a
+    step is locked by scheduling so the UI can show 'Available on [date]'.
+    """
+    now_us = to_us(now or datetime.now(UTC))
+    completed_count = 0
+    progress: list[dict] = []
+
+    for idx, step, completion, unlock_us in _step_states(
+        schedule, completions, enrollment_started_at
+    ):
+        available_at: str | None = None
+        if completion:
+            status = "completed"
+            completed_count += 1
+        elif unlock_us is None:
+            status = "available" if idx <= current_step_index else "locked"
+        elif now_us < unlock_us:
+            status = "locked"
+            available_at = from_us(unlock_us).isoformat()
+        else:
+            status = "available"
+
+        progress.append({
+            "step_id": step.step_id,
+            "title": step.title,
+            "type": step.type,
+            "order_index": step.order_index,
+            "status": status,
+            "completed_at": completion["completed_at"] if completion else None,
+            "points_earned": completion["points_earned"] if completion else 0,
+            "available_at": available_at,
+        })
+
+    return progress, completed_count
+
+
+def pending_unlocks(
+    schedule: StepSchedule,
+    completions: dict[str, dict],
+    enrollment_started_at: str | datetime | None,
+    now: datetime | None = None,
+) -> list[tuple[int, CompiledStep]]:
+    """Time-gated steps that are still locked → ``(unlock_us, step)`` pairs.
+
+    Same rules as ``evaluate_progress``; used by the unlock notifier to know
+    when to push instead of having clients poll.
+    """
+    now_us = to_us(now or datetime.now(UTC))
+    return [
+        (unlock_us, step)
+        for _, step, completion, unlock_us in _step_states(
+            schedule, completions, enrollment_started_at
+        )
+        if not completion and unlock_us is not None and unlock_us > now_us
+    ]
@@ -0,0 +1,271 @@
+"""Background notifier that pushes ``step.unlocked`` when a scheduled step opens.
+
+Steps gated by ``available_from`` / ``unlock_hours_after_start`` /
+``unlock_hours_after_previous`` only change state with the clock, so clients
+used to poll the progress endpoints. This task rescans active enrollments of
+gated journeys every ``UNLOCK_NOTIFIER_REFRESH_SECONDS``, keeps the unlocks
+falling inside the next scan window in a min-heap ordered by unlock time and
+sleeps until the earliest one, then publishes one user-targeted event per
+unlocked step.
+
+Every worker runs the loop, but only the holder of a Redis lease
+(``unlock_notifier:leader``) scans and publishes; the others just retry the
+lease every refresh. Each push is still claimed in Redis (``cache_claim_many``)
+so a lease handover never delivers an unlock twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+import uuid
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from common.cache.redis_client import (
+    cache_claim,
+    cache_claim_many,
+    cache_get,
+    cache_set,
+)
+from common.database.client import get_admin_client
+from common.database.concurrency import (
+    DEFAULT_IN_CHUNK_SIZE,
+    fetch_all_pages,
+    gather_limited,
+)
+from common.events import EventType, RealtimeEvent, publish_event
+from services.journey_service.crud.journeys import get_journeys_with_steps_many
+from services.journey_service.logic.schedule import (
+    from_us,
+    pending_unlocks,
+    schedule_for_journey,
+    to_us,
+)
+from supabase import AsyncClient
+
+logger = logging.getLogger("oasis.journeys.unlock_notifier")
+
+UNLOCK_NOTIFIER_ENABLED = (
+    os.getenv("UNLOCK_NOTIFIER_ENABLED", "true").lower() == "true"
+)
+REFRESH_SECONDS = int(os.getenv("UNLOCK_NOTIFIER_REFRESH_SECONDS", "300"))
+
+_US_PER_SECOND = 1_000_000
+_PAGE_SIZE = 500
+_GATED_STEPS_PAGE_SIZE = 1000
+_CLAIM_TTL = 86400
+_LEASE_KEY = "unlock_notifier:leader"
+
+_GATED_STEP_FILTER = (
+    "available_from.not.is.null,"
+    "unlock_hours_after_start.gt.0,"
+    "unlock_hours_after_previous.gt.0"
+)
+
+
+# ---------------------------------------------------------------------------
+# Scan
+# ---------------------------------------------------------------------------
+async def _gated_journey_ids(db: AsyncClient) -> list[str]:
+    """Journeys con algún step con gating, paginando los steps por id (keyset)."""
+    journey_ids: dict[str, None] = {}
+    last_id: str | None = None
+    while True:
+        query = (
+            db.schema("journeys").table("steps")
+            .select("id, journey_id")
+            .or_(_GATED_STEP_FILTER)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = (
+            await query.order("id").limit(_GATED_STEPS_PAGE_SIZE).execute()
+        ).data or []
+        journey_ids.update(dict.fromkeys(s["journey_id"] for s in page))
+        if len(page) < _GATED_STEPS_PAGE_SIZE:
+            return list(journey_ids)
+        last_id = page[-1]["id"]
+
+
+async def _iter_active_enrollment_pages(
+    db: AsyncClient, journey_ids: list[str]
+) -> AsyncIterator[list[dict]]:
+    """Enrollments activos de los journeys con gating, paginados por id (keyset)."""
+    last_id: str | None = None
+    while True:
+        query = (
+            db.schema("journeys").table("enrollments")
+            .select("id, user_id, journey_id, attributed_organization_id, started_at")
+            .in_("journey_id", journey_ids)
+            .eq("status", "active")
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = (await query.order("id").limit(_PAGE_SIZE).execute()).data or []
+        if not page:
+            return
+        yield page
+        if len(page) < _PAGE_SIZE:
+            return
+        last_id = page[-1]["id"]
+
+
+def _completions_query(db: AsyncClient, enrollment_ids: list[str]):
+    return (
+        db.schema("journeys").table("step_completions")
+        .select("id, enrollment_id, step_id, completed_at")
+        .in_("enrollment_id", enrollment_ids)
+    )
+
+
+class UnlockNotifier:
+    """Min-heap of upcoming unlocks: ``(unlock_us, seq, event)``."""
+
+    def __init__(self, refresh_seconds: int = REFRESH_SECONDS) -> None:
+        self.refresh_us = refresh_seconds * _US_PER_SECOND
+        self._heap: list[tuple[int, int, RealtimeEvent]] = []
+
+    async def refresh(self, db: AsyncClient, now_us: int) -> None:
+        """Rebuild the queue with every unlock due before the next rescan
+        (plus one window of slack in case a scan runs late)."""
+        horizon_us = now_us + 2 * self.refresh_us
+        now = from_us(now_us)
+        heap: list[tuple[int, int, RealtimeEvent]] = []
+
+        journey_ids = await _gated_journey_ids(db)
+        # Un chunk de journeys por vez: el IN de la paginación queda acotado.
+        for i in range(0, len(journey_ids), DEFAULT_IN_CHUNK_SIZE):
+            chunk = journey_ids[i:i + DEFAULT_IN_CHUNK_SIZE]
+            journeys = await get_journeys_with_steps_many(db, chunk)
+            async for enrollments in _iter_active_enrollment_pages(db, chunk):
+                # Paginado: cientos de enrollments × N completions superan el
+                # max-rows de PostgREST, y una completion perdida sería un push
+                # falso (o un unlock_hours_after_previous mal calculado).
+                ids = [e["id"] for e in enrollments]
+                pages = await gather_limited(*(
+                    fetch_all_pages(
+                        lambda chunk=ids[j:j + DEFAULT_IN_CHUNK_SIZE]:
+                        _completions_query(db, chunk)
+                    )
+                    for j in range(0, len(ids), DEFAULT_IN_CHUNK_SIZE)
+                ))
+                by_enrollment: dict[str, dict[str, dict]] = {}
+                for c in (c for page in pages for c in page):
+                    by_enrollment.setdefault(c["enrollment_id"], {})[c["step_id"]] = c
+
+                for e in enrollments:
+                    journey = journeys.get(e["journey_id"])
+                    if not journey:
+                        continue
+                    for unlock_us, step in pending_unlocks(
+                        schedule_for_journey(journey),
+                        by_enrollment.get(e["id"], {}),
+                        e.get("started_at"),
+                        now,
+                    ):
+                        if unlock_us > horizon_us:
+                            continue
+                        heap.append((unlock_us, len(heap), RealtimeEvent(
+                            type=EventType.STEP_UNLOCKED,
+                            payload={
+                                "enrollment_id": e["id"],
+                                "journey_id": e["journey_id"],
+                                "step_id": step.step_id,
+                                "title": step.title,
+                                "available_at": from_us(unlock_us).isoformat(),
+                            },
+                            org_id=e.get("attributed_organization_id")
+                            or journey.get("organization_id"),
+                            user_id=e["user_id"],
+                        )))
+
+        heapq.heapify(heap)
+        self._heap = heap
+        logger.info("Unlock queue rebuilt: %d pending", len(heap))
+
+    async def publish_due(self, now_us: int) -> int:
+        due: list[tuple[int, RealtimeEvent]] = []
+        while self._heap and self._heap[0][0] <= now_us:
+            unlock_us, _, event = heapq.heappop(self._heap)
+            due.append((unlock_us, event))
+        if not due:
+            return 0
+
+        # Un solo round trip (pipeline) y fuera del event loop.
+        claimed = await asyncio.to_thread(
+            cache_claim_many,
+            [
+                f"unlock:{e.payload['enrollment_id']}:{e.payload['step_id']}:{us}"
+                for us, e in due
+            ],
+            _CLAIM_TTL,
+        )
+        published = 0
+        for (_, event), ok in zip(due, claimed, strict=True):
+            if ok:
+                await publish_event(event)
+                published += 1
+        return published
+
+    def clear(self) -> None:
+        self._heap = []
+
+    def next_wakeup_us(self, next_refresh_us: int) -> int:
+        return min(self._heap[0][0], next_refresh_us) if self._heap else next_refresh_us
+
+
+# ---------------------------------------------------------------------------
+# Leader lease
+# ---------------------------------------------------------------------------
+def _hold_lease(worker_id: str, ttl_seconds: int) -> bool:
+    """Take or renew the scanner lease; True if this worker holds it.
+    Sin Redis cada worker es su propio líder (single-process)."""
+    if cache_claim(_LEASE_KEY, ttl_seconds, value=worker_id):
+        return True
+    if cache_get(_LEASE_KEY) == worker_id:
+        cache_set(_LEASE_KEY, worker_id, ttl_seconds)
+        return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Lifespan task
+# ---------------------------------------------------------------------------
+async def run_unlock_notifier() -> None:
+    """Long-running background task (app lifespan). Exits cleanly on
+    asyncio.CancelledError; any other failure is logged and the loop
+    resumes after a short backoff."""
+    notifier = UnlockNotifier()
+    worker_id = uuid.uuid4().hex
+    # El lease cubre dos ventanas: un scan lento no lo pierde.
+    lease_ttl = 2 * REFRESH_SECONDS
+    is_leader = False
+    next_refresh_us = 0
+    backoff = 1.0
+
+    while True:
+        try:
+            now_us = to_us(datetime.now(UTC))
+            if now_us >= next_refresh_us:
+                is_leader = await asyncio.to_thread(_hold_lease, worker_id, lease_ttl)
+                if is_leader:
+                    await notifier.refresh(await get_admin_client(), now_us)
+                else:
+                    notifier.clear()
+                next_refresh_us = now_us + notifier.refresh_us
+            if is_leader:
+                await notifier.publish_due(now_us)
+            backoff = 1.0
+
+            wake_us = notifier.next_wakeup_us(next_refresh_us)
+            await asyncio.sleep(max(wake_us - now_us, 0) / _US_PER_SECOND)
+        except asyncio.CancelledError:
+            logger.info("Unlock notifier cancelled — shutting down")
+            return
+        except Exception:
+            logger.exception("Unlock notifier failed, retrying in %.1fs", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, float(REFRESH_SECONDS))
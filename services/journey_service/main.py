@@ -1,32 +1,25 @@
 import logging
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-from common.exceptions import OasisException, oasis_exception_handler
+from common.app_factory import create_app
 from services.journey_service.api.v1.api import api_router
 from services.journey_service.core.config import PROJECT_NAME, VERSION
+from services.journey_service.logic.unlock_notifier import (
+    UNLOCK_NOTIFIER_ENABLED,
+    run_unlock_notifier,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("journey_service")
 
-app = FastAPI(
+# Same prefix as the gateway so path-based routing can point at either.
+app = create_app(
     title=PROJECT_NAME,
     version=VERSION,
-    description="Servicio de Journeys para la plataforma OASIS (standalone dev)",
+    description="Servicio de Journeys para la plataforma OASIS",
+    background=[run_unlock_notifier] if UNLOCK_NOTIFIER_ENABLED else [],
 )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.add_exception_handler(OasisException, oasis_exception_handler)
-
-app.include_router(api_router, prefix="/api/v1")
+app.include_router(api_router, prefix="/api/v1/journeys")
 
 
 @app.get("/health")
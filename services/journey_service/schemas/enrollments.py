@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Literal, Optional
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, model_validator
 
 
 class EnrollmentCreate(BaseModel):
@@ -19,6 +19,8 @@ class EnrollmentResponse(BaseModel):
     status: str
     current_step_index: int
     progress_percentage: float
+    completed_steps: int = 0
+    total_steps: int = 0
     started_at: datetime
     completed_at: datetime | None = None
 
@@ -68,6 +70,66 @@ class UpdateEnrollmentEventRequest(BaseModel):
     event_id: UUID4 = Field(..., description="Nuevo event_id para el enrollment activo del usuario en este journey.")
 
 
+class EnrollmentBulkDeleteRequest(BaseModel):
+    enrollment_ids: list[UUID4] = Field(default_factory=list, max_length=50000)
+    event_id: UUID4 | None = Field(
+        None, description="Borrar toda la cohorte de este evento."
+    )
+    journey_id: UUID4 | None = Field(
+        None, description="Con event_id: sólo este journey."
+    )
+
+    @model_validator(mode="after")
+    def require_target(self):
+        if not self.enrollment_ids and self.event_id is None:
+            raise ValueError("Indica enrollment_ids o event_id.")
+        return self
+
+
+class EnrollmentBulkDeleteResponse(BaseModel):
+    deleted_count: int
+    deleted_ids: list[UUID4] = Field(default_factory=list)
+
+
+class BulkEnrollmentRequest(BaseModel):
+    journey_id: UUID4 | None = Field(None, description="Inscribir en este journey.")
+    event_id: UUID4 | None = Field(
+        None,
+        description=(
+            "Inscribir en todos los journeys del evento "
+            "(más membresía y asistencia)."
+        ),
+    )
+    user_ids: list[UUID4] = Field(default_factory=list, max_length=50000)
+    emails: list[str] = Field(default_factory=list, max_length=50000)
+    modality: Literal["presencial", "online", "hibrido"] = "presencial"
+
+    @model_validator(mode="after")
+    def check_target_and_users(self):
+        if (self.journey_id is None) == (self.event_id is None):
+            raise ValueError("Indica journey_id o event_id (sólo uno).")
+        if not self.user_ids and not self.emails:
+            raise ValueError("Indica user_ids o emails.")
+        if len(self.user_ids) + len(self.emails) > 50000:
+            raise ValueError("Máximo 50000 usuarios por request.")
+        return self
+
+
+class BulkEnrollmentResult(BaseModel):
+    identifier: str
+    user_id: UUID4 | None = None
+    outcome: Literal["enrolled", "already_enrolled", "not_found"]
+    journeys_enrolled: int = 0
+
+
+class BulkEnrollmentResponse(BaseModel):
+    total: int
+    enrolled: int
+    already_enrolled: int
+    not_found: int
+    results: list[BulkEnrollmentResult] = Field(default_factory=list)
+
+
 class StepCompleteRequest(BaseModel):
     metadata: dict | None = None
     external_reference: str | None = None
@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from common.exceptions import (
+    ConflictError,
+    ForbiddenError,
+    NotFoundError,
+    ValidationError,
+)
+from services.journey_service.api.v1.endpoints.enrollments import _complete_step
+from services.journey_service.crud import enrollments as crud
+
+# Parámetros de public.complete_enrollment_step (migración 20260618000001).
+RPC_PARAMS = {
+    "complete_enrollment_step": {
+        "p_enrollment_id", "p_step_id", "p_user_id", "p_metadata",
+        "p_external_reference", "p_service_data",
+    },
+}
+
+
+class FakeRPC:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    async def execute(self):
+        return SimpleNamespace(data=self.rows, count=None)
+
+
+class FakeDB:
+    """db.rpc(...).execute() with a canned reply; rejects unknown functions
+    and parameters like PostgREST does (404 / PGRST202)."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.calls: list[tuple[str, dict]] = []
+
+    def rpc(self, name: str, params: dict):
+        if name not in RPC_PARAMS:
+            raise AssertionError(f"no function {name}")
+        unknown = set(params) - RPC_PARAMS[name]
+        if unknown:
+            raise AssertionError(f"{name} has no parameter(s) {unknown}")
+        self.calls.append((name, params))
+        return FakeRPC(self.rows)
+
+
+def _run(db: FakeDB):
+    return asyncio.run(_complete_step(db, uuid4(), uuid4(), uuid4(), None))
+
+
+@pytest.mark.parametrize(
+    ("outcome", "error", "status_code"),
+    [
+        ("not_found", NotFoundError, 404),
+        ("forbidden", ForbiddenError, 403),
+        ("inactive", ConflictError, 409),
+        ("wrong_journey", ValidationError, 422),
+        ("duplicate", ConflictError, 409),
+        ("locked", ConflictError, 409),
+    ],
+)
+def test_outcome_maps_to_error(outcome, error, status_code):
+    db = FakeDB([{"outcome": outcome}])
+
+    with pytest.raises(error) as exc_info:
+        _run(db)
+
+    assert exc_info.value.status_code == status_code
+    assert [name for name, _ in db.calls] == ["complete_enrollment_step"]
+
+
+def test_ok_outcome_builds_response():
+    step_id = uuid4()
+    db = FakeDB([{
+        "outcome": "ok", "step_id": str(step_id),
+        "completed_at": "2026-07-01T12:00:00+00:00",
+        "points_earned": None, "enrollment_progress": 50.0,
+    }])
+
+    response = _run(db)
+
+    assert response.step_id == step_id
+    assert response.enrollment_progress == 50.0
+    assert response.points_earned == 0
+
+
+def test_empty_rpc_reply_falls_back_to_not_found():
+    db = FakeDB([])
+
+    result = asyncio.run(crud.complete_step_atomic(db, uuid4(), uuid4(), uuid4()))
+    assert result == {"outcome": "not_found"}
+
+    with pytest.raises(NotFoundError):
+        _run(db)
+
+
+def test_request_body_is_forwarded_to_the_rpc():
+    db = FakeDB([{"outcome": "duplicate"}])
+    enrollment_id, step_id, user_id = uuid4(), uuid4(), uuid4()
+
+    asyncio.run(crud.complete_step_atomic(
+        db, enrollment_id, step_id, user_id,
+        metadata={"source": "qr"}, external_reference="ext-1",
+    ))
+
+    _, params = db.calls[0]
+    assert params["p_enrollment_id"] == str(enrollment_id)
+    assert params["p_step_id"] == str(step_id)
+    assert params["p_user_id"] == str(user_id)
+    assert params["p_metadata"] == {"source": "qr"}
+    assert params["p_external_reference"] == "ext-1"
+    assert params["p_service_data"] is None
@@ -0,0 +1,157 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from common import idempotency
+from common.exceptions import ConflictError, ValidationError
+from services.journey_service.api.v1.endpoints import enrollments as endpoints
+from services.journey_service.schemas.enrollments import StepCompleteResponse
+
+
+class FakeCache:
+    """In-memory stand-in for the Redis helpers common.idempotency uses."""
+
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    def claim(self, key: str, ttl_seconds: int = 300, value: str = "1") -> bool:
+        if key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    def get_json(self, key: str, local_ttl: int | None = None):
+        raw = self.store.get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set_json(self, key: str, value, ttl_seconds: int = 300, **_kwargs) -> None:
+        self.store[key] = json.dumps(value)
+
+    def delete(self, key: str) -> None:
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def cache(monkeypatch) -> FakeCache:
+    fake = FakeCache()
+    monkeypatch.setattr(idempotency, "cache_claim", fake.claim)
+    monkeypatch.setattr(idempotency, "cache_get_json", fake.get_json)
+    monkeypatch.setattr(idempotency, "cache_set_json", fake.set_json)
+    monkeypatch.setattr(idempotency, "cache_delete", fake.delete)
+    return fake
+
+
+def _replay(key="k1", payload=None):
+    return idempotency.replay_idempotent(
+        key, scope="enroll", user_id="u1", payload=payload or {"journey_id": "j1"}
+    )
+
+
+def test_first_request_reserves_the_key(cache):
+    assert _replay() is None
+
+    (stored,) = cache.store.values()
+    assert json.loads(stored)["pending"] is True
+
+
+def test_retry_while_pending_is_a_conflict(cache):
+    assert _replay() is None
+
+    with pytest.raises(ConflictError) as exc_info:
+        _replay()
+    assert exc_info.value.status_code == 409
+
+
+def test_claim_lost_to_a_concurrent_request_is_a_conflict(cache, monkeypatch):
+    monkeypatch.setattr(idempotency, "cache_claim", lambda *_a, **_kw: False)
+
+    with pytest.raises(ConflictError):
+        _replay()
+
+
+def test_replays_stored_body_and_status(cache):
+    assert _replay() is None
+    idempotency.store_idempotent(
+        "k1", scope="enroll", user_id="u1", payload={"journey_id": "j1"},
+        body={"id": "e1"}, status_code=201,
+    )
+
+    response = _replay()
+
+    assert response.status_code == 201
+    assert json.loads(response.body) == {"id": "e1"}
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.parametrize("stored", [False, True])
+def test_different_payload_is_rejected(cache, stored):
+    assert _replay() is None
+    if stored:
+        idempotency.store_idempotent(
+            "k1", scope="enroll", user_id="u1", payload={"journey_id": "j1"},
+            body={"id": "e1"}, status_code=201,
+        )
+
+    with pytest.raises(ValidationError) as exc_info:
+        _replay(payload={"journey_id": "j2"})
+    assert exc_info.value.status_code == 422
+
+
+def test_release_lets_the_key_be_retried(cache):
+    assert _replay() is None
+    idempotency.release_idempotent("k1", scope="enroll", user_id="u1")
+
+    assert cache.store == {}
+    assert _replay() is None
+
+
+def test_without_key_nothing_is_cached(cache):
+    assert idempotency.replay_idempotent(None, scope="enroll", user_id="u1") is None
+    idempotency.store_idempotent(None, scope="enroll", user_id="u1", body={})
+
+    assert cache.store == {}
+
+
+def _call_complete_step(key: str):
+    # Sin el wrapper del rate limiter (necesita un Request real).
+    return asyncio.run(endpoints.complete_step.__wrapped__(
+        request=None,
+        enrollment_id=uuid4(),
+        step_id=uuid4(),
+        current_user=SimpleNamespace(id=uuid4()),
+        db=None,
+        body=None,
+        idempotency_key=key,
+    ))
+
+
+def test_endpoint_releases_the_key_on_error(cache, monkeypatch):
+    async def failing(*_args):
+        raise ConflictError("Este step ya fue completado.")
+
+    monkeypatch.setattr(endpoints, "_complete_step", failing)
+
+    with pytest.raises(ConflictError):
+        _call_complete_step("k1")
+    assert cache.store == {}
+
+
+def test_endpoint_stores_the_response_on_success(cache, monkeypatch):
+    async def succeeding(_db, _enrollment_id, step_id, *_args):
+        return StepCompleteResponse(
+            step_id=step_id, completed_at="2026-07-01T12:00:00+00:00",
+            enrollment_progress=50.0,
+        )
+
+    monkeypatch.setattr(endpoints, "_complete_step", succeeding)
+
+    _call_complete_step("k1")
+
+    (stored,) = cache.store.values()
+    stored = json.loads(stored)
+    assert "pending" not in stored
+    assert stored["status_code"] == 200
+    assert stored["body"]["enrollment_progress"] == 50.0
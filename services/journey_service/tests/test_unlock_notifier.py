@@ -0,0 +1,176 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from services.journey_service.logic import unlock_notifier
+from services.journey_service.logic.schedule import to_us
+
+# Columnas reales de journeys.enrollments (create table + migraciones).
+ENROLLMENT_COLUMNS = {
+    "id", "journey_id", "user_id", "status", "current_step_index",
+    "progress_percentage", "started_at", "completed_at", "event_id",
+    "updated_at", "attributed_organization_id", "completed_steps", "total_steps",
+}
+STEP_COLUMNS = {
+    "id", "journey_id", "title", "type", "order_index", "config",
+    "gamification_rules", "available_from", "unlock_hours_after_start",
+    "unlock_hours_after_previous", "created_at", "updated_at",
+}
+COMPLETION_COLUMNS = {
+    "id", "enrollment_id", "user_id", "journey_id", "step_id", "completed_at",
+    "points_earned", "metadata", "external_reference",
+}
+MAX_ROWS = 1000  # PostgREST max-rows
+
+TABLES = {
+    "enrollments": ENROLLMENT_COLUMNS,
+    "steps": STEP_COLUMNS,
+    "step_completions": COMPLETION_COLUMNS,
+}
+
+
+class FakeQuery:
+    """Just enough of the postgrest builder; rejects unknown columns like
+    PostgREST does (400)."""
+
+    def __init__(self, table: str, rows: list[dict]):
+        self.table, self.rows = table, rows
+
+    def select(self, columns: str):
+        unknown = {c.strip() for c in columns.split(",")} - TABLES[self.table]
+        if unknown:
+            raise AssertionError(f"{self.table} has no column(s) {unknown}")
+        return self
+
+    def or_(self, _filters: str):
+        return self
+
+    def in_(self, column: str, values: list):
+        self.rows = [r for r in self.rows if r[column] in values]
+        return self
+
+    def eq(self, column: str, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def gt(self, column: str, value):
+        self.rows = [r for r in self.rows if r[column] > value]
+        return self
+
+    def order(self, column: str):
+        self.rows = sorted(self.rows, key=lambda r: r[column])
+        return self
+
+    def limit(self, n: int):
+        self.rows = self.rows[:n]
+        return self
+
+    async def execute(self):
+        return SimpleNamespace(data=self.rows[:MAX_ROWS], count=None)
+
+
+class FakeDB:
+    def __init__(self, tables: dict[str, list[dict]]):
+        self.tables = tables
+
+    def schema(self, _name: str):
+        return self
+
+    def table(self, name: str):
+        return FakeQuery(name, list(self.tables.get(name, [])))
+
+
+@pytest.fixture
+def now() -> datetime:
+    return datetime(2026, 7, 1, 12, 0, tzinfo=UTC)
+
+
+def test_refresh_queues_unlock_for_real_enrollment_row(monkeypatch, now):
+    journey = {
+        "id": "j1",
+        "organization_id": "org-journey",
+        "steps": [
+            {"id": "s1", "title": "Intro", "type": "content", "order_index": 0},
+            {
+                "id": "s2", "title": "Día 2", "type": "content", "order_index": 1,
+                "unlock_hours_after_start": 1,
+            },
+        ],
+    }
+    started = now - timedelta(minutes=30)
+    db = FakeDB({
+        "steps": [
+            {"id": "s1", "journey_id": "j1"},
+            {"id": "s2", "journey_id": "j1"},
+        ],
+        "enrollments": [{
+            "id": "e1", "journey_id": "j1", "user_id": "u1", "status": "active",
+            "current_step_index": 0, "progress_percentage": 0.0,
+            "started_at": started.isoformat(), "completed_at": None,
+            "event_id": None, "updated_at": started.isoformat(),
+            "attributed_organization_id": "org-attr",
+            "completed_steps": 0, "total_steps": 2,
+        }],
+        "step_completions": [],
+    })
+
+    async def journeys_many(_db, ids):
+        return {jid: journey for jid in ids if jid == "j1"}
+
+    monkeypatch.setattr(unlock_notifier, "get_journeys_with_steps_many", journeys_many)
+
+    notifier = unlock_notifier.UnlockNotifier(refresh_seconds=3600)
+    asyncio.run(notifier.refresh(db, to_us(now)))
+
+    unlock_us = to_us(started + timedelta(hours=1))
+    assert notifier.next_wakeup_us(to_us(now) + notifier.refresh_us) == unlock_us
+    event = notifier._heap[0][2]
+    assert event.user_id == "u1"
+    assert event.org_id == "org-attr"
+    assert event.payload["step_id"] == "s2"
+
+
+def test_refresh_sees_every_completion_past_max_rows(monkeypatch, now):
+    """300 enrollments × 6 completions > max-rows: none may be dropped, or
+    completed steps would be pushed as unlocked."""
+    steps = [
+        {
+            "id": f"s{k}", "title": f"Step {k}", "type": "content",
+            "order_index": k, "unlock_hours_after_start": 1,
+        }
+        for k in range(6)
+    ]
+    journey = {"id": "j1", "organization_id": "org", "steps": steps}
+    started = now - timedelta(minutes=30)
+    enrollments = [
+        {
+            "id": f"e{i:04}", "journey_id": "j1", "user_id": f"u{i}",
+            "status": "active", "started_at": started.isoformat(),
+            "attributed_organization_id": None,
+        }
+        for i in range(300)
+    ]
+    db = FakeDB({
+        "steps": [{"id": s["id"], "journey_id": "j1"} for s in steps],
+        "enrollments": enrollments,
+        "step_completions": [
+            {
+                "id": f"c{i:04}{k}", "enrollment_id": f"e{i:04}",
+                "step_id": f"s{k}", "completed_at": started.isoformat(),
+            }
+            for i in range(300)
+            for k in range(6)
+        ],
+    })
+
+    async def journeys_many(_db, ids):
+        return {"j1": journey}
+
+    monkeypatch.setattr(unlock_notifier, "get_journeys_with_steps_many", journeys_many)
+
+    notifier = unlock_notifier.UnlockNotifier(refresh_seconds=3600)
+    asyncio.run(notifier.refresh(db, to_us(now)))
+
+    assert notifier._heap == []
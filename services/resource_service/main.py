@@ -0,0 +1,21 @@
+import logging
+
+from common.app_factory import create_app
+from services.resource_service.api.v1.router import router
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("resource_service")
+
+# Publishes realtime events but reads no L1-cached data: no subscriber.
+app = create_app(
+    title="OASIS Resource Service",
+    description="Servicio de Recursos para la plataforma OASIS",
+    subscriber=False,
+)
+
+app.include_router(router, prefix="/api/v1/resources", tags=["Resources"])
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "service": "resource-service"}
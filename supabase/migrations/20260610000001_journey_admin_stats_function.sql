@@ -0,0 +1,54 @@
+-- Migration: Batched journey stats for the admin journey list
+-- Called by backend via db.rpc("get_journey_admin_stats", {...}) from
+-- list_journeys_admin. Replaces 2 PostgREST queries per journey (steps count
+-- + enrollment statuses filtered by a huge member-id IN list) with a single
+-- grouped query. Enrollment counts are scoped to ACTIVE members of the org.
+
+CREATE OR REPLACE FUNCTION public.get_journey_admin_stats(
+    p_organization_id UUID,
+    p_journey_ids     UUID[]
+)
+RETURNS TABLE (
+    journey_id            TEXT,
+    total_steps           BIGINT,
+    total_enrollments     BIGINT,
+    active_enrollments    BIGINT,
+    completed_enrollments BIGINT
+)
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+    WITH step_counts AS (
+        SELECT s.journey_id, COUNT(*) AS total_steps
+        FROM journeys.steps s
+        WHERE s.journey_id = ANY(p_journey_ids)
+        GROUP BY s.journey_id
+    ),
+    enrollment_counts AS (
+        SELECT
+            e.journey_id,
+            COUNT(*)                                      AS total_enrollments,
+            COUNT(*) FILTER (WHERE e.status = 'active')    AS active_enrollments,
+            COUNT(*) FILTER (WHERE e.status = 'completed') AS completed_enrollments
+        FROM journeys.enrollments e
+        JOIN public.organization_members om
+          ON om.user_id = e.user_id
+         AND om.organization_id = p_organization_id
+         AND om.status = 'active'
+        WHERE e.journey_id = ANY(p_journey_ids)
+        GROUP BY e.journey_id
+    )
+    SELECT
+        j.id::TEXT,
+        COALESCE(sc.total_steps, 0),
+        COALESCE(ec.total_enrollments, 0),
+        COALESCE(ec.active_enrollments, 0),
+        COALESCE(ec.completed_enrollments, 0)
+    FROM unnest(p_journey_ids) AS j(id)
+    LEFT JOIN step_counts sc ON sc.journey_id = j.id
+    LEFT JOIN enrollment_counts ec ON ec.journey_id = j.id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_journey_admin_stats(UUID, UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_journey_admin_stats(UUID, UUID[]) TO service_role;
+
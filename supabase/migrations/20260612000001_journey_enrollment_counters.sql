@@ -0,0 +1,222 @@
+-- =============================================================================
+-- MIGRATION: Materialized journey counters (enrollments por status + steps)
+-- =============================================================================
+-- get_journey_admin descargaba todos los status de enrollments de un journey
+-- para contarlos en Python. Estos contadores se mantienen incrementalmente por
+-- triggers y convierten la lectura admin en un lookup O(1).
+--
+--   journeys.enrollment_counters  (journey_id, organization_id, status) → total
+--   journeys.step_counters        journey_id → total_steps
+--
+-- organization_id del contador = org del evento de la inscripción
+-- (crm.org_events) o, si no hay evento, la org propietaria del journey.
+-- Se denormaliza en enrollments.attributed_organization_id (llenado por
+-- trigger) para que decrementar la clave vieja sea exacto aunque el evento
+-- se borre (event_id → NULL por ON DELETE SET NULL) y se re-atribuye si el
+-- journey o el evento cambian de organización.
+--
+-- Los decrementos son sólo UPDATE (nunca INSERT) para no chocar con la FK
+-- cuando un journey se borra en cascada.
+-- =============================================================================
+
+-- 1. COLUMNA DENORMALIZADA
+-- =============================================================================
+ALTER TABLE journeys.enrollments
+    ADD COLUMN IF NOT EXISTS attributed_organization_id UUID;
+
+CREATE OR REPLACE FUNCTION journeys.set_enrollment_attributed_org()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.attributed_organization_id := NULL;
+
+    IF NEW.event_id IS NOT NULL THEN
+        SELECT oe.organization_id INTO NEW.attributed_organization_id
+        FROM crm.org_events oe
+        WHERE oe.id = NEW.event_id;
+    END IF;
+
+    IF NEW.attributed_organization_id IS NULL THEN
+        SELECT j.organization_id INTO NEW.attributed_organization_id
+        FROM journeys.journeys j
+        WHERE j.id = NEW.journey_id;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_enrollment_attributed_org ON journeys.enrollments;
+CREATE TRIGGER trg_enrollment_attributed_org
+    BEFORE INSERT OR UPDATE OF event_id, journey_id ON journeys.enrollments
+    FOR EACH ROW EXECUTE FUNCTION journeys.set_enrollment_attributed_org();
+
+-- Re-atribución cuando cambia el dueño: si un journey o un evento cambia de
+-- organization_id, los enrollments afectados se re-atribuyen (y el trigger
+-- de contadores mueve sus totales de la clave vieja a la nueva).
+CREATE OR REPLACE FUNCTION journeys.reattribute_enrollments_on_journey_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE journeys.enrollments e
+    SET attributed_organization_id = NEW.organization_id
+    WHERE e.journey_id = NEW.id
+      AND NOT EXISTS (
+          SELECT 1 FROM crm.org_events oe
+          WHERE oe.id = e.event_id AND oe.organization_id IS NOT NULL
+      )
+      AND e.attributed_organization_id IS DISTINCT FROM NEW.organization_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_reattribute_enrollments_journey_owner ON journeys.journeys;
+CREATE TRIGGER trg_reattribute_enrollments_journey_owner
+    AFTER UPDATE OF organization_id ON journeys.journeys
+    FOR EACH ROW
+    WHEN (OLD.organization_id IS DISTINCT FROM NEW.organization_id)
+    EXECUTE FUNCTION journeys.reattribute_enrollments_on_journey_owner();
+
+CREATE OR REPLACE FUNCTION journeys.reattribute_enrollments_on_event_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE journeys.enrollments e
+    SET attributed_organization_id = COALESCE(NEW.organization_id, j.organization_id)
+    FROM journeys.journeys j
+    WHERE e.event_id = NEW.id
+      AND j.id = e.journey_id
+      AND e.attributed_organization_id
+          IS DISTINCT FROM COALESCE(NEW.organization_id, j.organization_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_reattribute_enrollments_event_owner ON crm.org_events;
+CREATE TRIGGER trg_reattribute_enrollments_event_owner
+    AFTER UPDATE OF organization_id ON crm.org_events
+    FOR EACH ROW
+    WHEN (OLD.organization_id IS DISTINCT FROM NEW.organization_id)
+    EXECUTE FUNCTION journeys.reattribute_enrollments_on_event_owner();
+
+UPDATE journeys.enrollments e
+SET attributed_organization_id = COALESCE(
+    (SELECT oe.organization_id FROM crm.org_events oe WHERE oe.id = e.event_id),
+    j.organization_id
+)
+FROM journeys.journeys j
+WHERE j.id = e.journey_id;
+
+-- 2. TABLAS DE CONTADORES
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS journeys.enrollment_counters (
+    journey_id      UUID NOT NULL REFERENCES journeys.journeys(id) ON DELETE CASCADE,
+    organization_id UUID NOT NULL,
+    status          TEXT NOT NULL,
+    total           INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (journey_id, organization_id, status)
+);
+
+CREATE TABLE IF NOT EXISTS journeys.step_counters (
+    journey_id  UUID PRIMARY KEY REFERENCES journeys.journeys(id) ON DELETE CASCADE,
+    total_steps INTEGER NOT NULL DEFAULT 0
+);
+
+ALTER TABLE journeys.enrollment_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE journeys.step_counters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "admin_enrollment_counters" ON journeys.enrollment_counters;
+CREATE POLICY "admin_enrollment_counters" ON journeys.enrollment_counters
+    FOR SELECT USING (public.is_platform_admin() = TRUE);
+
+DROP POLICY IF EXISTS "read_step_counters" ON journeys.step_counters;
+CREATE POLICY "read_step_counters" ON journeys.step_counters
+    FOR SELECT USING (TRUE);
+
+GRANT ALL ON TABLE journeys.enrollment_counters TO service_role;
+GRANT ALL ON TABLE journeys.step_counters TO service_role;
+
+-- 3. TRIGGER: enrollments → enrollment_counters
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.maintain_enrollment_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF TG_OP = 'UPDATE'
+            AND OLD.journey_id = NEW.journey_id
+            AND OLD.status IS NOT DISTINCT FROM NEW.status
+            AND OLD.attributed_organization_id IS NOT DISTINCT FROM NEW.attributed_organization_id
+        THEN
+            RETURN NULL;
+        END IF;
+
+        UPDATE journeys.enrollment_counters
+        SET total = total - 1
+        WHERE journey_id      = OLD.journey_id
+          AND organization_id = OLD.attributed_organization_id
+          AND status          = OLD.status::TEXT;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.attributed_organization_id IS NOT NULL THEN
+        INSERT INTO journeys.enrollment_counters (journey_id, organization_id, status, total)
+        VALUES (NEW.journey_id, NEW.attributed_organization_id, NEW.status::TEXT, 1)
+        ON CONFLICT (journey_id, organization_id, status)
+        DO UPDATE SET total = journeys.enrollment_counters.total + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_enrollment_counters ON journeys.enrollments;
+CREATE TRIGGER trg_enrollment_counters
+    AFTER INSERT OR UPDATE OR DELETE ON journeys.enrollments
+    FOR EACH ROW EXECUTE FUNCTION journeys.maintain_enrollment_counters();
+
+-- 4. TRIGGER: steps → step_counters
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.maintain_step_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.journey_id = NEW.journey_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE journeys.step_counters
+        SET total_steps = total_steps - 1
+        WHERE journey_id = OLD.journey_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO journeys.step_counters (journey_id, total_steps)
+        VALUES (NEW.journey_id, 1)
+        ON CONFLICT (journey_id)
+        DO UPDATE SET total_steps = journeys.step_counters.total_steps + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_step_counters ON journeys.steps;
+CREATE TRIGGER trg_step_counters
+    AFTER INSERT OR UPDATE OF journey_id OR DELETE ON journeys.steps
+    FOR EACH ROW EXECUTE FUNCTION journeys.maintain_step_counters();
+
+-- 5. BACKFILL
+-- =============================================================================
+INSERT INTO journeys.enrollment_counters (journey_id, organization_id, status, total)
+SELECT journey_id, attributed_organization_id, status::TEXT, COUNT(*)
+FROM journeys.enrollments
+WHERE attributed_organization_id IS NOT NULL
+GROUP BY journey_id, attributed_organization_id, status
+ON CONFLICT (journey_id, organization_id, status)
+DO UPDATE SET total = EXCLUDED.total;
+
+INSERT INTO journeys.step_counters (journey_id, total_steps)
+SELECT journey_id, COUNT(*)
+FROM journeys.steps
+GROUP BY journey_id
+ON CONFLICT (journey_id)
+DO UPDATE SET total_steps = EXCLUDED.total_steps;
+
+SELECT 'enrollment_counters + step_counters created and backfilled' AS status;
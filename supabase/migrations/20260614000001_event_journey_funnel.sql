@@ -0,0 +1,312 @@
+-- =============================================================================
+-- MIGRATION: Funnel evento → journey mantenido incrementalmente
+-- =============================================================================
+-- list_org_tracking recalculaba en Python el funnel asistentes × journeys
+-- descargando todas las filas de crm.event_attendances y journeys.enrollments.
+-- Esta tabla guarda el agregado por (event_id, journey_id) y se actualiza con
+-- deltas (±1) desde triggers, así el costo del dashboard no escala con el
+-- tamaño del evento.
+--
+-- Semántica (idéntica a list_org_tracking):
+--   total       = asistentes del evento con status registered/attended
+--   active      = de ellos, con enrollment (journey, event) status 'active'
+--   completed   = de ellos, con enrollment (journey, event) status 'completed'
+--   not_started = total - active - completed (sin enrollment, pending/dropped)
+--
+-- Mantenimiento:
+--   crm.event_journeys     INSERT → fila calculada desde cero; DELETE → borra
+--   crm.event_attendances  entra/sale de la base → ±1 total (+ su estado)
+--   journeys.enrollments   cambia status/event → ±1 active/completed
+-- Los deltas sólo hacen UPDATE: si la fila ya no existe (cascadas) es no-op.
+--
+-- Concurrencia: cada delta lee el estado de la otra tabla (la asistencia mira
+-- el enrollment y viceversa). Sin serializar, dos transacciones concurrentes
+-- leen cada una el estado pre-commit de la otra y se pierde o duplica un ±1.
+-- Por eso los deltas y el recálculo bloquean primero las filas del funnel
+-- afectadas (FOR UPDATE, en orden de journey_id) y leen después: la segunda
+-- espera a la primera y, en READ COMMITTED, su lectura ya la incluye.
+-- =============================================================================
+
+-- 1. TABLA
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS crm.event_journey_funnel (
+    event_id    UUID NOT NULL REFERENCES crm.org_events(id) ON DELETE CASCADE,
+    journey_id  UUID NOT NULL REFERENCES journeys.journeys(id) ON DELETE CASCADE,
+    total       INTEGER NOT NULL DEFAULT 0,
+    active      INTEGER NOT NULL DEFAULT 0,
+    completed   INTEGER NOT NULL DEFAULT 0,
+    not_started INTEGER GENERATED ALWAYS AS (total - active - completed) STORED,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (event_id, journey_id)
+);
+
+ALTER TABLE crm.event_journey_funnel ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "event_journey_funnel_admin_read" ON crm.event_journey_funnel;
+CREATE POLICY "event_journey_funnel_admin_read" ON crm.event_journey_funnel
+    FOR SELECT USING (public.is_platform_admin() = TRUE);
+
+GRANT ALL ON TABLE crm.event_journey_funnel TO service_role;
+
+-- 2. RECÁLCULO COMPLETO DE UNA FILA (alta de event_journeys / backfill)
+-- =============================================================================
+CREATE OR REPLACE FUNCTION crm.rebuild_event_journey_funnel(
+    p_event_id   UUID,
+    p_journey_id UUID
+)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+SET search_path = public, crm, journeys
+AS $$
+    SELECT 1 FROM crm.event_journey_funnel
+    WHERE event_id = p_event_id AND journey_id = p_journey_id
+    FOR UPDATE;
+
+    INSERT INTO crm.event_journey_funnel (event_id, journey_id, total, active, completed)
+    SELECT
+        p_event_id,
+        p_journey_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE e.status = 'active'),
+        COUNT(*) FILTER (WHERE e.status = 'completed')
+    FROM crm.event_attendances a
+    LEFT JOIN journeys.enrollments e
+           ON e.user_id    = a.user_id
+          AND e.journey_id = p_journey_id
+          AND e.event_id   = p_event_id
+    WHERE a.event_id = p_event_id
+      AND a.status IN ('registered', 'attended')
+    ON CONFLICT (event_id, journey_id) DO UPDATE
+    SET total      = EXCLUDED.total,
+        active     = EXCLUDED.active,
+        completed  = EXCLUDED.completed,
+        updated_at = NOW();
+$$;
+
+-- 3. TRIGGER: crm.event_journeys
+-- =============================================================================
+CREATE OR REPLACE FUNCTION crm.handle_event_journey_funnel()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM crm.event_journey_funnel
+        WHERE event_id = OLD.event_id AND journey_id = OLD.journey_id;
+        RETURN NULL;
+    END IF;
+
+    PERFORM crm.rebuild_event_journey_funnel(NEW.event_id, NEW.journey_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_event_journey_funnel ON crm.event_journeys;
+CREATE TRIGGER trg_event_journey_funnel
+    AFTER INSERT OR DELETE ON crm.event_journeys
+    FOR EACH ROW EXECUTE FUNCTION crm.handle_event_journey_funnel();
+
+-- 4. TRIGGER: crm.event_attendances (entra/sale de la base del funnel)
+-- =============================================================================
+CREATE OR REPLACE FUNCTION crm.apply_attendance_funnel_delta(
+    p_event_id UUID,
+    p_user_id  UUID,
+    p_sign     INTEGER
+)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+SET search_path = public, crm, journeys
+AS $$
+    SELECT 1 FROM crm.event_journey_funnel
+    WHERE event_id = p_event_id
+    ORDER BY journey_id
+    FOR UPDATE;
+
+    UPDATE crm.event_journey_funnel f
+    SET total      = f.total + p_sign,
+        active     = f.active    + p_sign * (CASE WHEN e.status = 'active'    THEN 1 ELSE 0 END),
+        completed  = f.completed + p_sign * (CASE WHEN e.status = 'completed' THEN 1 ELSE 0 END),
+        updated_at = NOW()
+    FROM crm.event_journeys ej
+    LEFT JOIN journeys.enrollments e
+           ON e.journey_id = ej.journey_id
+          AND e.event_id   = ej.event_id
+          AND e.user_id    = p_user_id
+    WHERE ej.event_id  = p_event_id
+      AND f.event_id   = ej.event_id
+      AND f.journey_id = ej.journey_id;
+$$;
+
+CREATE OR REPLACE FUNCTION crm.handle_attendance_funnel()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_old_counted BOOLEAN := FALSE;
+    v_new_counted BOOLEAN := FALSE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_old_counted := OLD.status IN ('registered', 'attended');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_new_counted := NEW.status IN ('registered', 'attended');
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+        AND OLD.event_id = NEW.event_id
+        AND OLD.user_id  = NEW.user_id
+        AND v_old_counted = v_new_counted
+    THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_old_counted THEN
+        PERFORM crm.apply_attendance_funnel_delta(OLD.event_id, OLD.user_id, -1);
+    END IF;
+    IF v_new_counted THEN
+        PERFORM crm.apply_attendance_funnel_delta(NEW.event_id, NEW.user_id, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_attendance_funnel ON crm.event_attendances;
+CREATE TRIGGER trg_attendance_funnel
+    AFTER INSERT OR UPDATE OF event_id, user_id, status OR DELETE ON crm.event_attendances
+    FOR EACH ROW EXECUTE FUNCTION crm.handle_attendance_funnel();
+
+-- 5. TRIGGER: journeys.enrollments (cambia el estado dentro del funnel)
+-- =============================================================================
+CREATE OR REPLACE FUNCTION crm.apply_enrollment_funnel_delta(
+    p_event_id   UUID,
+    p_journey_id UUID,
+    p_user_id    UUID,
+    p_status     TEXT,
+    p_sign       INTEGER
+)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+SET search_path = public, crm, journeys
+AS $$
+    SELECT 1 FROM crm.event_journey_funnel
+    WHERE event_id = p_event_id AND journey_id = p_journey_id
+    FOR UPDATE;
+
+    UPDATE crm.event_journey_funnel f
+    SET active     = f.active    + p_sign * (CASE WHEN p_status = 'active'    THEN 1 ELSE 0 END),
+        completed  = f.completed + p_sign * (CASE WHEN p_status = 'completed' THEN 1 ELSE 0 END),
+        updated_at = NOW()
+    WHERE f.event_id   = p_event_id
+      AND f.journey_id = p_journey_id
+      AND p_status IN ('active', 'completed')
+      AND EXISTS (
+          SELECT 1 FROM crm.event_attendances a
+          WHERE a.event_id = p_event_id
+            AND a.user_id  = p_user_id
+            AND a.status IN ('registered', 'attended')
+      );
+$$;
+
+CREATE OR REPLACE FUNCTION crm.handle_enrollment_funnel()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND OLD.event_id   IS NOT DISTINCT FROM NEW.event_id
+        AND OLD.journey_id = NEW.journey_id
+        AND OLD.user_id    = NEW.user_id
+        AND OLD.status     IS NOT DISTINCT FROM NEW.status
+    THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.event_id IS NOT NULL THEN
+        PERFORM crm.apply_enrollment_funnel_delta(
+            OLD.event_id, OLD.journey_id, OLD.user_id, OLD.status::TEXT, -1
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.event_id IS NOT NULL THEN
+        PERFORM crm.apply_enrollment_funnel_delta(
+            NEW.event_id, NEW.journey_id, NEW.user_id, NEW.status::TEXT, 1
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_enrollment_funnel ON journeys.enrollments;
+CREATE TRIGGER trg_enrollment_funnel
+    AFTER INSERT OR UPDATE OR DELETE ON journeys.enrollments
+    FOR EACH ROW EXECUTE FUNCTION crm.handle_enrollment_funnel();
+
+-- 6. USUARIOS ÚNICOS (total_unique_enrolled_users de list_org_tracking)
+-- =============================================================================
+-- El funnel da conteos por par, pero la unión de asistentes entre eventos no
+-- se puede sumar; este COUNT(DISTINCT) evita bajar los user_ids a Python.
+-- Journeys sin evento: lógica legacy, enrollments de miembros activos.
+CREATE OR REPLACE FUNCTION public.count_org_tracking_unique_users(
+    p_organization_id        UUID,
+    p_event_ids              UUID[],
+    p_unassigned_journey_ids UUID[]
+)
+RETURNS BIGINT
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, crm, journeys
+AS $$
+    SELECT COUNT(DISTINCT u.user_id)
+    FROM (
+        SELECT a.user_id
+        FROM crm.event_attendances a
+        WHERE a.event_id = ANY(p_event_ids)
+          AND a.status IN ('registered', 'attended')
+        UNION
+        SELECT e.user_id
+        FROM journeys.enrollments e
+        JOIN public.organization_members om
+          ON om.user_id = e.user_id
+         AND om.organization_id = p_organization_id
+         AND om.status = 'active'
+        WHERE e.journey_id = ANY(p_unassigned_journey_ids)
+    ) u;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.count_org_tracking_unique_users(UUID, UUID[], UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.count_org_tracking_unique_users(UUID, UUID[], UUID[]) TO service_role;
+
+-- Helpers internos de los triggers: nadie los llama por /rpc.
+REVOKE EXECUTE ON FUNCTION crm.rebuild_event_journey_funnel(UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION crm.apply_attendance_funnel_delta(UUID, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION crm.apply_enrollment_funnel_delta(UUID, UUID, UUID, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- 7. RECONCILIACIÓN (admin: POST .../tracking/events/{id}/funnel/rebuild)
+-- =============================================================================
+-- Recalcula desde cero todas las filas del evento; red de seguridad ante
+-- cualquier deriva de los deltas.
+CREATE OR REPLACE FUNCTION public.rebuild_event_funnel(p_event_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, crm, journeys
+AS $$
+DECLARE
+    v_pairs INTEGER := 0;
+    v_journey_id UUID;
+BEGIN
+    FOR v_journey_id IN
+        SELECT ej.journey_id FROM crm.event_journeys ej
+        WHERE ej.event_id = p_event_id
+        ORDER BY ej.journey_id
+    LOOP
+        PERFORM crm.rebuild_event_journey_funnel(p_event_id, v_journey_id);
+        v_pairs := v_pairs + 1;
+    END LOOP;
+    RETURN v_pairs;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.rebuild_event_funnel(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_event_funnel(UUID) TO service_role;
+
+-- 8. BACKFILL
+-- =============================================================================
+SELECT crm.rebuild_event_journey_funnel(ej.event_id, ej.journey_id)
+FROM crm.event_journeys ej;
+
+SELECT 'crm.event_journey_funnel created and backfilled' AS status;
@@ -0,0 +1,28 @@
+-- Migration: Member-scoped journey enrollments resolved server-side
+-- El export CSV sin evento (iter_journey_enrollees) paginaba TODOS los
+-- enrollments del journey, de cualquier org, y filtraba los miembros activos
+-- de la org en Python página por página: un journey global con pocos
+-- miembros de la org recorría el journey entero. Esta función hace el JOIN
+-- con organization_members en la DB.
+
+-- Devuelve filas de journeys.enrollments, así que el backend sigue
+-- encadenando .select() / .gt() / .order() / .limit() sobre db.rpc(...).
+CREATE OR REPLACE FUNCTION public.get_org_member_enrollments(
+    p_organization_id UUID,
+    p_journey_id UUID
+)
+RETURNS SETOF journeys.enrollments
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+    SELECT e.*
+    FROM journeys.enrollments e
+    JOIN public.organization_members om
+      ON om.user_id = e.user_id
+     AND om.organization_id = p_organization_id
+     AND om.status = 'active'
+    WHERE e.journey_id = p_journey_id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_org_member_enrollments(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_org_member_enrollments(UUID, UUID) TO service_role;
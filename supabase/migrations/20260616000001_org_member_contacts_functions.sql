@@ -0,0 +1,49 @@
+-- Migration: Member-scoped CRM contact reads resolved server-side
+-- get_contacts y /crm/stats filtraban crm.contacts con .in_("user_id", ...)
+-- sobre TODOS los miembros activos de la org: con miles de miembros la URL
+-- pasa de varios KB (límites de PostgREST / proxies) y el plan empeora.
+-- Estas funciones hacen el JOIN con organization_members en la DB.
+
+-- 1. Contactos de miembros activos (SETOF crm.contacts).
+-- Devuelve filas de crm.contacts, así que el backend sigue encadenando
+-- .or_() / .order() / .range() y count="exact" sobre db.rpc(...).
+CREATE OR REPLACE FUNCTION public.get_org_member_contacts(
+    p_organization_id UUID
+)
+RETURNS SETOF crm.contacts
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, crm
+AS $$
+    SELECT c.*
+    FROM crm.contacts c
+    JOIN public.organization_members om
+      ON om.user_id = c.user_id
+     AND om.organization_id = p_organization_id
+     AND om.status = 'active';
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_org_member_contacts(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_org_member_contacts(UUID) TO service_role;
+
+-- 2. Breakdown de contactos por status (stats del CRM)
+CREATE OR REPLACE FUNCTION public.get_org_contact_status_counts(
+    p_organization_id UUID
+)
+RETURNS TABLE (
+    status TEXT,
+    total  BIGINT
+)
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, crm
+AS $$
+    SELECT c.status, COUNT(*)
+    FROM crm.contacts c
+    JOIN public.organization_members om
+      ON om.user_id = c.user_id
+     AND om.organization_id = p_organization_id
+     AND om.status = 'active'
+    GROUP BY c.status;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_org_contact_status_counts(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_org_contact_status_counts(UUID) TO service_role;
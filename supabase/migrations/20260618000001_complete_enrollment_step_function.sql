@@ -0,0 +1,186 @@
+-- =============================================================================
+-- MIGRATION: Completar un step en un solo round-trip
+-- =============================================================================
+-- POST /enrollments/{id}/steps/{step_id}/complete hacía hasta 7 llamadas
+-- PostgREST secuenciales (enrollment ×3, step ×2, duplicado, insert). Es el
+-- write de mayor volumen durante eventos en vivo.
+--
+-- public.complete_enrollment_step() valida, inserta y devuelve el progreso
+-- en una sola transacción:
+--   1. enrollment existe            → outcome 'not_found'
+--   2. pertenece a p_user_id        → outcome 'forbidden'
+--   3. status = 'active'            → outcome 'inactive'
+--   4. step ∈ journey del enrollment → outcome 'wrong_journey'
+--   5. step no completado aún       → outcome 'duplicate'
+--   6. date gates (available_from / unlock_hours_after_start)
+--                                   → outcome 'locked'
+--   7. INSERT en step_completions (los triggers existentes otorgan puntos,
+--      rewards, actualizan progreso y auto-completan) → outcome 'ok'
+--
+-- El enrollment se bloquea (FOR UPDATE) para que dos reintentos concurrentes
+-- no pasen ambos el chequeo de duplicado; el segundo ve 'duplicate' en vez
+-- de un unique_violation después de que el BEFORE trigger ya otorgó puntos.
+--
+-- La metadata enriquecida replica _build_enriched_metadata() del backend
+-- (crud/enrollments.py), que sigue usándose para completions desde el CRM.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION public.complete_enrollment_step(
+    p_enrollment_id      UUID,
+    p_step_id            UUID,
+    p_user_id            UUID,
+    p_metadata           JSONB DEFAULT NULL,
+    p_external_reference TEXT  DEFAULT NULL,
+    p_service_data       JSONB DEFAULT NULL
+)
+RETURNS TABLE (
+    outcome             TEXT,
+    step_id             TEXT,
+    completed_at        TIMESTAMPTZ,
+    points_earned       INTEGER,
+    enrollment_progress DOUBLE PRECISION
+)
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_enrollment    RECORD;
+    v_step          RECORD;
+    v_resource      JSONB;
+    v_resource_type TEXT;
+    v_source_url    TEXT;
+    v_form_id       TEXT;
+    v_service       TEXT;
+    v_metadata      JSONB;
+    v_completion    RECORD;
+    v_progress      DOUBLE PRECISION;
+BEGIN
+    -- 1-3. Enrollment: existencia, ownership, status (bloqueado hasta el commit)
+    SELECT e.id, e.user_id, e.journey_id, e.status, e.started_at
+    INTO v_enrollment
+    FROM journeys.enrollments e
+    WHERE e.id = p_enrollment_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_found'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+    IF v_enrollment.user_id <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+    IF v_enrollment.status <> 'active' THEN
+        RETURN QUERY SELECT 'inactive'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+
+    -- 4. Step del journey del enrollment
+    SELECT s.id, s.type::TEXT AS type, s.config, s.available_from, s.unlock_hours_after_start
+    INTO v_step
+    FROM journeys.steps s
+    WHERE s.id = p_step_id
+      AND s.journey_id = v_enrollment.journey_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'wrong_journey'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+
+    -- 5. Duplicado
+    IF EXISTS (
+        SELECT 1 FROM journeys.step_completions sc
+        WHERE sc.enrollment_id = p_enrollment_id
+          AND sc.step_id = p_step_id
+    ) THEN
+        RETURN QUERY SELECT 'duplicate'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+
+    -- 6. Date gates
+    IF (v_step.available_from IS NOT NULL AND NOW() < v_step.available_from)
+        OR (
+            COALESCE(v_step.unlock_hours_after_start, 0) <> 0
+            AND v_enrollment.started_at IS NOT NULL
+            AND NOW() < v_enrollment.started_at
+                        + make_interval(hours => v_step.unlock_hours_after_start)
+        )
+    THEN
+        RETURN QUERY SELECT 'locked'::TEXT, NULL::TEXT, NULL::TIMESTAMPTZ, NULL::INTEGER, NULL::DOUBLE PRECISION;
+        RETURN;
+    END IF;
+
+    -- 7a. Metadata enriquecida (mismo formato que _build_enriched_metadata)
+    v_resource := v_step.config->'resource';
+    IF v_resource IS NULL OR jsonb_typeof(v_resource) <> 'object' THEN
+        v_resource := '{}'::jsonb;
+    END IF;
+    v_resource_type := v_resource->>'type';
+
+    v_metadata := jsonb_build_object(
+        'step_type',    v_step.type,
+        'completed_at', to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')
+    );
+
+    v_service := CASE v_step.type
+        WHEN 'survey'               THEN COALESCE(v_resource_type, 'typeform')
+        WHEN 'content_view'         THEN COALESCE(v_resource_type, 'video')
+        WHEN 'resource_consumption' THEN COALESCE(v_resource_type, 'resource')
+        WHEN 'milestone'            THEN COALESCE(v_resource_type, 'milestone')
+        WHEN 'event_attendance'     THEN 'event'
+        WHEN 'social_interaction'   THEN 'social'
+    END;
+    IF v_service IS NOT NULL THEN
+        v_metadata := v_metadata || jsonb_build_object('service', v_service);
+    END IF;
+
+    IF v_step.type = 'survey' THEN
+        IF jsonb_typeof(v_resource->'source_url') = 'string' THEN
+            v_source_url := v_resource->>'source_url';
+            v_form_id := NULLIF(substring(v_source_url FROM 'typeform\.com/to/([^?/]*)'), '');
+            IF v_form_id IS NOT NULL THEN
+                v_metadata := v_metadata || jsonb_build_object('form_id', v_form_id);
+            END IF;
+        END IF;
+        IF NULLIF(p_external_reference, '') IS NOT NULL THEN
+            v_metadata := v_metadata || jsonb_build_object('response_id', p_external_reference);
+        END IF;
+    END IF;
+
+    IF p_metadata IS NOT NULL AND jsonb_typeof(p_metadata) = 'object' THEN
+        v_metadata := v_metadata || p_metadata;
+    END IF;
+    IF p_service_data IS NOT NULL AND p_service_data NOT IN ('{}'::jsonb, 'null'::jsonb) THEN
+        v_metadata := v_metadata || jsonb_build_object('service_data', p_service_data);
+    END IF;
+
+    -- 7b. Insert (triggers: denormalizados, puntos/rewards, progreso)
+    INSERT INTO journeys.step_completions (
+        enrollment_id, step_id, points_earned, metadata, external_reference
+    )
+    VALUES (
+        p_enrollment_id, p_step_id, 0, v_metadata, NULLIF(p_external_reference, '')
+    )
+    RETURNING journeys.step_completions.step_id,
+              journeys.step_completions.completed_at,
+              journeys.step_completions.points_earned
+    INTO v_completion;
+
+    SELECT e.progress_percentage INTO v_progress
+    FROM journeys.enrollments e
+    WHERE e.id = p_enrollment_id;
+
+    RETURN QUERY SELECT
+        'ok'::TEXT,
+        v_completion.step_id::TEXT,
+        v_completion.completed_at,
+        v_completion.points_earned,
+        COALESCE(v_progress, 0.0)::DOUBLE PRECISION;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.complete_enrollment_step(UUID, UUID, UUID, JSONB, TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.complete_enrollment_step(UUID, UUID, UUID, JSONB, TEXT, JSONB) TO service_role;
+
+SELECT 'complete_enrollment_step() created' AS status;
@@ -0,0 +1,129 @@
+-- =============================================================================
+-- MIGRATION: completed_steps / total_steps denormalizados en enrollments
+-- =============================================================================
+-- can_complete_enrollment hacía dos count="exact" (steps + step_completions)
+-- cada vez que un usuario terminaba un journey, y el dashboard recontaba
+-- completions por enrollment. Con estas columnas el chequeo es una lectura
+-- de una sola fila.
+--
+--   completed_steps  ← step_completions INSERT/DELETE (±1)
+--   total_steps      ← steps INSERT/DELETE/cambio de journey (recuento del
+--                      journey afectado; editar steps es raro)
+--                    ← enrollments BEFORE INSERT (valor inicial)
+--
+-- Concurrencia: un alta de enrollment cuenta los steps mientras un alta de
+-- step actualiza sólo los enrollments ya commiteados; en READ COMMITTED
+-- ninguno vería al otro y total_steps quedaría corrido para siempre. Ambos
+-- triggers bloquean la fila del journey (enrollment: FOR SHARE, no se
+-- bloquean entre sí; step: FOR UPDATE) antes de leer, así el segundo espera
+-- al primero y lee con un snapshot que ya lo incluye.
+-- =============================================================================
+
+-- 1. COLUMNAS
+-- =============================================================================
+ALTER TABLE journeys.enrollments
+    ADD COLUMN IF NOT EXISTS completed_steps INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_steps     INTEGER NOT NULL DEFAULT 0;
+
+-- 2. TRIGGER: enrollments (valor inicial de total_steps)
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.init_enrollment_step_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM journeys.journeys WHERE id = NEW.journey_id FOR SHARE;
+
+    SELECT COUNT(*) INTO NEW.total_steps
+    FROM journeys.steps
+    WHERE journey_id = NEW.journey_id;
+
+    IF TG_OP = 'INSERT' THEN
+        NEW.completed_steps := 0;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_init_enrollment_step_counts ON journeys.enrollments;
+CREATE TRIGGER trg_init_enrollment_step_counts
+    BEFORE INSERT OR UPDATE OF journey_id ON journeys.enrollments
+    FOR EACH ROW EXECUTE FUNCTION journeys.init_enrollment_step_counts();
+
+-- 3. TRIGGER: step_completions → completed_steps
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.maintain_enrollment_completed_steps()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE journeys.enrollments
+        SET completed_steps = completed_steps + 1
+        WHERE id = NEW.enrollment_id;
+    ELSE
+        UPDATE journeys.enrollments
+        SET completed_steps = GREATEST(completed_steps - 1, 0)
+        WHERE id = OLD.enrollment_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_enrollment_completed_steps ON journeys.step_completions;
+CREATE TRIGGER trg_enrollment_completed_steps
+    AFTER INSERT OR DELETE ON journeys.step_completions
+    FOR EACH ROW EXECUTE FUNCTION journeys.maintain_enrollment_completed_steps();
+
+-- 4. TRIGGER: steps → total_steps de los enrollments del journey
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.sync_enrollment_total_steps(p_journey_id UUID)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+    SELECT 1 FROM journeys.journeys WHERE id = p_journey_id FOR UPDATE;
+
+    UPDATE journeys.enrollments e
+    SET total_steps = sc.total
+    FROM (
+        SELECT COUNT(*)::INTEGER AS total
+        FROM journeys.steps
+        WHERE journey_id = p_journey_id
+    ) sc
+    WHERE e.journey_id = p_journey_id
+      AND e.total_steps IS DISTINCT FROM sc.total;
+$$;
+
+CREATE OR REPLACE FUNCTION journeys.maintain_enrollment_total_steps()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.journey_id = NEW.journey_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM journeys.sync_enrollment_total_steps(OLD.journey_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM journeys.sync_enrollment_total_steps(NEW.journey_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_enrollment_total_steps ON journeys.steps;
+CREATE TRIGGER trg_enrollment_total_steps
+    AFTER INSERT OR UPDATE OF journey_id OR DELETE ON journeys.steps
+    FOR EACH ROW EXECUTE FUNCTION journeys.maintain_enrollment_total_steps();
+
+-- 5. BACKFILL
+-- =============================================================================
+UPDATE journeys.enrollments e
+SET completed_steps = COALESCE(
+        (SELECT COUNT(*) FROM journeys.step_completions sc WHERE sc.enrollment_id = e.id), 0
+    ),
+    total_steps = COALESCE(
+        (SELECT COUNT(*) FROM journeys.steps s WHERE s.journey_id = e.journey_id), 0
+    );
+
+SELECT 'enrollments.completed_steps / total_steps created and backfilled' AS status;
@@ -0,0 +1,62 @@
+-- =============================================================================
+-- MIGRATION: updated_at fiable para el delta sync del dashboard
+-- =============================================================================
+-- GET /enrollments/me/full?since=<cursor> devuelve sólo lo que cambió desde
+-- el cursor, comparando:
+--   enrollments.updated_at        (status, progreso, evento, ...)
+--   step_completions.completed_at (filas inmutables)
+--   journeys.updated_at           (journey o cualquiera de sus steps)
+--
+-- enrollments.updated_at sólo lo tocaba handle_step_completion: un drop o un
+-- complete manual no lo movían. Y editar/crear/borrar un step no tocaba el
+-- updated_at del journey.
+-- =============================================================================
+
+-- 1. enrollments.updated_at en cada UPDATE que cambia la fila
+-- =============================================================================
+-- Se ignoran los UPDATE sin cambios y los que sólo tocan total_steps: ese
+-- recuento lo reescribe sync_enrollment_total_steps en TODOS los enrollments
+-- del journey al crear/borrar un step, y el cambio ya llega al cliente por
+-- journeys.updated_at (punto 2). Si no, cada edición de steps forzaría un
+-- rebuild completo del dashboard de cada participante.
+CREATE OR REPLACE FUNCTION journeys.touch_enrollment_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'total_steps' - 'updated_at')
+       IS DISTINCT FROM (to_jsonb(OLD) - 'total_steps' - 'updated_at') THEN
+        NEW.updated_at := NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_enrollments_timestamp ON journeys.enrollments;
+CREATE TRIGGER update_enrollments_timestamp BEFORE UPDATE ON journeys.enrollments
+    FOR EACH ROW EXECUTE FUNCTION journeys.touch_enrollment_updated_at();
+
+-- 2. cambios en steps → journeys.updated_at
+-- =============================================================================
+CREATE OR REPLACE FUNCTION journeys.touch_journey_on_step_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE journeys.journeys
+    SET updated_at = NOW()
+    WHERE id IN (
+        CASE WHEN TG_OP <> 'INSERT' THEN OLD.journey_id END,
+        CASE WHEN TG_OP <> 'DELETE' THEN NEW.journey_id END
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_touch_journey_on_step_change ON journeys.steps;
+CREATE TRIGGER trg_touch_journey_on_step_change
+    AFTER INSERT OR UPDATE OR DELETE ON journeys.steps
+    FOR EACH ROW EXECUTE FUNCTION journeys.touch_journey_on_step_change();
+
+-- 3. Índice para "completions del usuario desde X"
+-- =============================================================================
+CREATE INDEX IF NOT EXISTS idx_step_completions_user_completed_at
+    ON journeys.step_completions (user_id, completed_at);
+
+SELECT 'dashboard sync timestamps ready' AS status;
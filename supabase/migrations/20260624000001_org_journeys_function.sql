@@ -0,0 +1,34 @@
+-- Migration: Journeys visibles para una org resueltos server-side
+-- get_journeys_for_org y list_journeys_admin hacían 3 queries: junction
+-- table, todos los journeys globales y luego el select principal con un
+-- .in_("id", union_ids) que crece con el catálogo. Esta función hace la
+-- unión en la DB.
+--
+-- Devuelve filas de journeys.journeys, así que el backend sigue encadenando
+-- .eq() / .order() / .range() y count="exact" sobre db.rpc(...).
+-- El chequeo de acceso por journey usa un índice de IDs cacheado en Redis
+-- (journey_ids:global + journey_ids:org:{org_id}).
+
+CREATE OR REPLACE FUNCTION public.get_org_journeys(
+    p_organization_id UUID
+)
+RETURNS SETOF journeys.journeys
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+    SELECT j.*
+    FROM journeys.journeys j
+    WHERE j.is_global
+       OR EXISTS (
+            SELECT 1
+            FROM journeys.journey_organizations jo
+            WHERE jo.journey_id = j.id
+              AND jo.organization_id = p_organization_id
+       );
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_org_journeys(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_org_journeys(UUID) TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_journeys_is_global
+    ON journeys.journeys (id) WHERE is_global;
@@ -0,0 +1,64 @@
+-- Migration: Reorden de steps en bloque + stats de completions agrupadas
+-- reorder_steps hacía un UPDATE por step y luego list_steps una query de
+-- step_completions por step (sumando points_earned en Python): arrastrar un
+-- step en un journey de 30 costaba 60+ round trips. Ahora son 2 llamadas.
+
+-- 1. Reorden en bloque: arrays paralelos (step_id, nuevo índice).
+-- Sólo toca steps del journey indicado; devuelve cuántos cambiaron.
+CREATE OR REPLACE FUNCTION public.reorder_journey_steps(
+    p_journey_id UUID,
+    p_step_ids   UUID[],
+    p_indexes    INT[]
+)
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    IF COALESCE(array_length(p_step_ids, 1), 0) <> COALESCE(array_length(p_indexes, 1), 0) THEN
+        RAISE EXCEPTION 'p_step_ids y p_indexes deben tener el mismo largo'
+            USING ERRCODE = '22023';
+    END IF;
+
+    UPDATE journeys.steps s
+    SET order_index = v.new_index
+    FROM unnest(p_step_ids, p_indexes) AS v(step_id, new_index)
+    WHERE s.id = v.step_id
+      AND s.journey_id = p_journey_id
+      AND s.order_index IS DISTINCT FROM v.new_index;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.reorder_journey_steps(UUID, UUID[], INT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reorder_journey_steps(UUID, UUID[], INT[]) TO service_role;
+
+-- 2. Completions por step de un journey (una query agrupada)
+CREATE OR REPLACE FUNCTION public.get_step_completion_stats(
+    p_journey_id UUID
+)
+RETURNS TABLE (
+    step_id           UUID,
+    total_completions BIGINT,
+    average_points    NUMERIC
+)
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+    SELECT sc.step_id,
+           COUNT(*),
+           ROUND(AVG(COALESCE(sc.points_earned, 0)), 2)
+    FROM journeys.step_completions sc
+    WHERE sc.journey_id = p_journey_id
+    GROUP BY sc.step_id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.get_step_completion_stats(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_step_completion_stats(UUID) TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_step_completions_journey_step
+    ON journeys.step_completions (journey_id, step_id);
@@ -0,0 +1,97 @@
+-- =============================================================================
+-- MIGRATION: Borrado de enrollments transaccional y en lote
+-- =============================================================================
+-- delete_enrollment hacía hasta 7 statements secuenciales por enrollment
+-- (fetch, ids de completions, points_ledger, user_activities, user_rewards,
+-- step_completions, enrollment), sin atomicidad: un fallo a mitad dejaba
+-- puntos o actividades huérfanas. Resetear una cohorte después de un evento
+-- de prueba eran miles de round trips.
+--
+-- public.delete_enrollments() borra todo en una transacción para:
+--   p_enrollment_ids                    → esos enrollments
+--   p_event_id [+ p_journey_id]         → la cohorte del evento (opcional:
+--                                          sólo ese journey)
+-- (unión de ambos criterios). Devuelve las filas borradas.
+--
+-- p_limit acota cuántos enrollments borra una llamada: las filas devueltas
+-- pasan por el max-rows de PostgREST (1000), así que el backend borra en
+-- lotes más chicos y repite hasta que un lote vuelve incompleto.
+-- =============================================================================
+
+DROP FUNCTION IF EXISTS public.delete_enrollments(UUID[], UUID, UUID);
+
+CREATE OR REPLACE FUNCTION public.delete_enrollments(
+    p_enrollment_ids UUID[]  DEFAULT NULL,
+    p_event_id       UUID    DEFAULT NULL,
+    p_journey_id     UUID    DEFAULT NULL,
+    p_limit          INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    enrollment_id UUID,
+    user_id       UUID,
+    journey_id    UUID
+)
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, journeys
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_ids UUID[];
+BEGIN
+    -- 1. Resolver y bloquear los enrollments objetivo
+    SELECT array_agg(e.id) INTO v_ids
+    FROM (
+        SELECT e.id
+        FROM journeys.enrollments e
+        WHERE (p_enrollment_ids IS NOT NULL AND e.id = ANY(p_enrollment_ids))
+           OR (p_event_id IS NOT NULL
+               AND e.event_id = p_event_id
+               AND (p_journey_id IS NULL OR e.journey_id = p_journey_id))
+        ORDER BY e.id
+        LIMIT p_limit
+        FOR UPDATE
+    ) e;
+
+    IF v_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- 2. points_ledger de sus step completions
+    DELETE FROM journeys.points_ledger pl
+    USING journeys.step_completions sc
+    WHERE sc.enrollment_id = ANY(v_ids)
+      AND pl.reference_id = sc.id;
+
+    -- 3. user_activities (step_completed / journey_completed guardan
+    --    enrollment_id en metadata)
+    DELETE FROM journeys.user_activities ua
+    USING journeys.enrollments e
+    WHERE e.id = ANY(v_ids)
+      AND ua.user_id = e.user_id
+      AND ua.metadata->>'enrollment_id' = e.id::text;
+
+    -- 4. user_rewards ganados en esos journeys
+    DELETE FROM journeys.user_rewards ur
+    USING journeys.enrollments e
+    WHERE e.id = ANY(v_ids)
+      AND ur.user_id = e.user_id
+      AND ur.journey_id = e.journey_id;
+
+    -- 5. step_completions y 6. enrollments
+    DELETE FROM journeys.step_completions
+    WHERE enrollment_id = ANY(v_ids);
+
+    RETURN QUERY
+    DELETE FROM journeys.enrollments e
+    WHERE e.id = ANY(v_ids)
+    RETURNING e.id, e.user_id, e.journey_id;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.delete_enrollments(UUID[], UUID, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.delete_enrollments(UUID[], UUID, UUID, INTEGER) TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_points_ledger_reference
+    ON journeys.points_ledger (reference_id);
+
+SELECT 'delete_enrollments function created' AS status;
@@ -0,0 +1,120 @@
+-- =============================================================================
+-- MIGRATION: Inscripción en lote de cohortes
+-- =============================================================================
+-- Inscribir una cohorte era un POST /enrollments/ (o assign-event) por
+-- usuario, cada uno con su chequeo de existencia + insert. Para un evento de
+-- 2.000 personas: 2.000 requests.
+--
+-- public.bulk_enroll_users() recibe un lote de user_ids y/o emails y, en una
+-- transacción:
+--   1. resuelve cada identificador contra public.profiles
+--   2. (modo evento) membresía 'participante' en la org
+--      — ON CONFLICT DO NOTHING: no pisa roles existentes
+--   3. inserta enrollments para cada journey × usuario
+--      ON CONFLICT (journey_id, user_id) DO NOTHING
+--   4. (modo evento) asistencia 'registered', ON CONFLICT DO NOTHING
+-- y devuelve un outcome por identificador:
+--   enrolled          → al menos un enrollment nuevo
+--   already_enrolled  → ya tenía enrollment en todos los journeys
+--   not_found         → no existe el usuario / email
+-- El backend parte la lista en lotes y valida journey / evento antes.
+--
+-- 3 y 4 son sentencias separadas (y en ese orden), igual que POST
+-- /enrollments/: los triggers AFTER ROW del funnel (crm.event_journey_funnel)
+-- corren al final de cada sentencia, y en una sola sentencia cada uno vería
+-- la fila del otro y el asistente nuevo se contaría dos veces en 'active'.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION public.bulk_enroll_users(
+    p_journey_ids     UUID[],
+    p_user_ids        UUID[] DEFAULT NULL,
+    p_emails          TEXT[] DEFAULT NULL,
+    p_event_id        UUID   DEFAULT NULL,
+    p_organization_id UUID   DEFAULT NULL,
+    p_modality        TEXT   DEFAULT 'presencial'
+)
+RETURNS TABLE (
+    identifier        TEXT,
+    user_id           UUID,
+    outcome           TEXT,
+    journeys_enrolled INTEGER
+)
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, journeys, crm
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_identifiers TEXT[];
+    v_resolved    UUID[];
+    v_users       UUID[];
+    v_inserted    UUID[];
+BEGIN
+    -- 1. Resolver identificadores (mismo orden que la entrada)
+    SELECT array_agg(i.identifier ORDER BY i.ord),
+           array_agg(COALESCE(pu.id, pe.id) ORDER BY i.ord)
+    INTO v_identifiers, v_resolved
+    FROM (
+        SELECT u::TEXT AS identifier, u AS requested_id, NULL::TEXT AS email, n AS ord
+        FROM unnest(COALESCE(p_user_ids, '{}'::UUID[])) WITH ORDINALITY AS t(u, n)
+        UNION ALL
+        SELECT e, NULL::UUID, lower(btrim(e)), COALESCE(cardinality(p_user_ids), 0) + n
+        FROM unnest(COALESCE(p_emails, '{}'::TEXT[])) WITH ORDINALITY AS t(e, n)
+    ) i
+    LEFT JOIN public.profiles pu ON pu.id = i.requested_id
+    LEFT JOIN public.profiles pe ON pe.email = i.email;
+
+    SELECT array_agg(DISTINCT u) INTO v_users
+    FROM unnest(v_resolved) AS u
+    WHERE u IS NOT NULL;
+
+    IF v_users IS NOT NULL THEN
+        -- 2. Membresía en la org del evento
+        IF p_organization_id IS NOT NULL THEN
+            INSERT INTO public.organization_members (organization_id, user_id, role, status, joined_at)
+            SELECT p_organization_id, u, 'participante', 'active', NOW()
+            FROM unnest(v_users) AS u
+            ON CONFLICT (organization_id, user_id) DO NOTHING;
+        END IF;
+
+        -- 3. Enrollments
+        WITH inserted AS (
+            INSERT INTO journeys.enrollments (user_id, journey_id, event_id, status, current_step_index, started_at)
+            SELECT u, j, p_event_id, 'active', 0, NOW()
+            FROM unnest(v_users) AS u
+            CROSS JOIN unnest(p_journey_ids) AS j
+            ON CONFLICT (journey_id, user_id) DO NOTHING
+            RETURNING user_id
+        )
+        SELECT array_agg(ins.user_id) INTO v_inserted FROM inserted ins;
+
+        -- 4. Asistencia al evento (después de los enrollments, ver cabecera)
+        IF p_event_id IS NOT NULL THEN
+            INSERT INTO crm.event_attendances (event_id, user_id, status, modality, registered_at)
+            SELECT p_event_id, u, 'registered', p_modality, NOW()
+            FROM unnest(v_users) AS u
+            ON CONFLICT (event_id, user_id) DO NOTHING;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+    SELECT r.identifier,
+           r.user_id,
+           CASE
+               WHEN r.user_id IS NULL THEN 'not_found'
+               WHEN pu.n > 0 THEN 'enrolled'
+               ELSE 'already_enrolled'
+           END,
+           COALESCE(pu.n, 0)
+    FROM unnest(v_identifiers, v_resolved) AS r(identifier, user_id)
+    LEFT JOIN (
+        SELECT ins AS user_id, COUNT(*)::INTEGER AS n
+        FROM unnest(v_inserted) AS ins
+        GROUP BY ins
+    ) pu ON pu.user_id = r.user_id;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.bulk_enroll_users(UUID[], UUID[], TEXT[], UUID, UUID, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_enroll_users(UUID[], UUID[], TEXT[], UUID, UUID, TEXT) TO service_role;
+
+SELECT 'bulk_enroll_users function created' AS status;